@@ -0,0 +1,94 @@
+from machine import Timer
+
+import pixels
+
+
+class Animation:
+    """
+    precomputed frames of the pixels, one after the other in one bytearray,
+    with a memoryview of every frame made once, so frame() allocates nothing in the timer callback
+    """
+
+    def __init__(self, frames: bytearray):
+        view = memoryview(frames)
+        size = pixels.FRAME_SIZE
+        self._frames = [view[i:i + size] for i in range(0, len(frames) - size + 1, size)]
+
+    def __len__(self) -> int:
+        return len(self._frames)
+
+    def frame(self, i: int):
+        return self._frames[i]
+
+
+def precompute(generator) -> Animation:
+    """an Animation of the colour lists a generator yields, like tlv_pixels.rainbow_generator()"""
+    frames = bytearray()
+    for colors in generator:
+        frames += pixels.frame(colors)
+    return Animation(frames)
+
+
+class Animator:
+    """
+    plays stored animations on a timer, every frame is shown with a single np.write(),
+    the timer callback only copies a frame into the neopixel buffer, nothing is allocated while playing
+    """
+
+    def __init__(self, timer_id: int = 0):
+        self._timer_id = timer_id
+        self._timer = None
+        self._animations = {}
+        self._playing = None
+        self._animation = None
+        self._frame = 0
+        self._loops = 0
+        self._next_cb = self._next  # bound once, not for every play()
+
+        self.frames_shown = 0
+
+    def store(self, animation_id: int, animation: Animation) -> None:
+        self._animations[animation_id] = animation
+
+    def animations(self) -> dict:
+        return self._animations
+
+    def playing(self) -> int | None:
+        """id of the animation playing"""
+        return self._playing
+
+    def play(self, animation_id: int, fps: int, loops: int = 0) -> None:
+        """play a stored animation at fps frames per second (at least 1), loops times or until stop() when 0"""
+        self.stop()
+        self._animation = self._animations[animation_id]
+        self._playing = animation_id
+        self._frame = 0
+        self._loops = loops
+        self._show()
+        if self._timer is None:
+            self._timer = Timer(self._timer_id)
+        self._timer.init(mode=Timer.PERIODIC, period=max(1, 1_000 // max(1, fps)), callback=self._next_cb)
+
+    def stop(self) -> None:
+        """stop playing, the last frame stays on"""
+        if self._timer is not None:
+            self._timer.deinit()
+        self._playing = None
+        self._animation = None
+
+    def _show(self) -> None:
+        pixels.show_frame(self._animation.frame(self._frame))
+        self.frames_shown += 1
+
+    def _next(self, timer) -> None:
+        if self._animation is None:
+            return
+        self._frame += 1
+        if self._frame == len(self._animation):
+            self._frame = 0
+            if self._loops:
+                self._loops -= 1
+                if not self._loops:
+                    self.stop()
+                    return
+        self._show()
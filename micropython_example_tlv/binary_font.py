@@ -0,0 +1,172 @@
+"""
+binary font format for the 1 bit per pixel fonts of font2bitmap, read glyph by glyph from flash
+
+    header  <2sBBBBH  b'BF', version, HEIGHT, MAX_WIDTH, number of glyphs, size of the glyph data
+    MAP     one byte per glyph
+    index   <BBBH per glyph: width, first non blank row, number of rows up to the last non blank row, data offset
+    data    per glyph its rows, a 1 bit repeats the previous row, a 0 bit is followed by the width bits of the row
+
+blank rows above and below a glyph are not stored, the glyph data starts at a byte
+"""
+import struct
+import sys
+
+from micropython import const
+
+_MAGIC = b'BF'
+_VERSION = const(1)
+_HEADER = '<2sBBBBH'
+_HEADER_SIZE = const(8)
+_INDEX = '<BBBH'
+_INDEX_SIZE = const(5)
+
+
+def _copy_bits(src, src_bit: int, dst, dst_bit: int, n: int) -> None:
+    """or n bits of src at src_bit into dst at dst_bit, msb first"""
+    for _ in range(n):
+        if src[src_bit >> 3] & (0x80 >> (src_bit & 7)):
+            dst[dst_bit >> 3] |= 0x80 >> (dst_bit & 7)
+        src_bit += 1
+        dst_bit += 1
+
+
+def _glyph_rows(font, index: int) -> list:
+    """rows of glyph index of a font module as ints, the leftmost pixel in the highest bit"""
+    width = font.WIDTHS[index]
+    bit = 0
+    for i in range(index * font.OFFSET_WIDTH, (index + 1) * font.OFFSET_WIDTH):
+        bit = bit << 8 | font.OFFSETS[i]
+    rows = []
+    for _ in range(font.HEIGHT):
+        row = 0
+        for _ in range(width):
+            row = row << 1 | (1 if font.BITMAPS[bit >> 3] & (0x80 >> (bit & 7)) else 0)
+            bit += 1
+        rows.append(row)
+    return rows
+
+
+def encode_font(font) -> bytes:
+    """the binary font of a font2bitmap font module with MAP, WIDTHS, OFFSETS and BITMAPS"""
+    index = bytearray()
+    data = bytearray()
+    for i in range(len(font.MAP)):
+        width = font.WIDTHS[i]
+        rows = _glyph_rows(font, i)
+        top = 0
+        while top < len(rows) and not rows[top]:
+            top += 1
+        bottom = len(rows)
+        while bottom > top and not rows[bottom - 1]:
+            bottom -= 1
+
+        bits = 0
+        n = 0
+        previous = None
+        for row in rows[top:bottom]:
+            if row == previous:
+                bits = bits << 1 | 1
+                n += 1
+            else:
+                bits = bits << (1 + width) | row
+                n += 1 + width
+            previous = row
+        size = (n + 7) >> 3
+        index += struct.pack(_INDEX, width, top, bottom - top, len(data))
+        data += (bits << (size * 8 - n)).to_bytes(size, 'big')
+
+    return (struct.pack(_HEADER, _MAGIC, _VERSION, font.HEIGHT, font.MAX_WIDTH, len(font.MAP), len(data))
+            + font.MAP.encode() + index + data)
+
+
+def find(name: str) -> str:
+    """path of the file name in the directories of sys.path, like an import"""
+    for directory in sys.path:
+        path = directory + '/' + name if directory else name
+        try:
+            open(path, 'rb').close()
+            return path
+        except OSError:
+            pass
+    raise OSError("font not found: " + name)
+
+
+class BinaryFont:
+    """
+    a font in the binary format, only the header, MAP and the index are kept in ram,
+    glyphs are read from the file when needed and decoded into the BITMAPS layout of font2bitmap,
+    the last cache_glyphs decoded glyphs are kept
+    """
+
+    def __init__(self, path: str, cache_glyphs: int = 8):
+        self._file = open(path, 'rb', 0)  # unbuffered, glyphs are read whole into _read_buf
+        magic, version, self.HEIGHT, self.MAX_WIDTH, count, data_size = struct.unpack(
+            _HEADER, self._file.read(_HEADER_SIZE))
+        if magic != _MAGIC or version != _VERSION:
+            self._file.close()
+            raise ValueError("not a binary font: " + path)
+        self.MAP = self._file.read(count).decode()
+        self._index = self._file.read(count * _INDEX_SIZE)
+        self.WIDTHS = bytes(self._index[i * _INDEX_SIZE] for i in range(count))
+        self._data_start = _HEADER_SIZE + count * (1 + _INDEX_SIZE)
+        self._data_size = data_size
+
+        # the encoded rows of the largest glyph fit
+        self._read_buf = bytearray((self.HEIGHT * (1 + self.MAX_WIDTH) + 7) >> 3)
+        self._read_view = memoryview(self._read_buf)
+        self._cache_glyphs = cache_glyphs
+        self._cache = {}  # index -> [bitmap, last used]
+        self._tick = 0
+
+        self.reads = 0
+        self.hits = 0
+
+    def _data_end(self, index: int) -> int:
+        if index + 1 < len(self.WIDTHS):
+            return struct.unpack_from(_INDEX, self._index, (index + 1) * _INDEX_SIZE)[3]
+        return self._data_size
+
+    def bitmap(self, index: int):
+        """glyph index as width * HEIGHT bits row by row from bit 0, like its bits in BITMAPS"""
+        self._tick += 1
+        entry = self._cache.get(index)
+        if entry is not None:
+            self.hits += 1
+            entry[1] = self._tick
+            return entry[0]
+
+        width, top, rows, offset = struct.unpack_from(_INDEX, self._index, index * _INDEX_SIZE)
+        data = self._read_view[:self._data_end(index) - offset]
+        self._file.seek(self._data_start + offset)
+        self._file.readinto(data)
+        self.reads += 1
+
+        bitmap = bytearray((width * self.HEIGHT + 7) >> 3)
+        src = 0
+        dst = top * width
+        for _ in range(rows):
+            repeat = data[src >> 3] & (0x80 >> (src & 7))
+            src += 1
+            if repeat:
+                _copy_bits(bitmap, dst - width, bitmap, dst, width)
+            else:
+                _copy_bits(data, src, bitmap, dst, width)
+                src += width
+            dst += width
+
+        if len(self._cache) >= self._cache_glyphs:
+            oldest = None
+            for i in self._cache:
+                if oldest is None or self._cache[i][1] < self._cache[oldest][1]:
+                    oldest = i
+            del self._cache[oldest]
+        self._cache[index] = [bitmap, self._tick]
+        return bitmap
+
+    def close(self) -> None:
+        self._file.close()
+
+
+def load(name: str, cache_glyphs: int = 8) -> BinaryFont:
+    """open the binary font file name found on sys.path"""
+    return BinaryFont(find(name), cache_glyphs)
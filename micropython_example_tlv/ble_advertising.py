@@ -20,6 +20,8 @@ _ADV_TYPE_UUID128_MORE = const(0x6)
 _ADV_TYPE_APPEARANCE = const(0x19)
 _ADV_TYPE_MANUFACTURER_SPECIFIC_DATA = const(0xff)
 
+_ADV_MAX_PAYLOAD = const(31)
+
 
 # Generate a payload to be passed to gap_advertise(adv_data=...).
 def advertising_payload(limited_disc=None, br_edr=None, name=None, services=None, appearance=None, company_id=None, man_spec_data=None):
@@ -55,11 +57,17 @@ def advertising_payload(limited_disc=None, br_edr=None, name=None, services=None
         # See org.bluetooth.characteristic.gap.appearance.xml
         _append(_ADV_TYPE_APPEARANCE, struct.pack('<h', appearance))
 
-    if len(payload) > 31:
+    if len(payload) > _ADV_MAX_PAYLOAD:
         raise RuntimeError("max advertising payload 31, got: " + str(len(payload)))
     return payload
 
 
+# Number of manufacturer specific data bytes that still fit in a payload next to the other fields:
+# what the other fields leave of the payload, less the length and type bytes of the field and the company id.
+def man_spec_data_budget(company_id_length=2, **fields):
+    return _ADV_MAX_PAYLOAD - len(advertising_payload(**fields)) - 2 - company_id_length
+
+
 def decode_field(payload, adv_type):
     i = 0
     result = []
@@ -70,6 +78,37 @@ def decode_field(payload, adv_type):
     return result
 
 
+# Offset of the data of the first ad structure of adv_type, 0 when there is none, its length is payload[offset - 2] - 1.
+# Stops walking at that structure and allocates nothing, for cheap prefilters.
+def find_field(payload, adv_type):
+    n = len(payload)
+    i = 0
+    while i + 1 < n:
+        length = payload[i]
+        if length > 0 and payload[i + 1] == adv_type:
+            return i + 2 if i + 1 + length <= n else 0
+        i += 1 + length
+    return 0
+
+
+# Compare bytes in place, without slicing payload.
+def equals_at(payload, offset, expected):
+    if offset + len(expected) > len(payload):
+        return False
+    i = 0
+    while i < len(expected):
+        if payload[offset + i] != expected[i]:
+            return False
+        i += 1
+    return True
+
+
+# Compare the complete local name in place, wanted_name as bytes.
+def name_equals(payload, wanted_name):
+    offset = find_field(payload, _ADV_TYPE_NAME)
+    return offset != 0 and payload[offset - 2] - 1 == len(wanted_name) and equals_at(payload, offset, wanted_name)
+
+
 def decode_name(payload):
     n = decode_field(payload, _ADV_TYPE_NAME)
     return str(n[0], 'utf-8') if n else ''
@@ -80,7 +119,7 @@ def decode_services(payload):
     for u in decode_field(payload, _ADV_TYPE_UUID16_COMPLETE):
         services.append(bluetooth.UUID(struct.unpack('<h', u)[0]))
     for u in decode_field(payload, _ADV_TYPE_UUID32_COMPLETE):
-        services.append(bluetooth.UUID(struct.unpack('<d', u)[0]))
+        services.append(bluetooth.UUID(struct.unpack('<I', u)[0]))
     for u in decode_field(payload, _ADV_TYPE_UUID128_COMPLETE):
         services.append(bluetooth.UUID(u))
     return services
@@ -104,6 +143,9 @@ def demo():
     print(payload_2)
     print(decode_man_spec_data(payload_2))
 
+    offset = find_field(payload_2, _ADV_TYPE_MANUFACTURER_SPECIFIC_DATA)
+    print(equals_at(payload_2, offset, b'\xff\xff'))
+
 
 if __name__ == '__main__':
     demo()
@@ -0,0 +1,124 @@
+try:
+    import asyncio
+except ImportError:
+    import uasyncio as asyncio
+import time
+
+from tlv import TLVParser, TLVException
+
+_async_sleep_ms = getattr(asyncio, 'sleep_ms', None) or (lambda ms: asyncio.sleep(ms / 1000))
+
+_MAX_CATCH_UP_MS = 20
+
+
+class BroadcastScheduler:
+    """
+    Asyncio scheduler for a BLESimplePeripheral
+    the advertising windows, the local application of the tlvs and the show script run as separate tasks:
+    the show awaits broadcast(), which only waits for a free place in the window queue,
+    the advertiser task runs the queued windows back to back on a fixed timeline,
+    the apply task applies the tlvs of the current window locally.
+    the callbacks have to return right away, like the ones of tlv_buzzer.append_mappings: the songs play from a timer.
+    a tlv that cannot be applied locally is counted in apply_errors, the applier goes on with the next one
+    """
+
+    def __init__(self, per, tlv_parser: TLVParser, max_pending: int = 1, interval_us: int = 40_000):
+        self._per = per
+        self._tlv_parser = tlv_parser
+        self._max_pending = max_pending
+        self._interval_us = interval_us
+
+        self._windows = []  # (encoded, delay_ms), the first one is advertising
+        self._applies = []  # encoded tlvs to apply locally
+        self._window_queued = asyncio.Event()
+        self._window_done = asyncio.Event()
+        self._apply_queued = asyncio.Event()
+
+        self.windows_sent = 0
+        self.max_late_ms = 0
+        self.apply_errors = 0  # tlvs that could not be applied locally, they were still broadcast
+
+    async def broadcast(self, encoded: bytes, delay_ms: int = 200) -> None:
+        """queue encoded tlvs for an advertising window of delay_ms, returns as soon as it is queued"""
+        TLVParser.decode(encoded)  # raise on malformed tlvs before they are queued
+
+        # one more than max_pending: the first window is the one advertising
+        while len(self._windows) > self._max_pending:
+            self._window_done.clear()
+            await self._window_done.wait()
+
+        self._windows.append((bytes(encoded), delay_ms))
+        self._window_queued.set()
+
+    async def drain(self) -> None:
+        """wait until all queued windows are sent"""
+        while self._windows:
+            self._window_done.clear()
+            await self._window_done.wait()
+
+    async def run(self, show) -> None:
+        """run the show coroutine function, show(scheduler), until it and all its windows are done"""
+        tasks = (asyncio.create_task(self._advertiser()), asyncio.create_task(self._applier()))
+        try:
+            await show(self)
+            await self.drain()
+        finally:
+            for task in tasks:
+                task.cancel()
+            for task in tasks:
+                try:
+                    await task
+                except asyncio.CancelledError:
+                    pass
+            self._per.stop_advertise()
+
+    async def _advertiser(self) -> None:
+        window_start = time.ticks_ms()
+        while True:
+            if not self._windows:
+                while not self._windows:
+                    self._window_queued.clear()
+                    await self._window_queued.wait()
+                window_start = time.ticks_ms()  # idle, start a new timeline
+
+            late_ms = time.ticks_diff(time.ticks_ms(), window_start)
+            self.max_late_ms = max(self.max_late_ms, late_ms)
+            if late_ms > _MAX_CATCH_UP_MS:
+                # the loop was blocked, start from now instead of cutting this window short
+                window_start = time.ticks_ms()
+
+            encoded, delay_ms = self._windows[0]
+            self._per.man_spec_data(encoded)
+            self._per.start_advertise(self._interval_us)
+
+            self._applies.append(encoded)
+            self._apply_queued.set()
+
+            window_start = time.ticks_add(window_start, delay_ms)
+            await _async_sleep_ms(max(0, time.ticks_diff(window_start, time.ticks_ms())))
+
+            self._per.stop_advertise()
+            self._windows.pop(0)
+            self.windows_sent += 1
+            self._window_done.set()
+
+    async def _applier(self) -> None:
+        while True:
+            while not self._applies:
+                self._apply_queued.clear()
+                await self._apply_queued.wait()
+
+            encoded = self._applies.pop(0)
+            for tlv_type, tlv_length, tlv_value in TLVParser.decode(encoded):
+                try:
+                    self._tlv_parser.apply_tlv(tlv_type, tlv_length, tlv_value)
+                except TLVException as e:
+                    # a length or type this parser does not accept, the next tlvs are still applied
+                    self.apply_errors += 1
+                    print(f"cannot apply tlv {tlv_type}: {e!r}")
+                except Exception as e:
+                    # a callback failing on a value it did not expect
+                    self.apply_errors += 1
+                    print(f"applying tlv {tlv_type} failed: {e!r}")
+                await _async_sleep_ms(0)  # let the advertiser run between the tlvs
+
@@ -1,10 +1,14 @@
 import bluetooth
 import time
-from ble_advertising import decode_man_spec_data, decode_name
-from tlv import TLVParser
+from array import array
+from ble_advertising import name_equals, find_field, equals_at
+from tlv import TLVParser, TLVException, LOG_OFF
+import tlv_codecs
+import tlv_types
 import tlv_pixels
 import tlv_screen
 import tlv_buzzer
+import tlv_motion
 
 from micropython import const
 
@@ -17,19 +21,221 @@ _ADV_SCAN_IND = const(0x02)
 _ADV_NONCONN_IND = const(0x03)
 _ADV_SCAN_RSP = const(0x04)
 
+_ADV_TYPE_MANUFACTURER_SPECIFIC_DATA = const(0xff)
+
 _OUR_COMPANY_ID = const(b'\xff\xff')
 
+_EMPTY_KEY = const(-1)  # a free DedupCache slot, the keys are 24 bit hashes
+_DEDUP_PROBE = const(4)  # slots a DedupCache key can be in
+
+# 31 bytes advertising payload - 2 bytes length and ad type of the manufacturer specific data
+_MAX_MAN_SPEC_DATA = const(29)
+
 tlv_parser = TLVParser()
 
 tlv_pixels.append_mappings(tlv_parser)
 tlv_screen.append_mappings(tlv_parser)
 tlv_buzzer.append_mappings(tlv_parser)
+tlv_motion.append_mappings(tlv_parser)
+tlv_parser.compile()
+# the per tlv log line costs more than applying most tlvs, use LOG_DEBUG to see every applied tlv
+tlv_parser.set_log(LOG_OFF)
+
+
+class ScanResultQueue:
+    """
+    Fixed size ring buffer of manufacturer specific data payloads, push() copies into a preallocated slot
+    and can be called from the ble irq, pop_into() is called from the main loop to decode and apply
+    the ble irq runs between bytecodes of the main loop, so only push() changes _write and only pop_into() changes _read
+    """
+    DROP_OLDEST = 0
+    DROP_NEWEST = 1
+
+    def __init__(self, slots: int = 8, slot_size: int = _MAX_MAN_SPEC_DATA, policy: int = DROP_OLDEST):
+        self._slots = slots
+        self._slot_size = slot_size
+        self._policy = policy
+        self._buf = bytearray(slots * slot_size)
+        self._view = memoryview(self._buf)
+        self._lengths = bytearray(slots)
+        self._write = 0  # number of pushed payloads
+        self._read = 0  # number of popped or dropped payloads
+
+        self.pushed = 0
+        self.popped = 0
+        self.dropped_oldest = 0
+        self.dropped_newest = 0
+        self.too_long = 0
+        self.high_water = 0
+
+    def slot_size(self) -> int:
+        return self._slot_size
+
+    def __len__(self) -> int:
+        return min(self._write - self._read, self._slots)
+
+    def push(self, data: bytes) -> bool:
+        """copy data into the next slot, no allocation, False when it was dropped"""
+        n = len(data)
+        if n > self._slot_size:
+            self.too_long += 1
+            return False
+
+        pending = self._write - self._read
+        if pending >= self._slots:
+            if self._policy == ScanResultQueue.DROP_NEWEST:
+                self.dropped_newest += 1
+                return False
+            # DROP_OLDEST: overwrite the oldest slot, pop_into() skips ahead and counts it
+        elif pending + 1 > self.high_water:
+            self.high_water = pending + 1
+
+        slot = self._write % self._slots
+        offset = slot * self._slot_size
+        self._view[offset:offset + n] = data
+        self._lengths[slot] = n
+        self._write += 1
+        self.pushed += 1
+        return True
+
+    def pop_into(self, out: bytearray) -> int:
+        """copy the oldest payload into out, returns its length or 0 when the queue is empty"""
+        read = self._read
+        pending = self._write - read
+        if pending == 0:
+            return 0
+        if pending > self._slots:
+            self.dropped_oldest += pending - self._slots
+            read = self._write - self._slots
+
+        slot = read % self._slots
+        n = self._lengths[slot]
+        offset = slot * self._slot_size
+        out[:n] = self._view[offset:offset + n]
+        self._read = read + 1
+        self.popped += 1
+        return n
+
+    def stats(self) -> dict:
+        return {'pushed': self.pushed, 'popped': self.popped, 'dropped_oldest': self.dropped_oldest,
+                'dropped_newest': self.dropped_newest, 'too_long': self.too_long, 'high_water': self.high_water}
+
+
+class DedupCache:
+    """
+    Fixed capacity cache of recently seen (sender address, payload hash) keys, to drop repeated advertisements
+    an entry expires expire_ms after it was last seen.
+    an open addressing table allocated once: a key lives in one of the _DEDUP_PROBE slots from key % capacity,
+    seen() runs in the irq and only looks at those, a new key takes a free one or evicts the least recently seen
+    """
+
+    def __init__(self, capacity: int = 16, expire_ms: int = 1_000):
+        self._capacity = capacity
+        self._expire_ms = expire_ms
+        self._probe = min(_DEDUP_PROBE, capacity)
+        self._keys = array('l', [_EMPTY_KEY] * capacity)
+        self._last_seen = array('l', [0] * capacity)  # ticks_ms the key in the same slot was last seen
+        self._size = 0
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @staticmethod
+    def key(addr: bytes, payload: bytes) -> int:
+        # 24 bit hash, kept small so it stays a small int on micropython and needs no allocation in the irq
+        h = 5381
+        for b in addr:
+            h = ((h * 33) ^ b) & 0xffffff
+        for b in payload:
+            h = ((h * 33) ^ b) & 0xffffff
+        return h
+
+    def seen(self, addr: bytes, payload: bytes) -> bool:
+        """True when the same sender sent the same payload less than expire_ms ago"""
+        key = DedupCache.key(addr, payload)
+        now = time.ticks_ms()
+        keys = self._keys
+        last_seen = self._last_seen
+        capacity = self._capacity
+
+        i = key % capacity
+        victim = i
+        victim_age = -1
+        for _ in range(self._probe):
+            if keys[i] == key:
+                age = time.ticks_diff(now, last_seen[i])
+                last_seen[i] = now
+                if age < self._expire_ms:
+                    self.hits += 1
+                    return True
+                self.misses += 1
+                return False
+            if victim_age < 0x3fffffff:
+                if keys[i] == _EMPTY_KEY:
+                    victim = i
+                    victim_age = 0x3fffffff  # a free slot, taken before evicting
+                else:
+                    age = time.ticks_diff(now, last_seen[i])
+                    if age > victim_age:
+                        victim = i
+                        victim_age = age
+            i += 1
+            if i == capacity:
+                i = 0
+
+        if keys[victim] == _EMPTY_KEY:
+            self._size += 1
+        else:
+            self.evictions += 1
+        keys[victim] = key
+        last_seen[victim] = now
+        self.misses += 1
+        return False
+
+    def clear(self) -> None:
+        for i in range(self._capacity):
+            self._keys[i] = _EMPTY_KEY
+        self._size = 0
+
+    def stats(self) -> dict:
+        return {'hits': self.hits, 'misses': self.misses, 'evictions': self.evictions, 'size': self._size}
 
 
 class BLESimpleCentral:
-    def __init__(self, wanted_name: str | None, min_rssi: int = None):
+    """
+    Scans for the advertisements of our company id, every scan result goes through a prefilter, cheapest check first:
+    advertising type, rssi, company id compared in place, address allow-list, duplicates, name, extra predicate
+    the rejections are counted per reason, see prefilter_stats()
+    enable_stats() also times the irq handler, see stats() and stats_to_bytes()
+    """
+    def __init__(self, wanted_name: str | None, min_rssi: int = None, dedup: DedupCache | None = None,
+                 company_id: bytes = _OUR_COMPANY_ID, adv_type: int | None = _ADV_SCAN_IND,
+                 allowed_addrs: list[bytes] | None = None, extra_filter=None):
         self._wanted_name = wanted_name
+        self._wanted_name_bytes = wanted_name.encode() if wanted_name is not None else None
         self._min_rssi = min_rssi
+        self._dedup = dedup
+        self._company_id = company_id
+        self._adv_type = adv_type
+        self._allowed_addrs = allowed_addrs
+        self._extra_filter = extra_filter  # extra_filter(addr, rssi, adv_data) -> bool, evaluated last
+
+        self.accepted = 0
+        self.rejected_adv_type = 0
+        self.rejected_rssi = 0
+        self.rejected_company_id = 0
+        self.rejected_addr = 0
+        self.rejected_duplicate = 0
+        self.rejected_name = 0
+        self.rejected_extra = 0
+
+        self.irq_calls = 0
+        self.irq_us_max = 0
+        self.irq_us_total = 0
+        self._timed = False
+
+        self.apply_errors = 0  # accepted advertisements whose tlvs could not be applied
 
         self._ble = bluetooth.BLE()
         self._scan_result_callback = None
@@ -38,7 +244,7 @@ class BLESimpleCentral:
     def __enter__(self):
         print("activate ble")
         self._ble.active(True)
-        self._ble.irq(self._irq)
+        self._ble.irq(self._timed_irq if self._timed else self._irq)
         return self
 
     def __exit__(self, exc_type, exc_value, exc_tb):
@@ -47,23 +253,100 @@ class BLESimpleCentral:
         print("deactivate ble")
         self._ble.active(False)
 
+    def _addr_allowed(self, addr) -> bool:
+        for allowed in self._allowed_addrs:
+            if equals_at(addr, 0, allowed):
+                return True
+        return False
+
+    def _prefilter(self, addr, adv_type: int, rssi: int, adv_data) -> int:
+        """offset of the manufacturer specific data, starting with our company id, 0 when the scan result is rejected"""
+        if self._adv_type is not None and adv_type != self._adv_type:
+            self.rejected_adv_type += 1
+            return 0
+
+        if self._min_rssi is not None and rssi <= self._min_rssi:
+            self.rejected_rssi += 1
+            return 0
+
+        # stops walking at the manufacturer specific data, most foreign advertisements end here
+        offset = find_field(adv_data, _ADV_TYPE_MANUFACTURER_SPECIFIC_DATA)
+        if (offset == 0 or adv_data[offset - 2] - 1 <= len(self._company_id)
+                or not equals_at(adv_data, offset, self._company_id)):
+            self.rejected_company_id += 1
+            return 0
+
+        if self._allowed_addrs is not None and not self._addr_allowed(addr):
+            self.rejected_addr += 1
+            return 0
+
+        if self._dedup is not None and self._dedup.seen(addr, adv_data):
+            self.rejected_duplicate += 1
+            return 0
+
+        if self._wanted_name is not None and not name_equals(adv_data, self._wanted_name_bytes):
+            self.rejected_name += 1
+            return 0
+
+        if self._extra_filter is not None and not self._extra_filter(addr, rssi, adv_data):
+            self.rejected_extra += 1
+            return 0
+
+        self.accepted += 1
+        return offset
+
+    def prefilter_stats(self) -> dict:
+        return {'accepted': self.accepted, 'adv_type': self.rejected_adv_type, 'rssi': self.rejected_rssi,
+                'company_id': self.rejected_company_id, 'addr': self.rejected_addr,
+                'duplicate': self.rejected_duplicate, 'name': self.rejected_name, 'extra': self.rejected_extra}
+
+    def enable_stats(self, enable: bool = True) -> None:
+        """time the irq handler, disabled the untimed handler is registered so it costs nothing"""
+        self._timed = enable
+        if self._ble.active():
+            self._ble.irq(self._timed_irq if enable else self._irq)
+
+    def stats(self) -> dict:
+        rejected = (self.rejected_adv_type + self.rejected_rssi + self.rejected_company_id + self.rejected_addr +
+                    self.rejected_duplicate + self.rejected_name + self.rejected_extra)
+        return {'seen': self.accepted + rejected, 'accepted': self.accepted, 'rejected': rejected,
+                'irq_calls': self.irq_calls, 'irq_us_max': self.irq_us_max, 'irq_us_total': self.irq_us_total,
+                'apply_errors': self.apply_errors}
+
+    def stats_to_bytes(self) -> bytes:
+        """the prefilter and irq counters packed, the value of a tlv_types.tlv_type_stats_central tlv"""
+        # accepted, 7 rejection counters, irq calls, max and total irq us, apply errors
+        return tlv_codecs.STATS_CENTRAL.pack(self.accepted, self.rejected_adv_type, self.rejected_rssi,
+                                             self.rejected_company_id, self.rejected_addr, self.rejected_duplicate,
+                                             self.rejected_name, self.rejected_extra, self.irq_calls, self.irq_us_max,
+                                             self.irq_us_total & 0xffffffff, self.apply_errors)
+
+    @staticmethod
+    def stats_from_bytes(tlv_value: bytes) -> dict:
+        values = tlv_codecs.STATS_CENTRAL.unpack(tlv_value)
+        keys = ('accepted', 'adv_type', 'rssi', 'company_id', 'addr', 'duplicate', 'name', 'extra',
+                'irq_calls', 'irq_us_max', 'irq_us_total', 'apply_errors')
+        return {keys[i]: values[i] for i in range(len(keys))}
+
+    def _timed_irq(self, event, data):
+        start = time.ticks_us()
+        self._irq(event, data)
+        us = time.ticks_diff(time.ticks_us(), start)
+        self.irq_calls += 1
+        self.irq_us_total += us
+        if us > self.irq_us_max:
+            self.irq_us_max = us
+
     def _irq(self, event, data):
         if event == _IRQ_SCAN_RESULT:
             addr_type, addr, adv_type, rssi, adv_data = data
             # print("addr_type=", addr_type, ", addr=", bytes(addr), ", adv_type=", adv_type, ", rssi=", rssi, "adv_data=", bytes(adv_data))
-            # print("name: ", decode_name(bytes(adv_data)))
-            if ((self._min_rssi is not None and rssi > self._min_rssi)
-                    or self._min_rssi is None):
-                if adv_type == _ADV_SCAN_IND:
-
-                    if ((self._wanted_name is not None and self._wanted_name == decode_name(adv_data))
-                            or self._wanted_name is None):
-
-                        c_id, man_spec_data = decode_man_spec_data(adv_data)
-                        if _OUR_COMPANY_ID == c_id:
-                            # Found the required broadcast message, call our callback
-                            if self._scan_result_callback:
-                                self._scan_result_callback(bytes(man_spec_data))
+            offset = self._prefilter(addr, adv_type, rssi, adv_data)
+            if offset and self._scan_result_callback:
+                # Found the required broadcast message, call our callback
+                # man_spec_data is only valid during the irq, the callback has to copy it
+                length = adv_data[offset - 2] - 1  # the length of an ad structure includes its type
+                self._scan_result_callback(adv_data[offset + len(self._company_id):offset + length])
 
         elif event == _IRQ_SCAN_DONE:
             # scanning finished, restart it if needed
@@ -82,26 +365,68 @@ class BLESimpleCentral:
         self._ble.gap_scan(None)
 
 
-def central():
-    with BLESimpleCentral(wanted_name=None, min_rssi=-70) as cen:
+def init_hardware() -> None:
+    # the modules set up their hardware on first use, this does it at a known point: after the scan started,
+    # so the ble stack gets its memory first and the screen buffer is allocated once, before any tlv arrives
+    tlv_screen.init()
+    tlv_pixels.init()
+    tlv_buzzer.init()
+
+
+def central(stats: bool = False):
+    # the irq only copies the payload into the queue, decoding and applying (songs, screen fills) is done here
+    scan_results = ScanResultQueue()
+    data_buf = bytearray(scan_results.slot_size())
+    data_view = memoryview(data_buf)
+
+    dedup = DedupCache()
+
+    if stats:
+        tlv_parser.enable_stats()
+
+    with BLESimpleCentral(wanted_name=None, min_rssi=-70, dedup=dedup) as cen:
+        cen.enable_stats(stats)
         last_data = b''
 
         def on_scan_result(data):
             nonlocal last_data
             if data != last_data:
                 last_data = data
-                decoded = tlv_parser.decode(data)
-                tlv_parser.apply_tlvs(decoded)
+                tlv_parser.apply_tlvs(data)
 
         try:
-            cen.scan(callback=on_scan_result)
+            cen.scan(callback=scan_results.push)
+            init_hardware()
             while True:
+                n = scan_results.pop_into(data_buf)
+                while n:
+                    try:
+                        on_scan_result(bytes(data_view[:n]))
+                    except TLVException as e:
+                        # a malformed or unknown tlv in one advertisement, the next ones are still applied
+                        cen.apply_errors += 1
+                        print(f"cannot apply the tlvs: {e!r}")
+                    except Exception as e:
+                        # a callback failing on a value it did not expect
+                        cen.apply_errors += 1
+                        print(f"applying the tlvs failed: {e!r}")
+                    n = scan_results.pop_into(data_buf)
                 time.sleep_ms(10)
         except KeyboardInterrupt:
             cen.stop_scanning()
+            print(f"{scan_results.stats()=} {dedup.stats()=} {cen.prefilter_stats()=} {cen.apply_errors=}")
+            if stats:
+                print(f"{cen.stats()=}")
+                tlv_parser.stats().dump()
+                # the same as tlvs, to collect them with a TLVStreamDecoder on the other end of the serial link
+                print(tlv_parser.stats().to_tlv(tlv_types.tlv_type_stats_parser).hex() +
+                      tlv_parser.encode(tlv_types.tlv_type_stats_central, cen.stats_to_bytes()).hex())
         finally:
-            tlv_pixels.pixels.clear()
-            tlv_screen.tft.fill(tlv_screen.st7789.BLACK)
+            # only the hardware that was set up, clearing it must not set it up on the way out
+            if tlv_pixels.pixels.np is not None:
+                tlv_pixels.pixels.clear()
+            if tlv_screen.tft is not None:
+                tlv_screen.tft.fill(tlv_screen.st7789.BLACK)
 
 
 def main():
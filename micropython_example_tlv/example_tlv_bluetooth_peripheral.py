@@ -1,10 +1,16 @@
 import bluetooth
 import time
-from ble_advertising import advertising_payload
-from tlv import TLVParser
+try:
+    import asyncio
+except ImportError:
+    import uasyncio as asyncio
+from ble_advertising import advertising_payload, man_spec_data_budget
+from tlv import TLVParser, TLVBuilder
+from broadcast_scheduler import BroadcastScheduler
 import tlv_pixels
 import tlv_screen
 import tlv_buzzer
+import tlv_motion
 
 from micropython import const
 
@@ -15,14 +21,22 @@ tlv_parser = TLVParser()
 tlv_pixels.append_mappings(tlv_parser)
 tlv_screen.append_mappings(tlv_parser)
 tlv_buzzer.append_mappings(tlv_parser)
+tlv_motion.append_mappings(tlv_parser)
+tlv_parser.compile()
 
 
 class BLESimplePeripheral:
-    def __init__(self, name: str | None = "ble_peripheral"):
+    def __init__(self, name: str | None = "ble_peripheral", flush_after_ms: int = 100):
         self._ble = bluetooth.BLE()
         self._name = name
         self._payload = bytearray()
 
+        # pending tlvs, packed in as much manufacturer specific data as fits next to the name,
+        # TLVBuilder.ADV_CAPACITY less what the name takes
+        self._queue = TLVBuilder(man_spec_data_budget(name=name))
+        self._flush_after_ms = flush_after_ms
+        self._queue_deadline = 0
+
     def __enter__(self):
         print("activate ble")
         self._ble.active(True)
@@ -49,6 +63,28 @@ class BLESimplePeripheral:
         # print("stop advertise")
         self._ble.gap_advertise(None)
 
+    def queue(self, encoded: bytes) -> bool:
+        """queue encoded tlvs for the next advertisement, False when they do not fit next to the queued ones"""
+        if len(encoded) > self._queue.remaining():
+            return False
+        if len(self._queue) == 0:
+            self._queue_deadline = time.ticks_add(time.ticks_ms(), self._flush_after_ms)
+        self._queue.add_encoded(encoded)
+        return True
+
+    def queued(self) -> memoryview:
+        return self._queue.getvalue()
+
+    def queue_full(self) -> bool:
+        # not even a tlv without value fits anymore
+        return self._queue.remaining() < 2
+
+    def queue_due(self) -> bool:
+        return len(self._queue) > 0 and time.ticks_diff(time.ticks_ms(), self._queue_deadline) >= 0
+
+    def clear_queue(self) -> None:
+        self._queue.reset()
+
 
 def apply_and_broadcast(per: BLESimplePeripheral, encoded: bytes, delay_ms: int = 200) -> None:
     decoded = tlv_parser.decode(encoded)
@@ -62,14 +98,76 @@ def apply_and_broadcast(per: BLESimplePeripheral, encoded: bytes, delay_ms: int
     per.stop_advertise()
 
 
-def pixels_clear(per: BLESimplePeripheral, delay_ms: int = 200) -> None:
+def flush_broadcast(per: BLESimplePeripheral, delay_ms: int = 200) -> None:
+    """apply and broadcast all queued tlvs in one advertisement"""
+    if len(per.queued()) == 0:
+        return
+    apply_and_broadcast(per, per.queued(), delay_ms)
+    per.clear_queue()
+
+
+def poll_broadcast(per: BLESimplePeripheral, delay_ms: int = 200) -> bool:
+    """broadcast the queue when its deadline passed, call it from the main loop, True when it was broadcast"""
+    if not per.queue_due():
+        return False
+    flush_broadcast(per, delay_ms)
+    return True
+
+
+def queue_broadcast(per: BLESimplePeripheral, encoded: bytes, delay_ms: int = 200) -> None:
+    """
+    queue encoded tlvs to be broadcast together with the next ones,
+    the queue is broadcast when the tlvs do not fit anymore, when it is full or when its deadline passed,
+    nothing else queued the deadline is only seen by poll_broadcast()
+    """
+    if not per.queue(encoded):
+        flush_broadcast(per, delay_ms)
+        if not per.queue(encoded):
+            # larger than the budget, can only be sent on its own
+            apply_and_broadcast(per, encoded, delay_ms)
+            return
+    if per.queue_full() or per.queue_due():
+        flush_broadcast(per, delay_ms)
+
+
+def send(per: BLESimplePeripheral, encoded: bytes, delay_ms: int, queue: bool) -> None:
+    if queue:
+        queue_broadcast(per, encoded, delay_ms)
+    else:
+        apply_and_broadcast(per, encoded, delay_ms)
+
+
+def pixels_clear(per: BLESimplePeripheral, delay_ms: int = 200, queue: bool = False) -> None:
     encoded = tlv_parser.encode(tlv_pixels.tlv_types.tlv_type_pixels_clear, b'')
-    apply_and_broadcast(per, encoded, delay_ms)
+    send(per, encoded, delay_ms, queue)
 
 
-def pixels_set_5_colors(per: BLESimplePeripheral, colors: list[int, int, int], delay_ms: int = 200) -> None:
+def pixels_set_5_colors(per: BLESimplePeripheral, colors: list[int, int, int], delay_ms: int = 200, queue: bool = False) -> None:
     encoded = tlv_parser.encode(tlv_pixels.tlv_types.tlv_type_pixels_set_5_color, tlv_pixels.rgb_n_to_bytes(colors))
-    apply_and_broadcast(per, encoded, delay_ms)
+    send(per, encoded, delay_ms, queue)
+
+
+def pixels_animation_start(per: BLESimplePeripheral, animation_id: int, fps: int, loops: int = 0,
+                           delay_ms: int = 200, queue: bool = False) -> None:
+    encoded = tlv_parser.encode(tlv_pixels.tlv_types.tlv_type_pixels_animation_start,
+                                tlv_pixels.animation_to_bytes(animation_id, fps, loops))
+    send(per, encoded, delay_ms, queue)
+
+
+def pixels_animation_stop(per: BLESimplePeripheral, delay_ms: int = 200, queue: bool = False) -> None:
+    encoded = tlv_parser.encode(tlv_pixels.tlv_types.tlv_type_pixels_animation_stop, b'')
+    send(per, encoded, delay_ms, queue)
+
+
+def pixels_brightness(per: BLESimplePeripheral, brightness: int, delay_ms: int = 200, queue: bool = False) -> None:
+    encoded = tlv_parser.encode(tlv_pixels.tlv_types.tlv_type_pixels_brightness,
+                                tlv_pixels.brightness_to_bytes(brightness))
+    send(per, encoded, delay_ms, queue)
+
+
+def pixels_gamma(per: BLESimplePeripheral, gamma: int, delay_ms: int = 200, queue: bool = False) -> None:
+    encoded = tlv_parser.encode(tlv_pixels.tlv_types.tlv_type_pixels_gamma, tlv_pixels.gamma_to_bytes(gamma))
+    send(per, encoded, delay_ms, queue)
 
 
 def rainbow(per: BLESimplePeripheral, delay_ms: int = 200) -> None:
@@ -83,14 +181,14 @@ def rainbow(per: BLESimplePeripheral, delay_ms: int = 200) -> None:
         pixels_clear(per)
 
 
-def screen_clear(per: BLESimplePeripheral, delay_ms: int = 200) -> None:
+def screen_clear(per: BLESimplePeripheral, delay_ms: int = 200, queue: bool = False) -> None:
     encoded = tlv_parser.encode(tlv_screen.tlv_types.tlv_type_screen_clear, b'')
-    apply_and_broadcast(per, encoded, delay_ms)
+    send(per, encoded, delay_ms, queue)
 
 
-def screen_color(per: BLESimplePeripheral, color: int, delay_ms: int = 200) -> None:
+def screen_color(per: BLESimplePeripheral, color: int, delay_ms: int = 200, queue: bool = False) -> None:
     encoded = tlv_parser.encode(tlv_screen.tlv_types.tlv_type_screen_color, tlv_screen.screen_color_to_bytes(color))
-    apply_and_broadcast(per, encoded, delay_ms)
+    send(per, encoded, delay_ms, queue)
 
 
 def screen_color_cycler(per: BLESimplePeripheral, delay_ms: int = 200) -> None:
@@ -104,21 +202,31 @@ def screen_color_cycler(per: BLESimplePeripheral, delay_ms: int = 200) -> None:
         screen_clear(per)
 
 
-def screen_text(per: BLESimplePeripheral, text: bytes, delay_ms: int = 200) -> None:
+def screen_text(per: BLESimplePeripheral, text: bytes, delay_ms: int = 200, queue: bool = False) -> None:
     encoded = tlv_parser.encode(tlv_screen.tlv_types.tlv_type_screen_text, text)
-    apply_and_broadcast(per, encoded, delay_ms)
+    send(per, encoded, delay_ms, queue)
 
 
-def buzzer_note(per: BLESimplePeripheral, sw_freq: int, sw_duration: int, sw_sleep: int, delay_ms: int = 200) -> None:
+def buzzer_note(per: BLESimplePeripheral, sw_freq: int, sw_duration: int, sw_sleep: int, delay_ms: int = 200, queue: bool = False) -> None:
     encoded = tlv_parser.encode(tlv_buzzer.tlv_types.tlv_type_buzzer_note,
                                 tlv_buzzer.note_to_bytes(sw_freq, sw_duration, sw_sleep))
-    apply_and_broadcast(per, encoded, delay_ms)
+    send(per, encoded, delay_ms, queue)
 
 
-def buzzer_song(per: BLESimplePeripheral, song: int, delay_ms: int = 200) -> None:
+def buzzer_song(per: BLESimplePeripheral, song: int, delay_ms: int = 200, queue: bool = False) -> None:
     
     encoded = tlv_parser.encode(tlv_buzzer.tlv_types.tlv_type_buzzer_song, tlv_buzzer.song_to_bytes(song))
-    apply_and_broadcast(per, encoded, delay_ms)
+    send(per, encoded, delay_ms, queue)
+
+
+def buzzer_song_now(per: BLESimplePeripheral, song: int, delay_ms: int = 200, queue: bool = False) -> None:
+    encoded = tlv_parser.encode(tlv_buzzer.tlv_types.tlv_type_buzzer_song_now, tlv_buzzer.song_to_bytes(song))
+    send(per, encoded, delay_ms, queue)
+
+
+def buzzer_stop(per: BLESimplePeripheral, delay_ms: int = 200, queue: bool = False) -> None:
+    encoded = tlv_parser.encode(tlv_buzzer.tlv_types.tlv_type_buzzer_stop, b'')
+    send(per, encoded, delay_ms, queue)
 
 
 def peripheral():
@@ -137,7 +245,23 @@ def peripheral():
             buzzer_note(per, 550, 100, 20, 500)
             buzzer_note(per, 600, 100, 20, 500)
 
-            rainbow(per, 500)
+            # one scene in a single advertisement instead of three
+            pixels_set_5_colors(per, next(tlv_pixels.rainbow_generator()), 2_000, queue=True)
+            screen_color(per, tlv_screen.st7789.GREEN, 2_000, queue=True)
+            buzzer_song(per, tlv_buzzer.rd2d, 2_000, queue=True)
+            # nothing else is queued, the deadline broadcasts the scene
+            while not poll_broadcast(per, 2_000):
+                time.sleep_ms(10)
+
+            # the frames are stored on the badges, one tlv plays the rainbow instead of one tlv per frame
+            pixels_animation_start(per, tlv_pixels.animation_rainbow, 2, 1, 2_500)
+            pixels_animation_start(per, tlv_pixels.animation_wheel, 16, 0, 2_000)
+            # dim the wheel while it turns, without sending its colours
+            pixels_gamma(per, 28, 1_000)
+            pixels_brightness(per, 64, 1_000)
+            pixels_animation_stop(per, 500)
+            pixels_brightness(per, 255, 200)
+            pixels_gamma(per, 0, 200)
             pixels_clear(per, 500)
             
             screen_color_cycler(per, 500)
@@ -155,6 +279,55 @@ def peripheral():
             screen_clear(per)
 
 
+async def show_async(scheduler: BroadcastScheduler) -> None:
+    # the songs play in the background, the next windows are broadcast on time
+    await scheduler.broadcast(tlv_parser.encode(tlv_buzzer.tlv_types.tlv_type_buzzer_song,
+                                                tlv_buzzer.song_to_bytes(tlv_buzzer.reload)), 500)
+    for colors in tlv_pixels.rainbow_generator():
+        await scheduler.broadcast(tlv_parser.encode(tlv_pixels.tlv_types.tlv_type_pixels_set_5_color,
+                                                    tlv_pixels.rgb_n_to_bytes(colors)), 500)
+    await scheduler.broadcast(tlv_parser.encode(tlv_buzzer.tlv_types.tlv_type_buzzer_song,
+                                                tlv_buzzer.song_to_bytes(tlv_buzzer.ringtone)), 500)
+    for color in tlv_screen.screen_colors:
+        await scheduler.broadcast(tlv_parser.encode(tlv_screen.tlv_types.tlv_type_screen_color,
+                                                    tlv_screen.screen_color_to_bytes(color)), 500)
+    for text in (b'Hello Joram', b'Hello Jan', b'Hello Bart'):
+        await scheduler.broadcast(tlv_parser.encode(tlv_screen.tlv_types.tlv_type_screen_text, text), 500)
+    await scheduler.broadcast(tlv_parser.encode(tlv_pixels.tlv_types.tlv_type_pixels_clear, b''), 500)
+    await scheduler.broadcast(tlv_parser.encode(tlv_screen.tlv_types.tlv_type_screen_clear, b''), 500)
+
+
+def peripheral_async():
+    with BLESimplePeripheral(name=None) as per:
+        while True:
+            asyncio.run(BroadcastScheduler(per, tlv_parser).run(show_async))
+
+
+def motion_peripheral(odr_hz: int = 100, poll_ms: int = 100):
+    """broadcast the gestures of the accelerometer instead of a script, the badges react to the motion tlvs"""
+    # the driver is in micropython_example_tlv_proto, only needed on badges running this
+    from machine import Pin, SoftI2C
+    from lis2hh12_dev import LIS2HH12, ODR_100HZ, SF_G
+
+    i2c = SoftI2C(scl=Pin(22), sda=Pin(21), freq=100000)
+    imu = LIS2HH12(i2c, address=0x18, odr=ODR_100HZ, sf=SF_G)
+    events = tlv_motion.MotionEvents(imu, odr_hz)
+    with BLESimplePeripheral(name=None) as per:
+        def emit(encoded: bytes) -> None:
+            # the fifo holds 320 ms at 100 Hz, poll_ms and the broadcast have to fit in it
+            send(per, encoded, poll_ms, False)
+
+        try:
+            while True:
+                # the sensor fills its fifo while the badge sleeps
+                time.sleep_ms(poll_ms)
+                events.poll(emit)
+        except KeyboardInterrupt:
+            print(f"{events.stats()=}")
+        finally:
+            imu.stop_stream()
+
+
 def main():
     print("running main")
 
@@ -0,0 +1,172 @@
+import st7789
+
+# column and row address set and memory write, sent before the pixels of every drawing call
+WINDOW_BYTES = 11
+
+
+def glyph_index(font, char: int) -> int:
+    """index of char in the font, -1 when the font does not have it"""
+    return font.MAP.find(chr(char))
+
+
+def expand_glyph(font, index: int, fg: int, bg: int) -> bytearray:
+    """the 1 bit per pixel glyph at index as big endian RGB565 pixels, row by row, ready for blit_buffer"""
+    width = font.WIDTHS[index]
+    if hasattr(font, 'bitmap'):
+        # a binary_font.BinaryFont, reads the glyph from flash
+        bitmaps = font.bitmap(index)
+        bit = 0
+    else:
+        bitmaps = font.BITMAPS
+        offset_width = font.OFFSET_WIDTH
+        bit = 0
+        for i in range(index * offset_width, (index + 1) * offset_width):
+            bit = bit << 8 | font.OFFSETS[i]
+
+    fg_hi, fg_lo, bg_hi, bg_lo = fg >> 8 & 0xff, fg & 0xff, bg >> 8 & 0xff, bg & 0xff
+    buf = bytearray(width * font.HEIGHT * 2)
+    for i in range(0, len(buf), 2):
+        if bitmaps[bit >> 3] & (0x80 >> (bit & 7)):
+            buf[i] = fg_hi
+            buf[i + 1] = fg_lo
+        else:
+            buf[i] = bg_hi
+            buf[i + 1] = bg_lo
+        bit += 1
+    return buf
+
+
+class GlyphCache:
+    """
+    LRU cache of glyphs expanded to RGB565, per character and fg/bg colour pair, bounded in bytes
+    when full the least recently used glyphs are evicted
+    """
+
+    def __init__(self, font, max_bytes: int = 16_384):
+        self._font = font
+        self._max_bytes = max_bytes
+        self._colors = {}  # fg << 16 | bg -> {char: [width, pixels, last used]}
+        self._size = 0
+        self._tick = 0
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def font(self):
+        return self._font
+
+    def glyphs(self, fg: int, bg: int) -> dict:
+        """the glyphs of one colour pair, look up a whole line in it with get()"""
+        key = fg << 16 | bg
+        glyphs = self._colors.get(key)
+        if glyphs is None:
+            glyphs = self._colors[key] = {}
+        return glyphs
+
+    def get(self, glyphs: dict, char: int, fg: int, bg: int):
+        """[width, pixels, last used] of char in the colour pair of glyphs, None when the font does not have it"""
+        self._tick += 1
+        entry = glyphs.get(char)
+        if entry is not None:
+            self.hits += 1
+            entry[2] = self._tick
+            return entry
+
+        index = glyph_index(self._font, char)
+        if index < 0:
+            return None
+        self.misses += 1
+        pixels = expand_glyph(self._font, index, fg, bg)
+        while self._size + len(pixels) > self._max_bytes and self._size > 0:
+            self._evict()
+        entry = glyphs[char] = [self._font.WIDTHS[index], memoryview(pixels), self._tick]
+        self._size += len(pixels)
+        return entry
+
+    def _evict(self) -> None:
+        oldest = None
+        for glyphs in self._colors.values():
+            for char in glyphs:
+                if oldest is None or glyphs[char][2] < oldest[0][char][2]:
+                    oldest = (glyphs, char)
+        glyphs, char = oldest
+        self._size -= len(glyphs[char][1])
+        del glyphs[char]
+        self.evictions += 1
+
+    def clear(self) -> None:
+        self._colors.clear()
+        self._size = 0
+
+    def stats(self) -> dict:
+        return {'hits': self.hits, 'misses': self.misses, 'evictions': self.evictions, 'bytes': self._size}
+
+
+class TextRenderer:
+    """
+    Draws lines of text from a GlyphCache: the cached glyphs are copied into one line buffer,
+    which is sent with a single blit_buffer, and only the rest of the band the previous text on that line covered
+    is cleared, the rest of the screen is not touched
+    """
+
+    def __init__(self, tft, cache: GlyphCache):
+        self._tft = tft
+        self._cache = cache
+        self._height = cache.font().HEIGHT
+        self._line = bytearray(tft.width() * self._height * 2)
+        self._line_view = memoryview(self._line)
+        self._drawn = {}  # y -> right edge of what was drawn in the band at y
+        self.spi_bytes = 0  # pixel and window bytes sent by draw_line
+
+    def drawn(self) -> dict:
+        """y -> right edge of the text drawn in the band at y, since the last forget()"""
+        return self._drawn
+
+    def line_height(self) -> int:
+        return self._height
+
+    def forget(self) -> None:
+        """the screen was filled, nothing drawn is left to clear"""
+        self._drawn.clear()
+
+    def draw_line(self, text: bytes, x: int, y: int, fg: int = st7789.WHITE, bg: int = st7789.BLACK) -> int:
+        """draw text at x, y clearing the rest of the band at y, returns the width drawn"""
+        cache = self._cache
+        glyphs = cache.glyphs(fg, bg)
+        max_width = self._tft.width() - x
+
+        # first the glyphs and the line width, the line buffer rows are as wide as the text
+        entries = []
+        width = 0
+        for char in text:
+            entry = cache.get(glyphs, char, fg, bg)
+            if entry is not None:
+                if width + entry[0] > max_width:
+                    break
+                entries.append(entry)
+                width += entry[0]
+
+        height = self._height
+        line = self._line_view
+        if width:
+            left = 0
+            for glyph_width, pixels, _ in entries:
+                row_bytes = glyph_width * 2
+                dst = left * 2
+                src = 0
+                for _ in range(height):
+                    line[dst:dst + row_bytes] = pixels[src:src + row_bytes]
+                    dst += width * 2
+                    src += row_bytes
+                left += glyph_width
+            self._tft.blit_buffer(line[:width * height * 2], x, y, width, height)
+            self.spi_bytes += WINDOW_BYTES + width * height * 2
+
+        right = x + width
+        drawn = self._drawn.get(y, 0)
+        if drawn > right:
+            self._tft.fill_rect(right, y, drawn - right, height, bg)
+            self.spi_bytes += WINDOW_BYTES + (drawn - right) * height * 2
+        self._drawn[y] = right
+        return width
@@ -0,0 +1,149 @@
+from array import array
+
+from micropython import const
+
+GESTURE_NONE = const(0)
+GESTURE_TAP = const(1)
+GESTURE_SHAKE = const(2)
+GESTURE_TILT = const(3)
+
+GESTURE_NAMES = ('none', 'tap', 'shake', 'tilt')
+
+# the axis pointing up, the value of a tilt
+ORIENTATION_Z_UP = const(0)
+ORIENTATION_Z_DOWN = const(1)
+ORIENTATION_X_UP = const(2)
+ORIENTATION_X_DOWN = const(3)
+ORIENTATION_Y_UP = const(4)
+ORIENTATION_Y_DOWN = const(5)
+
+ORIENTATION_NAMES = ('z up', 'z down', 'x up', 'x down', 'y up', 'y down')
+
+# in 1/1024 g, raw readings at 2g full scale shifted right by 4
+_PEAK = const(600)  # deviation from gravity starting a peak
+_TAP = const(1_200)  # a tap peaks at least this high
+_STILL = const(100)  # below is not moving
+_AXIS_UP = const(700)  # gravity on the axis pointing up
+
+_TAP_MAX_MS = const(50)  # a tap is a short peak
+_TAP_QUIET_MS = const(200)  # and no peak after it
+_SHAKE_PEAKS = const(4)  # peaks within _SHAKE_WINDOW_MS make a shake
+_SHAKE_WINDOW_MS = const(1_000)
+_SHAKE_REST_MS = const(1_000)  # no gestures right after a shake
+_TILT_HOLD_MS = const(300)  # still in the new orientation for this long
+
+
+class GestureDetector:
+    """
+    tap, shake and tilt from raw accelerometer samples with integer math only:
+    gravity is followed with a slow shift filter, the deviation from it is summed over the axes,
+    a short high peak followed by quiet is a tap, several peaks within a second a shake,
+    gravity settling on another axis while still a tilt.
+    feed() samples at odr_hz, it returns the gesture, the value of the gesture is in value
+    """
+
+    def __init__(self, odr_hz: int = 100, shift: int = 4):
+        self._shift = shift
+        self._tap_max = _TAP_MAX_MS * odr_hz // 1_000
+        self._tap_quiet = _TAP_QUIET_MS * odr_hz // 1_000
+        self._shake_window = _SHAKE_WINDOW_MS * odr_hz // 1_000
+        self._shake_rest = _SHAKE_REST_MS * odr_hz // 1_000
+        self._tilt_hold = _TILT_HOLD_MS * odr_hz // 1_000
+        self._peaks = array('i', [0] * _SHAKE_PEAKS)  # sample numbers of the last peaks
+        self.reset()
+
+    def reset(self) -> None:
+        self._n = 0
+        self._bx = self._by = self._bz = 0
+        self._in_peak = False
+        self._peak_start = 0
+        self._peak_max = 0
+        self._peak_count = 0
+        self._tap_at = -1  # sample number of a tap waiting for quiet
+        self._tap_strength = 0
+        self._rest_until = 0
+        self._still = 0
+        self.orientation = -1
+        self.value = 0
+
+    def feed(self, x: int, y: int, z: int) -> int:
+        shift = self._shift
+        x >>= shift
+        y >>= shift
+        z >>= shift
+        n = self._n
+        self._n = n + 1
+        if n == 0:
+            self._bx, self._by, self._bz = x, y, z
+            return GESTURE_NONE
+
+        dx = x - self._bx
+        dy = y - self._by
+        dz = z - self._bz
+        d = (dx if dx >= 0 else -dx) + (dy if dy >= 0 else -dy) + (dz if dz >= 0 else -dz)
+        self._bx += dx >> 3
+        self._by += dy >> 3
+        self._bz += dz >> 3
+
+        gesture = GESTURE_NONE
+        if d > _PEAK:
+            if not self._in_peak:
+                self._in_peak = True
+                self._peak_start = n
+                self._peak_max = 0
+                self._tap_at = -1  # a second peak, not a tap
+                gesture = self._peak(n)
+            if d > self._peak_max:
+                self._peak_max = d
+        elif self._in_peak:
+            self._in_peak = False
+            if n - self._peak_start <= self._tap_max and self._peak_max >= _TAP and n >= self._rest_until:
+                self._tap_at = n
+                self._tap_strength = self._peak_max
+
+        if self._tap_at >= 0 and n - self._tap_at >= self._tap_quiet:
+            self._tap_at = -1
+            self.value = min(255, self._tap_strength >> 4)
+            gesture = GESTURE_TAP
+
+        if d < _STILL:
+            self._still += 1
+            if self._still >= self._tilt_hold and gesture == GESTURE_NONE:
+                orientation = self._orientation()
+                if orientation >= 0 and orientation != self.orientation:
+                    if self.orientation >= 0:
+                        self.value = orientation
+                        gesture = GESTURE_TILT
+                    self.orientation = orientation
+        else:
+            self._still = 0
+        return gesture
+
+    def _peak(self, n: int) -> int:
+        peaks = self._peaks
+        peaks[self._peak_count % _SHAKE_PEAKS] = n
+        self._peak_count += 1
+        if self._peak_count < _SHAKE_PEAKS or n < self._rest_until:
+            return GESTURE_NONE
+        # the oldest of the last _SHAKE_PEAKS peaks is in the slot written next
+        if n - peaks[self._peak_count % _SHAKE_PEAKS] > self._shake_window:
+            return GESTURE_NONE
+        self.value = min(255, self._peak_count)
+        self._peak_count = 0
+        self._rest_until = n + self._shake_rest
+        return GESTURE_SHAKE
+
+    def _orientation(self) -> int:
+        if self._bz > _AXIS_UP:
+            return ORIENTATION_Z_UP
+        if self._bz < -_AXIS_UP:
+            return ORIENTATION_Z_DOWN
+        if self._bx > _AXIS_UP:
+            return ORIENTATION_X_UP
+        if self._bx < -_AXIS_UP:
+            return ORIENTATION_X_DOWN
+        if self._by > _AXIS_UP:
+            return ORIENTATION_Y_UP
+        if self._by < -_AXIS_UP:
+            return ORIENTATION_Y_DOWN
+        return -1
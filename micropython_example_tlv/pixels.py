@@ -1,19 +1,37 @@
+from micropython import const
 from machine import Pin
 from neopixel import NeoPixel
 
 NUM_LEDS = 5
 LED_PIN = 2
 
-neopixel_pin = Pin(LED_PIN, Pin.OUT)
-np = NeoPixel(neopixel_pin, NUM_LEDS)
+_BPP = const(3)
 
+# set up by init(), on first use
+neopixel_pin = None
+np = None
 
-# function to go through all colors
-def wheel(pos: int, max_brightness: int):
-    # Input a value 0 to 255 to get a color value.
-    # The colours are a transition r - g - b - back to r.
-    if pos < 0 or pos > 255:
-        return 0, 0, 0
+# a frame: the colours of all pixels in the byte order of the neopixel buffer
+FRAME_SIZE = NUM_LEDS * _BPP
+
+# the colours as set, np.buf gets them through the output table: gamma and brightness
+_colors = bytearray(FRAME_SIZE)
+_output = bytearray(range(256))
+_brightness = 255
+_gamma = 0  # in tenths, 0 is off
+_identity = True
+
+
+def init() -> NeoPixel:
+    """set up the pin and the neopixel driver once"""
+    global neopixel_pin, np
+    if np is None:
+        neopixel_pin = Pin(LED_PIN, Pin.OUT)
+        np = NeoPixel(neopixel_pin, NUM_LEDS)
+    return np
+
+
+def _wheel_color(pos: int, max_brightness: int):
     if pos < 85:
         return int(max_brightness - pos * 3 * max_brightness / 255), int(pos * 3 * max_brightness / 255), 0
     if pos < 170:
@@ -23,27 +41,139 @@ def wheel(pos: int, max_brightness: int):
     return int(pos * 3 * max_brightness / 255), 0, int(max_brightness - pos * 3 * max_brightness / 255)
 
 
+# the wheel tables of the last few max_brightness values, a fade through all brightnesses
+# reuses the oldest table instead of keeping 768 bytes for every one of them
+_WHEEL_TABLES = const(4)
+_wheels = []  # (max_brightness, r, g, b of the 256 wheel positions), the most recently used last
+
+
+def wheel_table(max_brightness: int) -> bytearray:
+    """the 256 colours of the wheel at max_brightness as r, g, b bytes, the last _WHEEL_TABLES are kept"""
+    if _wheels:
+        entry = _wheels[-1]
+        if entry[0] == max_brightness:
+            return entry[1]  # an animation is precomputed at one brightness, this is the common case
+        for entry in _wheels:
+            if entry[0] == max_brightness:
+                _wheels.remove(entry)
+                _wheels.append(entry)
+                return entry[1]
+
+    table = _wheels.pop(0)[1] if len(_wheels) >= _WHEEL_TABLES else bytearray(3 * 256)
+    for pos in range(256):
+        table[3 * pos], table[3 * pos + 1], table[3 * pos + 2] = _wheel_color(pos, max_brightness)
+    _wheels.append((max_brightness, table))
+    return table
+
+
+# function to go through all colors
+def wheel(pos: int, max_brightness: int):
+    # Input a value 0 to 255 to get a color value.
+    # The colours are a transition r - g - b - back to r.
+    if pos < 0 or pos > 255:
+        return 0, 0, 0
+    table = wheel_table(max_brightness)
+    pos *= 3
+    return table[pos], table[pos + 1], table[pos + 2]
+
+
+def _update_output() -> None:
+    global _identity
+    if _gamma:
+        gamma = _gamma / 10
+        for i in range(256):
+            _output[i] = int((i / 255) ** gamma * _brightness + 0.5)
+    else:
+        for i in range(256):
+            _output[i] = (i * _brightness + 127) // 255
+    _identity = _brightness == 255 and not _gamma
+
+
+# global brightness 0-255 applied to every colour, shown right away
+def set_brightness(brightness: int) -> None:
+    global _brightness
+    _brightness = brightness
+    _update_output()
+    show()
+
+
+def brightness() -> int:
+    return _brightness
+
+
+# gamma correction in tenths, 28 is 2.8, 0 is off, shown right away
+def set_gamma(gamma: int) -> None:
+    global _gamma
+    _gamma = gamma
+    _update_output()
+    show()
+
+
+def gamma() -> int:
+    return _gamma
+
+
+# show the colours, through the gamma and brightness table in one pass over the frame
+def show() -> None:
+    strip = np if np is not None else init()
+    buf = strip.buf
+    if _identity:
+        buf[:] = _colors
+    else:
+        output = _output
+        colors = _colors
+        for i in range(FRAME_SIZE):
+            buf[i] = output[colors[i]]
+    strip.write()
+
+
+def _set(i: int, r: int, g: int, b: int) -> None:
+    offset = i * _BPP
+    order = NeoPixel.ORDER
+    _colors[offset + order[0]] = r
+    _colors[offset + order[1]] = g
+    _colors[offset + order[2]] = b
+
+
 # set all pixels to (r, g, b)
 def set_color(r: int, g: int, b: int, silent: bool = True) -> None:
     if not silent: print(f"setting {NUM_LEDS} leds to {r=} {g=} {b=}")
     for i in range(NUM_LEDS):
-        np[i] = (r, g, b)
-    np.write()
+        _set(i, r, g, b)
+    show()
 
 
-# set pixel i to (r, g, b)
-def set_i_color(i: int, r: int, g: int, b: int, silent: bool = True) -> None:
+# set pixel i to (r, g, b), with write=False it is shown by the next show()
+def set_i_color(i: int, r: int, g: int, b: int, silent: bool = True, write: bool = True) -> None:
     if not silent: print(f"setting {i=}th led to {r=} {g=} {b=}")
-    np[i] = (r, g, b)
-    np.write()
+    _set(i, r, g, b)
+    if write:
+        show()
 
 
 # turn off all pixels
 def clear(silent=True) -> None:
     if not silent: print("the show is over")
+    for i in range(FRAME_SIZE):
+        _colors[i] = 0
+    show()
+
+
+def frame(colors) -> bytearray:
+    buf = bytearray(FRAME_SIZE)
+    order = NeoPixel.ORDER
     for i in range(NUM_LEDS):
-        np[i] = (0, 0, 0)
-        np.write()
+        offset = i * _BPP
+        color = colors[i]
+        for j in range(_BPP):
+            buf[offset + order[j]] = color[j]
+    return buf
+
+
+# show a frame with a single write
+def show_frame(buf) -> None:
+    _colors[:] = buf
+    show()
 
 
 if __name__ == "__main__":
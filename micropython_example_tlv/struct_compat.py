@@ -0,0 +1,26 @@
+"""
+struct.Struct for micropython, its struct module only has the functions,
+the format is kept with its size, every call still hands it to the struct function.
+it gives no speedup on the badge, a call costs one method call more than struct.pack(fmt, ...) with the format:
+it is here so tlv_codecs has one api on the badge and on the host, where struct.Struct parses the format once
+"""
+import struct
+
+
+class Struct:
+
+    def __init__(self, fmt: str):
+        self.format = fmt
+        self.size = struct.calcsize(fmt)
+
+    def pack(self, *values) -> bytes:
+        return struct.pack(self.format, *values)
+
+    def pack_into(self, buffer, offset: int, *values) -> None:
+        struct.pack_into(self.format, buffer, offset, *values)
+
+    def unpack(self, buffer) -> tuple:
+        return struct.unpack(self.format, buffer)
+
+    def unpack_from(self, buffer, offset: int = 0) -> tuple:
+        return struct.unpack_from(self.format, buffer, offset)
@@ -5,6 +5,24 @@ except ImportError:
     pass
 
 import struct
+import time
+from array import array
+
+try:
+    _ticks_us = time.ticks_us
+    _ticks_diff = time.ticks_diff
+except AttributeError:
+    # host cpython without the badge_simulator
+    def _ticks_us() -> int:
+        return time.perf_counter_ns() // 1_000
+
+    def _ticks_diff(ticks1: int, ticks2: int) -> int:
+        return ticks1 - ticks2
+
+# log levels for TLVParser.set_log, the per tlv "applying ..." message is LOG_DEBUG
+LOG_OFF = 0
+LOG_INFO = 1
+LOG_DEBUG = 2
 
 
 class TLVException(Exception):
@@ -23,23 +41,155 @@ class TLVMalformedException(TLVException):
     """Type-Length-Value Malformed Exception"""
 
 
+class TLVBufferFullException(TLVException):
+    """Type-Length-Value Buffer Full Exception"""
+
+
+class TLVRecords:
+    """
+    Preallocated container for zero-copy decoded tlvs
+    only (type, length, offset) is stored per tlv, the values are memoryview slices over the decoded buffer
+    the container is overwritten by the next decode into it, so consume the records before decoding again
+    """
+
+    def __init__(self, capacity: int = 16):
+        self._types = bytearray(capacity)
+        self._lengths = bytearray(capacity)
+        self._offsets = array('H', [0] * capacity)
+        self._buffer = memoryview(b'')
+        self._count = 0
+
+    def capacity(self) -> int:
+        return len(self._types)
+
+    def clear(self) -> None:
+        self._count = 0
+
+    def append(self, tlv_type: int, tlv_length: int, offset: int) -> None:
+        if self._count == len(self._types):
+            raise TLVParseException(f"more than {len(self._types)} tlvs, increase the TLVRecords capacity")
+        self._types[self._count] = tlv_type
+        self._lengths[self._count] = tlv_length
+        self._offsets[self._count] = offset
+        self._count += 1
+
+    def __len__(self) -> int:
+        return self._count
+
+    def __getitem__(self, i: int) -> tuple[int, int, memoryview]:
+        if i < 0:
+            i += self._count
+        if i < 0 or i >= self._count:
+            raise IndexError("tlv record index out of range")
+        value_offset = self._offsets[i]
+        return self._types[i], self._lengths[i], self._buffer[value_offset:value_offset + self._lengths[i]]
+
+    def __iter__(self):
+        for i in range(self._count):
+            yield self[i]
+
+
+class TLVStats:
+    """
+    Per tlv type call counts and callback durations of a TLVParser, and its malformed, unknown and parse error counters
+    preallocated arrays indexed by tlv type, recording a call allocates nothing
+    """
+    _HEADER_FMT = '<HHH'  # malformed, unknown, parse_errors
+    _TYPE_FMT = '<BHHI'  # tlv type, calls, max us, total us
+    _HEADER_LENGTH = struct.calcsize(_HEADER_FMT)
+    _TYPE_LENGTH = struct.calcsize(_TYPE_FMT)
+
+    def __init__(self):
+        self.calls = array('I', [0] * 256)
+        self.total_us = array('I', [0] * 256)
+        self.max_us = array('I', [0] * 256)
+        self.malformed = 0
+        self.unknown = 0
+        self.parse_errors = 0
+
+    def clear(self) -> None:
+        for i in range(256):
+            self.calls[i] = 0
+            self.total_us[i] = 0
+            self.max_us[i] = 0
+        self.malformed = 0
+        self.unknown = 0
+        self.parse_errors = 0
+
+    def record(self, tlv_type: int, us: int) -> None:
+        self.calls[tlv_type] += 1
+        self.total_us[tlv_type] = (self.total_us[tlv_type] + us) & 0xffffffff  # wraps after 71 minutes
+        if us > self.max_us[tlv_type]:
+            self.max_us[tlv_type] = us
+
+    def dump(self, write: Callable[[str], None] = print) -> None:
+        """one line per tlv type that was applied, for the serial console"""
+        write(f"tlv stats malformed={self.malformed} unknown={self.unknown} parse_errors={self.parse_errors}")
+        for tlv_type in range(256):
+            calls = self.calls[tlv_type]
+            if calls:
+                write(f"tlv_type={tlv_type} {calls=} total_us={self.total_us[tlv_type]} "
+                      f"avg_us={self.total_us[tlv_type] // calls} max_us={self.max_us[tlv_type]}")
+
+    def to_bytes(self) -> bytes:
+        """the counters packed, then a record per applied tlv type, as much as fits in one tlv value"""
+        packed = bytearray(struct.pack(TLVStats._HEADER_FMT, min(self.malformed, 0xffff), min(self.unknown, 0xffff),
+                                       min(self.parse_errors, 0xffff)))
+        for tlv_type in range(256):
+            if self.calls[tlv_type] and len(packed) + TLVStats._TYPE_LENGTH <= 255:
+                packed.extend(struct.pack(TLVStats._TYPE_FMT, tlv_type, min(self.calls[tlv_type], 0xffff),
+                                          min(self.max_us[tlv_type], 0xffff), self.total_us[tlv_type]))
+        return bytes(packed)
+
+    def to_tlv(self, tlv_type: int) -> bytes:
+        """to_bytes() encoded as a tlv, to send the stats over a TLVStreamDecoder link or advertise them"""
+        return TLVParser.encode(tlv_type, self.to_bytes())
+
+    @staticmethod
+    def from_bytes(tlv_value: bytes) -> dict:
+        """unpack to_bytes() on the receiving side"""
+        malformed, unknown, parse_errors = struct.unpack_from(TLVStats._HEADER_FMT, tlv_value, 0)
+        types = {}
+        for offset in range(TLVStats._HEADER_LENGTH, len(tlv_value), TLVStats._TYPE_LENGTH):
+            tlv_type, calls, max_us, total_us = struct.unpack_from(TLVStats._TYPE_FMT, tlv_value, offset)
+            types[tlv_type] = {'calls': calls, 'max_us': max_us, 'total_us': total_us}
+        return {'malformed': malformed, 'unknown': unknown, 'parse_errors': parse_errors, 'types': types}
+
+
 class TLVParser:
     """
     TLV Parser: can encode and decode Type-Length_Value bytes
     use the add_tlv_mapping function to define your callbacks for each tlv
+    use decode_records() to decode into the parser's reused TLVRecords container, with memoryview values
+    call compile() after adding the mappings to dispatch through a 256 entry table indexed by tlv type
+    call enable_stats() to count and time the applied tlvs, see TLVStats
     """
     _TYPE_LENGTH_FMT = '<BB'
     _FMT_LENGTH = struct.calcsize(_TYPE_LENGTH_FMT)
 
-    def __init__(self):
+    def __init__(self, records: TLVRecords | None = None):
         self._apply_mapping: dict[int, [int, Callable[[bytes], None]]] = {}
+        self._dispatch: list[tuple[int, Callable[[bytes], None]] | None] | None = None
+        self._log_level = LOG_DEBUG
+        self._log = print
+        self._stats = None
+        self._records = records  # the container of decode_records(), made on its first call when not given
 
     @staticmethod
-    def decode(in_bytes: bytes) -> list[tuple[int, int, bytes]]:
+    def decode(in_bytes: bytes, out: TLVRecords | None = None) -> list[tuple[int, int, bytes]] | TLVRecords:
+        """
+        decode all tlvs in in_bytes into a list of (type, length, value) with the values copied
+        the zero-copy api is TLVRecords: passing one as out decodes into it and returns it, no list, tuples or values
+        are allocated, the values are memoryview slices over in_bytes made when a record is read
+        """
+        if out is not None:
+            return TLVParser._decode_into(in_bytes, out)
+
         decoded = []
         offset = 0
         while len(in_bytes) - offset >= TLVParser._FMT_LENGTH:
-            tlv_type, tlv_length = struct.unpack_from(TLVParser._TYPE_LENGTH_FMT, in_bytes, offset)
+            tlv_type = in_bytes[offset]
+            tlv_length = in_bytes[offset + 1]
 
             if tlv_length > 0 and len(in_bytes) - offset >= TLVParser._FMT_LENGTH + tlv_length:
                 tlv_value = in_bytes[offset + 2:offset + TLVParser._FMT_LENGTH + tlv_length]
@@ -51,10 +201,33 @@ class TLVParser:
             offset = offset + TLVParser._FMT_LENGTH + tlv_length
 
         if len(in_bytes) - offset != 0:
-            raise TLVParseException(f"remaining bytes cannot be decoded: {in_bytes[offset:]}")
+            raise TLVParseException(f"remaining bytes cannot be decoded: {bytes(in_bytes[offset:])}")
 
         return decoded
 
+    @staticmethod
+    def _decode_into(in_bytes: bytes, out: TLVRecords) -> TLVRecords:
+        out.clear()
+        out._buffer = in_bytes if isinstance(in_bytes, memoryview) else memoryview(in_bytes)
+        in_length = len(in_bytes)
+        offset = 0
+        while in_length - offset >= 2:
+            tlv_length = in_bytes[offset + 1]
+            out.append(in_bytes[offset], tlv_length, offset + 2)
+            offset += 2 + tlv_length
+
+        if in_length - offset != 0:
+            out.clear()
+            raise TLVParseException(f"remaining bytes cannot be decoded: {bytes(in_bytes[offset:])}")
+
+        return out
+
+    def decode_records(self, in_bytes: bytes) -> TLVRecords:
+        """decode(in_bytes, out=...) into the TLVRecords of this parser, valid until the next call"""
+        if self._records is None:
+            self._records = TLVRecords()
+        return TLVParser._decode_into(in_bytes, self._records)
+
     @staticmethod
     def encode(tlv_type: int, tlv_value: bytes) -> bytes:
         encoded = bytearray()
@@ -71,22 +244,268 @@ class TLVParser:
     def add_tlv_mapping(self, tlv_type: int, expected_value_length: int, callback: Callable[[bytes], None]) -> None:
         """add a callback for tlv_type"""
         self._apply_mapping[tlv_type] = (expected_value_length, callback)
+        if self._dispatch is not None:
+            self._dispatch[tlv_type] = (expected_value_length, callback)
+
+    def compile(self) -> None:
+        """freeze the mappings into a list indexed by tlv type, one list index per tlv instead of dict lookups"""
+        dispatch = [None] * 256
+        for tlv_type, mapping in self._apply_mapping.items():
+            dispatch[tlv_type] = mapping
+        self._dispatch = dispatch
+
+    def set_log(self, level: int, hook: Callable[[str], None] = print) -> None:
+        """log messages up to level through hook, the messages are not even formatted above level"""
+        self._log_level = level
+        self._log = hook
+
+    def enable_stats(self, stats: TLVStats | None = None) -> TLVStats:
+        """count and time every applied tlv in stats, or a new TLVStats, disabled it costs one check per tlv"""
+        self._stats = stats if stats is not None else TLVStats()
+        return self._stats
+
+    def disable_stats(self) -> None:
+        self._stats = None
+
+    def stats(self) -> TLVStats | None:
+        return self._stats
 
-    def apply_tlv(self, tlv_type: int, tlv_length: int, tlv_value: bytes, skip_unknown: bool = True) -> None:
-        print(f"applying {tlv_type=} {tlv_length=} {tlv_value=}")
+    def apply_tlv(self, tlv_type: int, tlv_length: int, tlv_value: bytes, skip_unknown: bool = True):
+        """apply one tlv, returns what its callback returns"""
+        if self._log_level >= LOG_DEBUG:
+            self._log(f"applying {tlv_type=} {tlv_length=} tlv_value={bytes(tlv_value)}")
 
-        if not skip_unknown and tlv_type not in self._apply_mapping:
-            raise TLVUnknownTypeException(f"{tlv_type=} not known {tlv_length=} {tlv_value=}")
+        if self._dispatch is not None:
+            mapping = self._dispatch[tlv_type]
+        else:
+            mapping = self._apply_mapping.get(tlv_type)
 
-        if tlv_type in self._apply_mapping:
-            expected_length, mapping_callback = self._apply_mapping[tlv_type]
+        stats = self._stats
+        if mapping is None:
+            if stats is not None:
+                stats.unknown += 1
+            if not skip_unknown:
+                raise TLVUnknownTypeException(f"{tlv_type=} not known {tlv_length=} tlv_value={bytes(tlv_value)}")
+            return None
+
+        expected_length, mapping_callback = mapping
+        if stats is None:
+            TLVParser._check_tlv_length(expected_length, tlv_length, tlv_type)
+            return mapping_callback(tlv_value)
+
+        if expected_length is not None and tlv_length != expected_length:
+            stats.malformed += 1
             TLVParser._check_tlv_length(expected_length, tlv_length, tlv_type)
-            mapping_callback(tlv_value)
+        start = _ticks_us()
+        result = mapping_callback(tlv_value)
+        stats.record(tlv_type, _ticks_diff(_ticks_us(), start))
+        return result
+
+    def apply_tlvs(self, decoded: list[tuple[int, int, bytes]] | bytes, skip_unknown: bool = True):
+        """apply decoded tlvs, or encoded tlvs straight from a bytes, bytearray or memoryview buffer"""
+        if isinstance(decoded, (bytes, bytearray, memoryview)):
+            self._apply_buffer(decoded, skip_unknown)
+            return
 
-    def apply_tlvs(self, decoded: list[tuple[int, int, bytes]], skip_unknown: bool = True):
         for d in decoded:
             self.apply_tlv(*d, skip_unknown)
 
+    def _apply_buffer(self, in_bytes: bytes, skip_unknown: bool) -> None:
+        in_length = len(in_bytes)
+
+        # validate the complete buffer first, like decode nothing is applied when there are remaining bytes
+        offset = 0
+        while in_length - offset >= 2:
+            offset += 2 + in_bytes[offset + 1]
+        if in_length - offset != 0:
+            if self._stats is not None:
+                self._stats.parse_errors += 1
+            raise TLVParseException(f"remaining bytes cannot be decoded: {bytes(in_bytes[offset:])}")
+
+        if self._dispatch is None or self._log_level >= LOG_DEBUG or self._stats is not None:
+            in_view = in_bytes if isinstance(in_bytes, memoryview) else memoryview(in_bytes)
+            offset = 0
+            while offset < in_length:
+                tlv_length = in_bytes[offset + 1]
+                self.apply_tlv(in_bytes[offset], tlv_length, in_view[offset + 2:offset + 2 + tlv_length], skip_unknown)
+                offset += 2 + tlv_length
+            return
+
+        # compiled and not logging: apply_tlv inlined, this is the hot path on the central
+        dispatch = self._dispatch
+        in_view = in_bytes if isinstance(in_bytes, memoryview) else memoryview(in_bytes)
+        offset = 0
+        while offset < in_length:
+            tlv_type = in_bytes[offset]
+            tlv_length = in_bytes[offset + 1]
+            mapping = dispatch[tlv_type]
+            if mapping is None:
+                if not skip_unknown:
+                    raise TLVUnknownTypeException(f"{tlv_type=} not known {tlv_length=}")
+            else:
+                expected_length = mapping[0]
+                if expected_length is not None and tlv_length != expected_length:
+                    raise TLVMalformedException(f"{tlv_type=} expected_value_length={expected_length} but got: {tlv_length=}")
+                mapping[1](in_view[offset + 2:offset + 2 + tlv_length])
+            offset += 2 + tlv_length
+
+
+class TLVBuilder:
+    """
+    Batch encoder: packs many tlvs after each other in one preallocated buffer, reuse it with reset()
+    the default capacity is the manufacturer specific data of one advertisement,
+    31 bytes advertising payload - 2 bytes length and ad type - 2 bytes company id
+    """
+    ADV_CAPACITY = 31 - 2 - 2
+
+    def __init__(self, capacity: int = ADV_CAPACITY):
+        self._buf = bytearray(capacity)
+        self._view = memoryview(self._buf)
+        self._length = 0
+
+    def capacity(self) -> int:
+        return len(self._buf)
+
+    def remaining(self) -> int:
+        """number of bytes still free, a tlv needs 2 of them for its type and length"""
+        return len(self._buf) - self._length
+
+    def fits(self, value_length: int) -> bool:
+        return self._length + TLVParser._FMT_LENGTH + value_length <= len(self._buf)
+
+    def __len__(self) -> int:
+        return self._length
+
+    def reset(self) -> None:
+        self._length = 0
+
+    def _reserve(self, tlv_type: int, value_length: int) -> int:
+        if value_length > 255:
+            raise TLVMalformedException(f"{tlv_type=} value too long: {value_length=}")
+        if not self.fits(value_length):
+            raise TLVBufferFullException(f"{tlv_type=} {value_length=} does not fit, {self.remaining()} bytes left")
+        offset = self._length
+        self._buf[offset] = tlv_type
+        self._buf[offset + 1] = value_length
+        self._length = offset + TLVParser._FMT_LENGTH + value_length
+        return offset + TLVParser._FMT_LENGTH
+
+    def add(self, tlv_type: int, tlv_value: bytes) -> None:
+        """append one tlv, raises TLVBufferFullException when it does not fit"""
+        offset = self._reserve(tlv_type, len(tlv_value))
+        self._view[offset:offset + len(tlv_value)] = tlv_value
+
+    def pack(self, tlv_type: int, fmt, *values) -> None:
+        """
+        append one tlv with its value packed by pack_into straight into the buffer,
+        fmt is a struct format or a Struct like the ones of tlv_codecs, on micropython they cost the same
+        """
+        if isinstance(fmt, str):
+            offset = self._reserve(tlv_type, struct.calcsize(fmt))
+            struct.pack_into(fmt, self._buf, offset, *values)
+        else:
+            offset = self._reserve(tlv_type, fmt.size)
+            fmt.pack_into(self._buf, offset, *values)
+
+    def add_encoded(self, encoded: bytes) -> None:
+        """append one or more already encoded tlvs"""
+        if self._length + len(encoded) > len(self._buf):
+            raise TLVBufferFullException(f"{len(encoded)} encoded bytes do not fit, {self.remaining()} bytes left")
+        self._view[self._length:self._length + len(encoded)] = encoded
+        self._length += len(encoded)
+
+    def getvalue(self) -> memoryview:
+        """memoryview of the packed tlvs, only valid until the builder is changed"""
+        return self._view[:self._length]
+
+
+class TLVStreamDecoder:
+    """
+    Incremental TLV decoder: feed chunks of any size, complete tlvs are yielded as soon as they are available
+    incomplete tlvs wait in a bounded ring buffer for the next chunk
+    with a tlv_parser the tlv types and lengths are validated against its mappings,
+    bytes that cannot start a known tlv are skipped one by one until the stream is in sync again
+    """
+    _MIN_CAPACITY = 2 + 255  # one tlv with the longest possible value always fits
+
+    def __init__(self, tlv_parser: TLVParser | None = None, capacity: int = 512):
+        if capacity < TLVStreamDecoder._MIN_CAPACITY:
+            raise ValueError(f"{capacity=} must be at least {TLVStreamDecoder._MIN_CAPACITY}")
+        self._tlv_parser = tlv_parser
+        self._buf = bytearray(capacity)
+        self._view = memoryview(self._buf)
+        self._start = 0
+        self._count = 0
+        self.decoded_tlvs = 0
+        self.skipped_bytes = 0
+
+    def pending(self) -> int:
+        """number of buffered bytes that are not decoded yet"""
+        return self._count
+
+    def reset(self) -> None:
+        self._start = 0
+        self._count = 0
+
+    def feed(self, chunk: bytes):
+        """
+        generator yielding (tlv_type, tlv_length, tlv_value) for every tlv completed by chunk
+        the chunk is consumed while iterating, so always exhaust the generator
+        """
+        chunk = chunk if isinstance(chunk, memoryview) else memoryview(chunk)
+        chunk_offset = 0
+        while chunk_offset < len(chunk):
+            chunk_offset += self._write(chunk, chunk_offset)
+            yield from self._drain()
+
+    def _write(self, chunk: memoryview, chunk_offset: int) -> int:
+        capacity = len(self._buf)
+        written = 0
+        # at most two copies: up to the end of the ring buffer and from its start
+        while self._count < capacity and chunk_offset + written < len(chunk):
+            pos = (self._start + self._count) % capacity
+            n = min(capacity - pos, capacity - self._count, len(chunk) - chunk_offset - written)
+            self._view[pos:pos + n] = chunk[chunk_offset + written:chunk_offset + written + n]
+            self._count += n
+            written += n
+        return written
+
+    def _valid(self, tlv_type: int, tlv_length: int) -> bool:
+        if self._tlv_parser is None:
+            return True
+        mapping = self._tlv_parser._apply_mapping.get(tlv_type)
+        return mapping is not None and (mapping[0] is None or mapping[0] == tlv_length)
+
+    def _drain(self):
+        capacity = len(self._buf)
+        while self._count >= TLVParser._FMT_LENGTH:
+            tlv_type = self._buf[self._start]
+            tlv_length = self._buf[(self._start + 1) % capacity]
+
+            if not self._valid(tlv_type, tlv_length):
+                # garbage, drop a single byte and try to decode from the next one
+                self._consume(1)
+                self.skipped_bytes += 1
+                continue
+
+            if self._count < TLVParser._FMT_LENGTH + tlv_length:
+                return  # wait for more bytes
+
+            tlv_value = self._read((self._start + TLVParser._FMT_LENGTH) % capacity, tlv_length)
+            self._consume(TLVParser._FMT_LENGTH + tlv_length)
+            self.decoded_tlvs += 1
+            yield tlv_type, tlv_length, tlv_value
+
+    def _read(self, pos: int, length: int) -> bytes:
+        end = pos + length
+        if end <= len(self._buf):
+            return bytes(self._view[pos:end])
+        return bytes(self._view[pos:]) + bytes(self._view[:end - len(self._buf)])
+
+    def _consume(self, n: int) -> None:
+        self._start = (self._start + n) % len(self._buf)
+        self._count -= n
+
 
 if __name__ == "__main__":
     print("this is a module, running it does nothing")
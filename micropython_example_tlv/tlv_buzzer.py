@@ -1,20 +1,32 @@
-import struct
+from array import array
 
 from micropython import const
 from time import sleep_ms
-from machine import Pin, PWM
+from machine import Pin, PWM, Timer
 
+import tlv_codecs
 import tlv_types
 
-_NOTE_FMT = '!fHH'
-_NOTE_FMT_CALCSIZE = struct.calcsize(_NOTE_FMT)
+# the value codecs, made once in tlv_codecs
+_NOTE = tlv_codecs.BUZZER_NOTE
+_SONG = tlv_codecs.BUZZER_SONG
 
-buzzer_pin = Pin(32, Pin.OUT)
+_BUZZER_PIN = const(32)
+
+buzzer_pin = None  # set up by init(), on first use
+
+
+def init() -> Pin:
+    """set up the buzzer pin once"""
+    global buzzer_pin
+    if buzzer_pin is None:
+        buzzer_pin = Pin(_BUZZER_PIN, Pin.OUT)
+    return buzzer_pin
 
 
 def note(sw_freq: int, sw_duration: int, sw_sleep: int, active_duty: int = 50, buz: PWM | None = None):
     if buz is None:
-        my_buz = PWM(buzzer_pin)
+        my_buz = PWM(init())
     else:
         my_buz = buz
     my_buz.freq(int(sw_freq))
@@ -28,7 +40,7 @@ def note(sw_freq: int, sw_duration: int, sw_sleep: int, active_duty: int = 50, b
 
 
 def play(sw_notes, sw_duration, sw_sleep, active_duty=50):
-    buz = PWM(buzzer_pin)
+    buz = PWM(init())
     for i, freq in enumerate(sw_notes):
         note(freq, sw_duration[i], sw_sleep[i], active_duty, buz)
     buz.duty(0)
@@ -41,63 +53,228 @@ reload = const(3)
 ringtone = const(4)
 
 
-def buzzer_r2d2():
+def _song_r2d2():
     r2_d2_notes = [3520, 3135.96, 2637.02, 2093, 2349.32, 3951.07, 2793.83, 4186.01, 3520, 3135.96, 2637.02, 2093,
                    2349.32, 3951.07, 2793.83, 4186.01]
     r2_d2_duration = [80, 80, 80, 80, 80, 80, 80, 80, 80, 80, 80, 80, 80, 80, 80, 80]
     r2_d2_sleep = [20, 20, 20, 20, 20, 20, 20, 20, 20, 20, 20, 20, 20, 20, 20, 20]
-    play(r2_d2_notes, r2_d2_duration, r2_d2_sleep)
+    return r2_d2_notes, r2_d2_duration, r2_d2_sleep
 
 
-def buzzer_star_wars():
+def _song_star_wars():
     sw_notes = [293.66, 293.66, 293.66, 392.0, 622.25, 554.37, 523.25, 454, 932.32, 622.25, 554.37, 523.25, 454, 932.32,
                 622.25, 554.37, 523.25, 554.37, 454]
     sw_duration = [180, 180, 180, 800, 800, 180, 180, 180, 800, 400, 180, 180, 180, 800, 400, 180, 180, 180, 1000]
     sw_sleep = [40, 40, 40, 100, 100, 40, 40, 40, 100, 50, 40, 40, 40, 100, 50, 40, 40, 40, 100]
-    play(sw_notes, sw_duration, sw_sleep)
+    return sw_notes, sw_duration, sw_sleep
 
 
-def buzzer_reload():
+def _song_reload():
     sw_notes = list(range(400, 1400, 20))
     sw_duration = list(range(120, 20, -2))
     sw_sleep = [20] * 50
-    play(sw_notes, sw_duration, sw_sleep)
+    return sw_notes, sw_duration, sw_sleep
 
 
-def buzzer_ringtone():
+def _song_ringtone():
     sw_notes = [659.25, 587.33, 369.99, 415.3, 554.37, 493.88, 293.66, 329.63, 493.88, 440, 277.18, 329.63, 440]
     sw_duration = [120, 120, 240, 240, 120, 120, 240, 240, 120, 120, 240, 240, 720]
     sw_sleep = [20] * 50
-    play(sw_notes, sw_duration, sw_sleep)
+    return sw_notes, sw_duration, sw_sleep
+
+
+_songs = {
+    rd2d: _song_r2d2,
+    star_wars: _song_star_wars,
+    reload: _song_reload,
+    ringtone: _song_ringtone,
+}
+
+
+def buzzer_r2d2():
+    play(*_song_r2d2())
+
+
+def buzzer_star_wars():
+    play(*_song_star_wars())
+
+
+def buzzer_reload():
+    play(*_song_reload())
+
+
+def buzzer_ringtone():
+    play(*_song_ringtone())
+
+
+def note_table(sw_notes, sw_duration, sw_sleep) -> array:
+    """the notes as one array of freq, duration, sleep triples, freq in whole hertz like PWM.freq() takes it"""
+    table = array('H')
+    for i, freq in enumerate(sw_notes):
+        table.append(int(freq))
+        table.append(sw_duration[i])
+        table.append(sw_sleep[i])
+    return table
+
+
+_song_tables = {}  # song id -> note table, built when the song is played the first time
+
+
+def song_table(song: int) -> array | None:
+    table = _song_tables.get(song)
+    if table is None and song in _songs:
+        table = _song_tables[song] = note_table(*_songs[song]())
+    return table
+
+
+class Sequencer:
+    """
+    plays note tables on the buzzer from a one shot timer, one step per note on and note off,
+    play() returns right away, the next tables wait in a queue, a preempting play() or cancel() stops the playing one,
+    without a pin it plays on the buzzer of the badge
+    """
+
+    def __init__(self, pin: Pin | None = None, timer_id: int = 1, max_queue: int = 16, active_duty: int = 50):
+        self._pin = pin
+        self._timer_id = timer_id
+        self._timer = None
+        self._buz = None
+        self._max_queue = max_queue
+        self._active_duty = active_duty
+        self._queue = []  # note tables waiting
+        self._notes = None  # the playing note table
+        self._i = 0  # index of its freq, duration, sleep triple
+        self._on = False
+        self._armed = False  # a timer callback is due, one scheduled before a cancel() is ignored
+        self._timer_cb = self._on_timer  # bound once, not for every note
+
+        self.played = 0
+        self.dropped = 0
+        self.preempted = 0
+
+    def play(self, notes: array, preempt: bool = False) -> bool:
+        """queue a note table, or play it right away with preempt, False when the queue is full"""
+        if preempt:
+            if self.busy():
+                self.preempted += 1
+            self.cancel()
+        elif len(self._queue) >= self._max_queue:
+            self.dropped += 1
+            return False
+        self._queue.append(notes)
+        if not self._armed and self._notes is None:
+            self._step()
+        return True
+
+    def cancel(self) -> None:
+        """stop the playing table and drop the queued ones"""
+        self._armed = False
+        if self._timer is not None:
+            self._timer.deinit()
+        self._queue.clear()
+        self._notes = None
+        self._on = False
+        self._idle()
+
+    def busy(self) -> bool:
+        return self._notes is not None or len(self._queue) > 0
+
+    def stats(self) -> dict:
+        return {'played': self.played, 'dropped': self.dropped, 'preempted': self.preempted,
+                'queued': len(self._queue)}
+
+    def _on_timer(self, timer) -> None:
+        if self._armed:
+            self._armed = False
+            self._step()
+
+    def _step(self) -> None:
+        # run the steps until one has to wait, a zero length note or sleep does not wait
+        while True:
+            notes = self._notes
+            if notes is None:
+                if not self._queue:
+                    self._idle()
+                    return
+                self._notes = self._queue.pop(0)
+                self._i = 0
+                continue
+
+            i = self._i
+            if not self._on:
+                if i >= len(notes):
+                    self._notes = None
+                    continue
+                if self._buz is None:
+                    self._buz = PWM(self._pin if self._pin is not None else init())
+                self._buz.freq(notes[i])
+                self._buz.duty(self._active_duty)
+                self._on = True
+                self.played += 1
+                wait = notes[i + 1]
+            else:
+                self._buz.duty(0)
+                self._on = False
+                self._i = i + 3
+                wait = notes[i + 2]
+
+            if wait > 0:
+                if self._timer is None:
+                    self._timer = Timer(self._timer_id)
+                self._armed = True
+                self._timer.init(mode=Timer.ONE_SHOT, period=wait, callback=self._timer_cb)
+                return
+
+    def _idle(self) -> None:
+        if self._buz is not None:
+            self._buz.duty(0)
+            self._buz.deinit()
+            self._buz = None
+
+
+sequencer = Sequencer()
 
 
 def note_to_bytes(sw_freq: float, sw_duration: int, sw_sleep: int) -> bytes:
-    return struct.pack(_NOTE_FMT, sw_freq, sw_duration, sw_sleep)
+    return _NOTE.pack(sw_freq, sw_duration, sw_sleep)
 
 
 def apply_note(tlv_data: bytes) -> None:
-    sw_freq, sw_duration, sw_sleep = struct.unpack(_NOTE_FMT, tlv_data)
-    note(sw_freq, sw_duration, sw_sleep, buz=None)
+    """queues the note and returns right away"""
+    sw_freq, sw_duration, sw_sleep = _NOTE.unpack(tlv_data)
+    sequencer.play(note_table((sw_freq,), (sw_duration,), (sw_sleep,)))
 
 
 def song_to_bytes(song) -> bytes:
-    return struct.pack('<B', song)
+    return _SONG.pack(song)
 
 
-def apply_song(tlv_data: bytes) -> None:
-    song = struct.unpack("<B", tlv_data)[0]
-    if song == rd2d:
-        buzzer_r2d2()
-    elif song == star_wars:
-        buzzer_star_wars()
-    elif song == reload:
-        buzzer_reload()
-    elif song == ringtone:
-        buzzer_ringtone()
-    else:
+def _apply_song(tlv_data: bytes, preempt: bool) -> None:
+    song = _SONG.unpack(tlv_data)[0]
+    table = song_table(song)
+    if table is None:
         print(f"unknown song id: {song}")
+        return
+    sequencer.play(table, preempt)
+
+
+def apply_song(tlv_data: bytes) -> None:
+    """queues the song after the notes playing and returns right away"""
+    _apply_song(tlv_data, False)
+
+
+def apply_song_now(tlv_data: bytes) -> None:
+    """stops what is playing and plays the song, returns right away"""
+    _apply_song(tlv_data, True)
+
+
+def apply_stop(tlv_data: bytes) -> None:
+    sequencer.cancel()
 
 
 def append_mappings(tlv_parser) -> None:
-    tlv_parser.add_tlv_mapping(tlv_types.tlv_type_buzzer_note, _NOTE_FMT_CALCSIZE, apply_note)
-    tlv_parser.add_tlv_mapping(tlv_types.tlv_type_buzzer_song, 1, apply_song)
+    tlv_codecs.add_mapping(tlv_parser, tlv_types.tlv_type_buzzer_note, apply_note)
+    tlv_codecs.add_mapping(tlv_parser, tlv_types.tlv_type_buzzer_song, apply_song)
+    tlv_codecs.add_mapping(tlv_parser, tlv_types.tlv_type_buzzer_stop, apply_stop)
+    tlv_codecs.add_mapping(tlv_parser, tlv_types.tlv_type_buzzer_song_now, apply_song_now)
+
@@ -0,0 +1,53 @@
+# generated by python_tlv/generate_tlv.py from python_tlv/tlv_schema.py, do not edit
+try:
+    from struct import Struct
+except ImportError:
+    # micropython has no struct.Struct, struct_compat keeps the api there but is not faster
+    from struct_compat import Struct
+
+import tlv_types
+
+# the values with a fixed layout, packed and unpacked with a Struct made once
+PIXELS_SET_COLOR = Struct('!BBB')  # r, g, b
+PIXELS_SET_I_COLOR = Struct('!BBBB')  # i, r, g, b
+PIXELS_SET_5_COLOR = Struct('!15B')  # r, g, b of the 5 pixels
+PIXELS_ANIMATION_START = Struct('!BBB')  # animation id, frames per second, loops (0 plays until stopped)
+PIXELS_BRIGHTNESS = Struct('!B')  # 0-255 for all colours
+PIXELS_GAMMA = Struct('!B')  # in tenths, 0 is off
+SCREEN_COLOR = Struct('!H')  # rgb565 colour
+BUZZER_NOTE = Struct('!fHH')  # frequency, duration ms, sleep ms
+BUZZER_SONG = Struct('!B')  # song id, queued after what is playing
+BUZZER_SONG_NOW = Struct('!B')  # song id, stops what is playing
+MOTION_TAP = Struct('!B')  # strength
+MOTION_SHAKE = Struct('!B')  # peaks
+MOTION_TILT = Struct('!B')  # orientation, motion.ORIENTATION_*
+STATS_CENTRAL = Struct('<12I')  # BLESimpleCentral.stats_to_bytes()
+
+# value length of every tlv type, None for a value of any length
+LENGTHS = {
+    tlv_types.tlv_type_pixels_clear: 0,
+    tlv_types.tlv_type_pixels_set_color: 3,
+    tlv_types.tlv_type_pixels_set_i_color: 4,
+    tlv_types.tlv_type_pixels_set_5_color: 15,
+    tlv_types.tlv_type_pixels_animation_start: 3,
+    tlv_types.tlv_type_pixels_animation_stop: 0,
+    tlv_types.tlv_type_pixels_brightness: 1,
+    tlv_types.tlv_type_pixels_gamma: 1,
+    tlv_types.tlv_type_screen_clear: 0,
+    tlv_types.tlv_type_screen_color: 2,
+    tlv_types.tlv_type_screen_text: None,
+    tlv_types.tlv_type_buzzer_note: 8,
+    tlv_types.tlv_type_buzzer_song: 1,
+    tlv_types.tlv_type_buzzer_stop: 0,
+    tlv_types.tlv_type_buzzer_song_now: 1,
+    tlv_types.tlv_type_motion_tap: 1,
+    tlv_types.tlv_type_motion_shake: 1,
+    tlv_types.tlv_type_motion_tilt: 1,
+    tlv_types.tlv_type_stats_parser: None,
+    tlv_types.tlv_type_stats_central: 48,
+}
+
+
+def add_mapping(tlv_parser, tlv_type: int, callback) -> None:
+    """TLVParser.add_tlv_mapping with the value length of tlv_type"""
+    tlv_parser.add_tlv_mapping(tlv_type, LENGTHS[tlv_type], callback)
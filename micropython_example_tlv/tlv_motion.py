@@ -0,0 +1,98 @@
+import time
+from array import array
+
+import motion
+import pixels
+import tlv_buzzer
+import tlv_codecs
+import tlv_pixels
+import tlv_types
+from tlv import TLVParser
+
+# the tlv type and value codec of every gesture
+_GESTURE_TLVS = {
+    motion.GESTURE_TAP: (tlv_types.tlv_type_motion_tap, tlv_codecs.MOTION_TAP),
+    motion.GESTURE_SHAKE: (tlv_types.tlv_type_motion_shake, tlv_codecs.MOTION_SHAKE),
+    motion.GESTURE_TILT: (tlv_types.tlv_type_motion_tilt, tlv_codecs.MOTION_TILT),
+}
+_TILT = tlv_codecs.MOTION_TILT
+
+# a short click for a tap
+_TAP_NOTES = tlv_buzzer.note_table((2_000,), (30,), (0,))
+
+# the colour of every orientation after a tilt
+_TILT_COLORS = ((0, 0, 32), (32, 0, 0), (0, 32, 0), (32, 32, 0), (0, 32, 32), (32, 0, 32))
+
+
+def gesture_to_tlv(gesture: int, value: int) -> bytes:
+    tlv_type, codec = _GESTURE_TLVS[gesture]
+    return TLVParser.encode(tlv_type, codec.pack(value))
+
+
+class MotionEvents:
+    """
+    drains the fifo of a LIS2HH12 in stream mode into a GestureDetector, the gestures become encoded tlvs,
+    call poll() at least every 300 ms at 100 Hz, in between the sensor fills its fifo and the cpu sleeps
+    """
+
+    def __init__(self, imu, odr_hz: int = 100, ring=None):
+        self._imu = imu
+        self._ring = imu.stream(ring)
+        self._sample = array('h', [0, 0, 0])
+        self.detector = motion.GestureDetector(odr_hz)
+        self.samples = 0
+        self.gestures = 0
+
+    def poll(self, emit) -> int:
+        """feed the samples in the fifo to the detector, emit(encoded) every gesture, returns the gestures"""
+        self._imu.drain()
+        ring = self._ring
+        sample = self._sample
+        detector = self.detector
+        found = 0
+        while ring.pop_into(sample):
+            self.samples += 1
+            gesture = detector.feed(sample[0], sample[1], sample[2])
+            if gesture != motion.GESTURE_NONE:
+                found += 1
+                emit(gesture_to_tlv(gesture, detector.value))
+        self.gestures += found
+        return found
+
+    def stats(self) -> dict:
+        return {'samples': self.samples, 'gestures': self.gestures, 'ring': self._ring.stats()}
+
+
+def record(imu, seconds: int, odr_hz: int = 100) -> None:
+    """print a trace of raw samples for python_tlv/replay_motion.py, copy it from the serial console"""
+    ring = imu.stream()
+    sample = array('h', [0, 0, 0])
+    print(f"# odr {odr_hz}")
+    end = time.ticks_add(time.ticks_ms(), seconds * 1_000)
+    while time.ticks_diff(end, time.ticks_ms()) > 0:
+        time.sleep_ms(200)
+        imu.drain()
+        while ring.pop_into(sample):
+            print(f"{sample[0]},{sample[1]},{sample[2]}")
+    imu.stop_stream()
+
+
+def apply_motion_tap(tlv_value: bytes) -> None:
+    tlv_buzzer.sequencer.play(_TAP_NOTES)
+
+
+def apply_motion_shake(tlv_value: bytes) -> None:
+    tlv_pixels.play_animation(tlv_pixels.animation_rainbow, 10, 2)
+
+
+def apply_motion_tilt(tlv_value: bytes) -> None:
+    orientation = _TILT.unpack(tlv_value)[0]
+    if orientation < len(_TILT_COLORS):
+        tlv_pixels.animator.stop()
+        pixels.set_color(*_TILT_COLORS[orientation])
+
+
+def append_mappings(tlv_parser) -> None:
+    tlv_codecs.add_mapping(tlv_parser, tlv_types.tlv_type_motion_tap, apply_motion_tap)
+    tlv_codecs.add_mapping(tlv_parser, tlv_types.tlv_type_motion_shake, apply_motion_shake)
+    tlv_codecs.add_mapping(tlv_parser, tlv_types.tlv_type_motion_tilt, apply_motion_tilt)
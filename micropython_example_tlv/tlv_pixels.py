@@ -1,47 +1,109 @@
 from micropython import const
-import struct
 
+import animation
 import pixels
+import tlv_codecs
 import tlv_types
 
-_RGB_COLOR_FMT = const('!BBB')
-_RGB_COLOR_FMT_CALCSIZE = struct.calcsize(_RGB_COLOR_FMT)
+# the value codecs, made once in tlv_codecs
+_RGB = tlv_codecs.PIXELS_SET_COLOR
+_RGB_SIZE = _RGB.size
+_I_RGB = tlv_codecs.PIXELS_SET_I_COLOR
+_RGB_5 = tlv_codecs.PIXELS_SET_5_COLOR
+_BRIGHTNESS = tlv_codecs.PIXELS_BRIGHTNESS
+_GAMMA = tlv_codecs.PIXELS_GAMMA
+
+# the stored animations
+animation_rainbow = const(0)
+animation_wheel = const(1)
+
+animator = animation.Animator()
 
 
 def apply_pixels_clear(tlv_value: bytes):
+    animator.stop()
     pixels.clear()
 
 
 def apply_pixels_set_color(tlv_value: bytes):
-    color = bytes_to_rgb(tlv_value)
-    pixels.set_color(*color)
+    animator.stop()
+    pixels.set_color(*_RGB.unpack(tlv_value))
 
 
 def apply_pixels_set_i_color(tlv_value: bytes):
-    i = struct.unpack_from('<B', tlv_value, 0)[0]
-    color = bytes_to_rgb(tlv_value, 1)
-    pixels.set_i_color(i, *color)
+    animator.stop()
+    pixels.set_i_color(*_I_RGB.unpack(tlv_value))
 
 
 def apply_pixels_set_5_color(tlv_value: bytes):
+    animator.stop()
+    # all 15 bytes in one unpack
+    values = _RGB_5.unpack(tlv_value)
     for i in range(5):
-        color_i = bytes_to_rgb(tlv_value, i * _RGB_COLOR_FMT_CALCSIZE)
-        pixels.set_i_color(i, *color_i)
+        pixels.set_i_color(i, values[3 * i], values[3 * i + 1], values[3 * i + 2], write=False)
+    pixels.show()
+
+
+def play_animation(animation_id: int, fps: int, loops: int = 0) -> None:
+    if not animator.animations():
+        _store_animations()
+    if animation_id not in animator.animations():
+        print(f"unknown animation id: {animation_id}")
+        return
+    if not fps:
+        print(f"animation {animation_id} cannot play at 0 frames per second")
+        return
+    animator.play(animation_id, fps, loops)
+
+
+def apply_pixels_animation_start(tlv_value: bytes):
+    play_animation(*tlv_codecs.PIXELS_ANIMATION_START.unpack(tlv_value))
+
+
+def apply_pixels_animation_stop(tlv_value: bytes):
+    animator.stop()
+
+
+def apply_pixels_brightness(tlv_value: bytes):
+    pixels.set_brightness(_BRIGHTNESS.unpack(tlv_value)[0])
+
+
+def apply_pixels_gamma(tlv_value: bytes):
+    pixels.set_gamma(_GAMMA.unpack(tlv_value)[0])
+
+
+def brightness_to_bytes(brightness: int) -> bytes:
+    return _BRIGHTNESS.pack(brightness)
+
+
+def gamma_to_bytes(gamma: int) -> bytes:
+    return _GAMMA.pack(gamma)
+
+
+def animation_to_bytes(animation_id: int, fps: int, loops: int = 0) -> bytes:
+    return tlv_codecs.PIXELS_ANIMATION_START.pack(animation_id, fps, loops)
 
 
 def rgb_to_bytes(r: int, g: int, b: int) -> bytes:
-    return struct.pack(_RGB_COLOR_FMT, r, g, b)
+    return _RGB.pack(r, g, b)
 
 
 def bytes_to_rgb(b: bytes, offset: int = 0) -> (int, int, int):
-    return struct.unpack_from(_RGB_COLOR_FMT, b, offset)
+    return _RGB.unpack_from(b, offset)
+
+
+def rgb_n_into(colors: list[int, int, int], buf, offset: int = 0) -> int:
+    """pack the colours into buf at offset, returns the offset after them"""
+    for color in colors:
+        _RGB.pack_into(buf, offset, color[0], color[1], color[2])
+        offset += _RGB_SIZE
+    return offset
 
 
-def rgb_n_to_bytes(colors: list[int, int, int]) -> bytes:
-    b = bytes()
-    for i in range(len(colors)):
-        b += rgb_to_bytes(*colors[i])
-    return b
+def rgb_n_to_bytes(colors: list[int, int, int]) -> bytearray:
+    buf = bytearray(len(colors) * _RGB_SIZE)
+    rgb_n_into(colors, buf)
+    return buf
 
 
 def color_rainbow():
@@ -70,10 +132,31 @@ def rainbow_generator() -> list[int, int, int]:
         yield cs
 
 
+def wheel_generator(frames: int = 32, max_brightness: int = 64) -> list[int, int, int]:
+    # the colour wheel turning along the pixels
+    for i in range(frames):
+        yield [pixels.wheel((i * 256 // frames + j * 256 // pixels.NUM_LEDS) & 255, max_brightness)
+               for j in range(pixels.NUM_LEDS)]
+
+
+def _store_animations() -> None:
+    animator.store(animation_rainbow, animation.precompute(rainbow_generator()))
+    animator.store(animation_wheel, animation.precompute(wheel_generator()))
+
+
+def init() -> None:
+    """set up the pixels and precompute the stored animations, otherwise done on first use"""
+    pixels.init()
+    if not animator.animations():
+        _store_animations()
+
+
 def append_mappings(tlv_parser) -> None:
-    tlv_parser.add_tlv_mapping(tlv_types.tlv_type_pixels_clear, 0, apply_pixels_clear)
-    tlv_parser.add_tlv_mapping(tlv_types.tlv_type_pixels_set_color, _RGB_COLOR_FMT_CALCSIZE, apply_pixels_set_color)
-    tlv_parser.add_tlv_mapping(tlv_types.tlv_type_pixels_set_i_color, 1 + _RGB_COLOR_FMT_CALCSIZE,
-                               apply_pixels_set_i_color)
-    tlv_parser.add_tlv_mapping(tlv_types.tlv_type_pixels_set_5_color, 5 * _RGB_COLOR_FMT_CALCSIZE,
-                               apply_pixels_set_5_color)
+    tlv_codecs.add_mapping(tlv_parser, tlv_types.tlv_type_pixels_clear, apply_pixels_clear)
+    tlv_codecs.add_mapping(tlv_parser, tlv_types.tlv_type_pixels_set_color, apply_pixels_set_color)
+    tlv_codecs.add_mapping(tlv_parser, tlv_types.tlv_type_pixels_set_i_color, apply_pixels_set_i_color)
+    tlv_codecs.add_mapping(tlv_parser, tlv_types.tlv_type_pixels_set_5_color, apply_pixels_set_5_color)
+    tlv_codecs.add_mapping(tlv_parser, tlv_types.tlv_type_pixels_animation_start, apply_pixels_animation_start)
+    tlv_codecs.add_mapping(tlv_parser, tlv_types.tlv_type_pixels_animation_stop, apply_pixels_animation_stop)
+    tlv_codecs.add_mapping(tlv_parser, tlv_types.tlv_type_pixels_brightness, apply_pixels_brightness)
+    tlv_codecs.add_mapping(tlv_parser, tlv_types.tlv_type_pixels_gamma, apply_pixels_gamma)
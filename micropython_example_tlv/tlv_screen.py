@@ -1,19 +1,45 @@
-import struct
-
+from micropython import const
 from machine import Pin, SPI
 # from machine import SoftI2C
 # from lis2hh12_dev import LIS2HH12, SF_G
 import gc
 import st7789
 
-import chango_16 as font_16
+import binary_font
 
+import tlv_codecs
 import tlv_types
+from glyph_cache import GlyphCache, TextRenderer, WINDOW_BYTES
+
+_SCREEN_COLOR = tlv_codecs.SCREEN_COLOR
+SCREEN_COLOR_FMT = _SCREEN_COLOR.format
 
-SCREEN_COLOR_FMT = '!H'
+# the st7789 has frame memory for 320 lines, the panel shows 240 of them,
+# the console scrolls 14 lines of the 17 pixel font, the last 2 pixel lines are a fixed area below it
+_FRAME_MEMORY_LINES = const(320)
+_CONSOLE_LINES = const(14)
+
+# merge two dirty rectangles when their bounding box repaints at most this many pixels that did not change,
+# every drawing call costs its window commands and a driver call, worth about a kilobyte of pixels
+_MERGE_SLACK_PIXELS = const(512)
 
 setup_ready = False
 
+# set up by init(), on first use
+tft = None
+text_renderer = None
+compositor = None
+font_16 = None
+
+
+def _load_font():
+    try:
+        return binary_font.load('chango_16.fnt')
+    except OSError:
+        # the binary font is not on the badge, convert it with python_tlv/convert_font.py
+        import chango_16
+        return chango_16
+
 
 def _screen_setup():
     spi = SPI(2, baudrate=40000000, polarity=1)
@@ -30,10 +56,94 @@ def _screen_setup():
         dc=pdc,
         buffer_size=240 * 240 * 2)
     screen.init()
+    scroll_lines = _CONSOLE_LINES * font_16.HEIGHT
+    screen.vscrdef(0, scroll_lines, _FRAME_MEMORY_LINES - scroll_lines)
+    screen.vscsad(0)
 
     return screen
 
 
+class ScreenCompositor:
+    """
+    Shadow model of the screen: a solid background colour and the text lines drawn on it
+    fill() repaints only what differs from the model, in as few rectangles as possible, and skips no-op updates,
+    text() skips a line that already shows the same text,
+    spi_bytes_saved counts what that saves compared to a full screen fill for every fill and redrawing every line
+    """
+
+    def __init__(self, tft, text_renderer: TextRenderer):
+        self._tft = tft
+        self._text_renderer = text_renderer
+        self._full_fill_bytes = WINDOW_BYTES + tft.width() * tft.height() * 2
+        self._background = None  # unknown until the first fill
+        self._lines = {}  # y -> (text, spi bytes it cost to draw)
+
+        self.spi_bytes_sent = 0
+        self.spi_bytes_saved = 0
+        self.skipped = 0
+        self.rects = 0
+
+    def background(self) -> int | None:
+        return self._background
+
+    def fill(self, color: int) -> None:
+        if color != self._background:
+            self._tft.fill(color)
+            sent = self._full_fill_bytes
+            self.rects += 1
+        else:
+            # only the text lines differ from the background
+            sent = 0
+            for x, y, w, h in self._dirty_rects():
+                self._tft.fill_rect(x, y, w, h, color)
+                sent += WINDOW_BYTES + w * h * 2
+                self.rects += 1
+            if sent == 0:
+                self.skipped += 1
+
+        self._background = color
+        self._lines.clear()
+        self._text_renderer.forget()
+        self.spi_bytes_sent += sent
+        self.spi_bytes_saved += self._full_fill_bytes - sent
+
+    def text(self, text: bytes, y: int) -> None:
+        line = self._lines.get(y)
+        if line is not None and line[0] == text:  # bytes compare to a memoryview by content
+            self.skipped += 1
+            self.spi_bytes_saved += line[1]
+            return
+
+        before = self._text_renderer.spi_bytes
+        self._text_renderer.draw_line(text, 0, y)
+        sent = self._text_renderer.spi_bytes - before
+        self._lines[y] = (bytes(text), sent)
+        self.spi_bytes_sent += sent
+        self.rects += 1
+
+    def _dirty_rects(self) -> list:
+        """the bands of the drawn text lines, adjacent ones coalesced, as (x, y, w, h)"""
+        height = self._text_renderer.line_height()
+        drawn = self._text_renderer.drawn()
+        rects = []
+        for y in sorted(drawn):
+            w = drawn[y]
+            if w == 0:
+                continue
+            if rects:
+                x0, y0, w0, h0, changed = rects[-1]
+                merged_w = max(w0, w)
+                if y0 + h0 == y and merged_w * (h0 + height) - changed - w * height <= _MERGE_SLACK_PIXELS:
+                    rects[-1] = (x0, y0, merged_w, h0 + height, changed + w * height)
+                    continue
+            rects.append((0, y, w, height, w * height))
+        return [r[:4] for r in rects]
+
+    def stats(self) -> dict:
+        return {'spi_bytes_sent': self.spi_bytes_sent, 'spi_bytes_saved': self.spi_bytes_saved,
+                'skipped': self.skipped, 'rects': self.rects}
+
+
 # def _turn_on_backlight():
 #     i2c = SoftI2C(scl=Pin(22), sda=Pin(21), freq=100000)
 #     imu = LIS2HH12(i2c, address=0x18, sf=SF_G)
@@ -41,15 +151,24 @@ def _screen_setup():
 #     imu.enable_act_int()
 
 
-if not setup_ready:
-    # _turn_on_backlight()
+def init():
+    """set up the screen once: the spi bus, the driver with its buffer, the font and the text rendering"""
+    global tft, text_renderer, compositor, font_16, font_size, setup_ready
+    if not setup_ready:
+        # _turn_on_backlight()
 
-    # can be used as globals
-    # import hardware
-    # hardware.tft
-    tft = _screen_setup()
+        # can be used as globals
+        # import hardware
+        # hardware.tft
+        font_16 = _load_font()
+        font_size = font_16.HEIGHT
+        tft = _screen_setup()
+        text_renderer = TextRenderer(tft, GlyphCache(font_16))
+        compositor = ScreenCompositor(tft, text_renderer)
+
+        setup_ready = True
+    return tft
 
-    setup_ready = True
 
 """
 #define BLACK   0x0000
@@ -65,37 +184,66 @@ screen_colors = st7789.BLACK, st7789.BLUE, st7789.RED, st7789.GREEN, st7789.CYAN
 
 
 def screen_color_to_bytes(color: int) -> bytes:
-    return struct.pack(SCREEN_COLOR_FMT, color)
+    return _SCREEN_COLOR.pack(color)
+
+
+def _fill(color: int) -> None:
+    global console, scroll_start
+    if not setup_ready:
+        init()
+    compositor.fill(color)
+    console = False
+    if scroll_start:
+        tft.vscsad(0)
+        scroll_start = 0
 
 
 def apply_screen_clear(tlv_value: bytes) -> None:
-    tft.fill(st7789.BLACK)
+    _fill(st7789.BLACK)
 
 
 def apply_screen_color(tlv_value: bytes) -> None:
-    color = struct.unpack(SCREEN_COLOR_FMT, tlv_value)[0]
-    tft.fill(color)
+    color = _SCREEN_COLOR.unpack(tlv_value)[0]
+    _fill(color)
 
 
-offset = 0
-font_size = 16
+offset = 0  # frame memory line of the next console line
+font_size = 0  # line height of the font, set by init()
+console = False  # the screen shows the text console, lines are drawn over the previous ones
+console_lines = 0  # lines written since the console started
+scroll = True  # scroll the console up when it is full, False starts again at the top
+scroll_start = 0  # frame memory line shown at the top of the screen
 
 
-def apply_screen_text(tlv_value: bytes) -> None:
-    global offset
-    dynamic_format = '<' + str(len(tlv_value)) + 's'
-    text = struct.unpack(dynamic_format, tlv_value)[0]
+def set_console_scroll(enable: bool) -> None:
+    global scroll
+    scroll = enable
 
-    if offset >= tft.height():
+
+def apply_screen_text(tlv_value: bytes) -> None:
+    global offset, console, console_lines, scroll_start
+    text = tlv_value  # no decoding, drawn straight from the value, a view of the payload when decoded into TLVRecords
+
+    if not setup_ready:
+        init()
+    if not console:
+        # the first line after a fill clears the screen once, from then on only the bands of the lines are redrawn
+        _fill(st7789.BLACK)
+        console = True
+        console_lines = 0
         offset = 0
-    if offset == 0:
-        tft.fill(st7789.BLACK)
 
-    tft.write(font_16, text, 0, offset)
-    offset += font_size
+    if console_lines >= _CONSOLE_LINES and scroll:
+        # the console is full: the oldest line scrolls out at the top, its band becomes the new bottom line
+        scroll_start = (console_lines - _CONSOLE_LINES + 1) % _CONSOLE_LINES * font_size
+        tft.vscsad(scroll_start)
+    offset = console_lines % _CONSOLE_LINES * font_size
+
+    compositor.text(text, offset)
+    console_lines += 1
 
 
 def append_mappings(tlv_parser) -> None:
-    tlv_parser.add_tlv_mapping(tlv_types.tlv_type_screen_clear, 0, apply_screen_clear)
-    tlv_parser.add_tlv_mapping(tlv_types.tlv_type_screen_color, 2, apply_screen_color)
-    tlv_parser.add_tlv_mapping(tlv_types.tlv_type_screen_text, None, apply_screen_text)
+    tlv_codecs.add_mapping(tlv_parser, tlv_types.tlv_type_screen_clear, apply_screen_clear)
+    tlv_codecs.add_mapping(tlv_parser, tlv_types.tlv_type_screen_color, apply_screen_color)
+    tlv_codecs.add_mapping(tlv_parser, tlv_types.tlv_type_screen_text, apply_screen_text)
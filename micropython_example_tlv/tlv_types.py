@@ -1,14 +1,33 @@
+# generated by python_tlv/generate_tlv.py from python_tlv/tlv_schema.py, do not edit
 from micropython import const
 
 tlv_type_pixels_clear = const(0)
-tlv_type_pixels_set_color = const(1)
-tlv_type_pixels_set_i_color = const(2)
-tlv_type_pixels_set_5_color = const(3)
+tlv_type_pixels_set_color = const(1)  # r, g, b
+tlv_type_pixels_set_i_color = const(2)  # i, r, g, b
+tlv_type_pixels_set_5_color = const(3)  # r, g, b of the 5 pixels
+
+# micropython badges only, stored animations, brightness and gamma
+tlv_type_pixels_animation_start = const(4)  # animation id, frames per second, loops (0 plays until stopped)
+tlv_type_pixels_animation_stop = const(5)
+tlv_type_pixels_brightness = const(6)  # 0-255 for all colours
+tlv_type_pixels_gamma = const(7)  # in tenths, 0 is off
 
 tlv_type_screen_clear = const(10)
-tlv_type_screen_color = const(11)
-tlv_type_screen_text = const(12)
+tlv_type_screen_color = const(11)  # rgb565 colour
+tlv_type_screen_text = const(12)  # text of a console line
+
+tlv_type_buzzer_note = const(20)  # frequency, duration ms, sleep ms
+tlv_type_buzzer_song = const(21)  # song id, queued after what is playing
+
+# micropython badges only, the songs play from a timer
+tlv_type_buzzer_stop = const(22)
+tlv_type_buzzer_song_now = const(23)  # song id, stops what is playing
 
+# micropython badges only, gestures of the accelerometer, see tlv_motion
+tlv_type_motion_tap = const(30)  # strength
+tlv_type_motion_shake = const(31)  # peaks
+tlv_type_motion_tilt = const(32)  # orientation, motion.ORIENTATION_*
 
-tlv_type_buzzer_note = const(20)
-tlv_type_buzzer_song = const(21)
+# diagnostics, sent by the micropython badges
+tlv_type_stats_parser = const(250)  # tlv.TLVStats.to_bytes()
+tlv_type_stats_central = const(251)  # BLESimpleCentral.stats_to_bytes()
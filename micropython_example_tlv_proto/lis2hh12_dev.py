@@ -13,7 +13,11 @@
 MicroPython I2C driver for LIS2HH12 3-axis accelerometer
 """
 
-import ustruct # pylint: disable=import-error
+try:
+    import ustruct # pylint: disable=import-error
+except ImportError:
+    import struct as ustruct
+from array import array
 from machine import I2C, Pin # pylint: disable=import-error
 from micropython import const # pylint: disable=import-error
 
@@ -37,6 +41,26 @@ _OUT_Y_L = const(0x2a)
 _OUT_Y_H = const(0x2b)
 _OUT_Z_L = const(0x2c)
 _OUT_Z_H = const(0x2d)
+_FIFO_CTRL = const(0x2e)
+_FIFO_SRC = const(0x2f)
+
+# LIS2DH12 only auto-increments the register address when its msb is set
+_LIS2DH12_AUTO_INCREMENT = const(0x80)
+
+# CTRL3 on LIS2HH12, CTRL5 on LIS2DH12
+_FIFO_EN_LIS2HH12 = const(0b10000000)
+_FIFO_EN_LIS2DH12 = const(0b01000000)
+
+# FIFO_CTRL mode, LIS2HH12 bits 7-5, LIS2DH12 bits 7-6
+FIFO_BYPASS = const(0)
+FIFO_FIFO = const(1)
+FIFO_STREAM = const(2)
+
+# FIFO_SRC
+_FIFO_OVR = const(0b01000000)
+_FIFO_EMPTY = const(0b00100000)
+_FIFO_FSS_MASK = const(0b00011111)
+_FIFO_SIZE = const(32)
 
 # CTRL1
 _ODR_MASK = const(0b01110000)
@@ -58,9 +82,71 @@ _SO_2G = 0.061 # 0.061 mg / digit
 _SO_4G = 0.122 # 0.122 mg / digit
 _SO_8G = 0.244 # 0.244 mg / digit
 
+# sensitivity in ug / digit, for integer math
+_UG_2G = const(61)
+_UG_4G = const(122)
+_UG_8G = const(244)
+
 SF_G = 0.001 # 1 mg = 0.001 g
 SF_SI = 0.00980665 # 1 mg = 0.00980665 m/s2
 
+
+class SampleRing:
+    """
+    Preallocated ring buffer of raw X, Y, Z samples. When full the
+    oldest samples are overwritten.
+    """
+    def __init__(self, capacity=128):
+        self.samples = array("h", [0] * (3 * capacity))
+        self._capacity = capacity
+        self._head = 0
+        self._count = 0
+        self.pushed = 0
+        self.dropped = 0
+
+    def __len__(self):
+        return self._count
+
+    def capacity(self):
+        return self._capacity
+
+    def push_raw(self, data, count):
+        """Append count samples of little endian X, Y, Z words from data."""
+        samples = self.samples
+        capacity = self._capacity
+        for i in range(count):
+            slot = (self._head + self._count) % capacity
+            if self._count == capacity:
+                self._head = (self._head + 1) % capacity
+                self.dropped += 1
+            else:
+                self._count += 1
+            offset = 6 * i
+            for axis in range(3):
+                word = data[offset + 2 * axis] | data[offset + 2 * axis + 1] << 8
+                samples[3 * slot + axis] = word - 0x10000 if word & 0x8000 else word
+        self.pushed += count
+
+    def pop_into(self, out):
+        """Oldest sample into out[0:3], returns False when empty."""
+        if not self._count:
+            return False
+        slot = 3 * self._head
+        out[0] = self.samples[slot]
+        out[1] = self.samples[slot + 1]
+        out[2] = self.samples[slot + 2]
+        self._head = (self._head + 1) % self._capacity
+        self._count -= 1
+        return True
+
+    def clear(self):
+        self._head = 0
+        self._count = 0
+
+    def stats(self):
+        return {"pushed": self.pushed, "dropped": self.dropped, "queued": self._count}
+
+
 class LIS2HH12:
     """Class which provides interface to LIS2HH12 3-axis accelerometer."""
     def __init__(self, i2c=None, address=0x1e, odr=ODR_100HZ, fs=FS_2G, sf=SF_SI):
@@ -71,12 +157,24 @@ class LIS2HH12:
 
         self.address = address
 
-        if 0x41 == self.whoami:
-            pass
-        elif 0x33 == self.whoami:
-            pass
+        whoami = self.whoami
+        if 0x41 == whoami:
+            self._out = _OUT_X_L
+        elif 0x33 == whoami:
+            self._out = _OUT_X_L | _LIS2DH12_AUTO_INCREMENT
         else:
             raise RuntimeError("LIS2HH12 or LIS2DH12 not found on I2C bus.")
+        self._lis2dh12 = 0x33 == whoami
+
+        # X, Y, Z of one burst read, up to a full FIFO for stream()
+        self._buf = bytearray(6 * _FIFO_SIZE)
+        self._sample = memoryview(self._buf)[:6]
+        self._fifo_src = bytearray(1)
+        self._ring = None
+
+        # shadows of the control registers, written without reading back
+        self._ctrl1 = self._register_char(_CTRL1)
+        self._ctrl4 = self._register_char(_CTRL4)
 
         self._sf = sf
         self._odr(odr)
@@ -90,16 +188,74 @@ class LIS2HH12:
         return values in g if constructor was provided `sf=SF_G`
         parameter.
 
-        On ESP32 currently takes aproximately 4.6ms to return full
-        3-tuple reading.
+        The three axes are read in one auto-incrementing I2C
+        transaction.
+        """
+        self.i2c.readfrom_mem_into(self.address, self._out, self._sample)
+        x, y, z = ustruct.unpack("<hhh", self._sample)
+        scale = self._so * self._sf
+        return (x * scale, y * scale, z * scale)
+
+    def acceleration_into(self, out):
+        """
+        Raw X, Y, Z readings into out[0:3], for example an array("h", [0, 0, 0]),
+        in one I2C transaction and without float math. Multiply by
+        ug_per_digit for micro g.
+        """
+        buf = self._sample
+        self.i2c.readfrom_mem_into(self.address, self._out, buf)
+        for axis in range(3):
+            word = buf[2 * axis] | buf[2 * axis + 1] << 8
+            out[axis] = word - 0x10000 if word & 0x8000 else word
+
+    @property
+    def ug_per_digit(self):
+        """ Sensitivity of the raw readings in micro g per digit. """
+        return self._ug
+
+    def stream(self, ring=None, mode=FIFO_STREAM):
+        """
+        Let the sensor collect samples in its 32 level FIFO, drain() moves
+        them into the SampleRing ring in bulk. At 400-800 Hz drain at
+        least every 40 ms so the FIFO does not overrun.
         """
-        so = self._so
-        sf = self._sf
+        self._ring = ring if ring is not None else SampleRing()
+        if self._lis2dh12:
+            self._register_char(_CTRL5, self._register_char(_CTRL5) | _FIFO_EN_LIS2DH12)
+            self._register_char(_FIFO_CTRL, mode << 6)
+        else:
+            self._register_char(_CTRL3, self._register_char(_CTRL3) | _FIFO_EN_LIS2HH12)
+            self._register_char(_FIFO_CTRL, mode << 5)
+        return self._ring
 
-        x = self._register_word(_OUT_X_L) * so * sf
-        y = self._register_word(_OUT_Y_L) * so * sf
-        z = self._register_word(_OUT_Z_L) * so * sf
-        return (x, y, z)
+    def stop_stream(self):
+        """ Back to bypass mode, reading the latest sample. """
+        self._register_char(_FIFO_CTRL, FIFO_BYPASS)
+        if self._lis2dh12:
+            self._register_char(_CTRL5, self._register_char(_CTRL5) & ~_FIFO_EN_LIS2DH12)
+        else:
+            self._register_char(_CTRL3, self._register_char(_CTRL3) & ~_FIFO_EN_LIS2HH12)
+        self._ring = None
+
+    def drain(self):
+        """
+        Move the samples in the FIFO into the ring with one transaction
+        for the FIFO status and one burst read for all samples, returns
+        the number of samples moved.
+        """
+        self.i2c.readfrom_mem_into(self.address, _FIFO_SRC, self._fifo_src)
+        src = self._fifo_src[0]
+        if src & _FIFO_EMPTY:
+            return 0
+        count = src & _FIFO_FSS_MASK
+        if src & _FIFO_OVR or not count:
+            # full, the count field wraps to 0 at 32
+            count = _FIFO_SIZE
+        # the address wraps from OUT_Z_H back to OUT_X_L while the FIFO is on
+        data = memoryview(self._buf)[:6 * count]
+        self.i2c.readfrom_mem_into(self.address, self._out, data)
+        self._ring.push_raw(data, count)
+        return count
 
     @property
     def whoami(self):
@@ -116,31 +272,30 @@ class LIS2HH12:
     def _register_char(self, register, value=None):
         if value is None:
             return self.i2c.readfrom_mem(self.address, register, 1)[0]
-        data = ustruct.pack("<b", value)
+        data = ustruct.pack("<B", value)
         return self.i2c.writeto_mem(self.address, register, data)
 
     def enable_act_int(self):
         self._register_char(_CTRL6, 0x0A)
 
     def _fs(self, value):
-        char = self._register_char(_CTRL4)
-        char &= ~_FS_MASK # clear FS bits
-        char |= value
-        self._register_char(_CTRL4, char)
+        self._ctrl4 = (self._ctrl4 & ~_FS_MASK) | value
+        self._register_char(_CTRL4, self._ctrl4)
 
         # Store the sensitivity multiplier
         if FS_2G == value:
             self._so = _SO_2G
+            self._ug = _UG_2G
         elif FS_4G == value:
             self._so = _SO_4G
+            self._ug = _UG_4G
         elif FS_8G == value:
             self._so = _SO_8G
+            self._ug = _UG_8G
 
     def _odr(self, value):
-        char = self._register_char(_CTRL1)
-        char &= ~_ODR_MASK # clear ODR bits
-        char |= value
-        self._register_char(_CTRL1, char)
+        self._ctrl1 = (self._ctrl1 & ~_ODR_MASK) | value
+        self._register_char(_CTRL1, self._ctrl1)
 
     def __enter__(self):
         return self
@@ -1,18 +1,58 @@
+// generated by python_tlv/generate_tlv.py from python_tlv/tlv_schema.py, do not edit
 #ifndef tlv_types_h
 #define tlv_types_h
 
 #include <stdint.h>
 
 const uint8_t tlv_type_pixels_clear = 0;
-const uint8_t tlv_type_pixels_set_color = 1;
-const uint8_t tlv_type_pixels_set_i_color = 2;
-const uint8_t tlv_type_pixels_set_5_color = 3;
+const uint8_t tlv_type_pixels_set_color = 1;  // r, g, b
+const uint8_t tlv_type_pixels_set_i_color = 2;  // i, r, g, b
+const uint8_t tlv_type_pixels_set_5_color = 3;  // r, g, b of the 5 pixels
+
+// micropython badges only, stored animations, brightness and gamma
+const uint8_t tlv_type_pixels_animation_start = 4;  // animation id, frames per second, loops (0 plays until stopped)
+const uint8_t tlv_type_pixels_animation_stop = 5;
+const uint8_t tlv_type_pixels_brightness = 6;  // 0-255 for all colours
+const uint8_t tlv_type_pixels_gamma = 7;  // in tenths, 0 is off
 
 const uint8_t tlv_type_screen_clear = 10;
-const uint8_t tlv_type_screen_color = 11;
-const uint8_t tlv_type_screen_text = 12;
+const uint8_t tlv_type_screen_color = 11;  // rgb565 colour
+const uint8_t tlv_type_screen_text = 12;  // text of a console line
+
+const uint8_t tlv_type_buzzer_note = 20;  // frequency, duration ms, sleep ms
+const uint8_t tlv_type_buzzer_song = 21;  // song id, queued after what is playing
+
+// micropython badges only, the songs play from a timer
+const uint8_t tlv_type_buzzer_stop = 22;
+const uint8_t tlv_type_buzzer_song_now = 23;  // song id, stops what is playing
+
+// micropython badges only, gestures of the accelerometer, see tlv_motion
+const uint8_t tlv_type_motion_tap = 30;  // strength
+const uint8_t tlv_type_motion_shake = 31;  // peaks
+const uint8_t tlv_type_motion_tilt = 32;  // orientation, motion.ORIENTATION_*
+
+// diagnostics, sent by the micropython badges
+const uint8_t tlv_type_stats_parser = 250;  // tlv.TLVStats.to_bytes()
+const uint8_t tlv_type_stats_central = 251;  // BLESimpleCentral.stats_to_bytes()
 
-const uint8_t tlv_type_buzzer_note = 20;
-const uint8_t tlv_type_buzzer_song = 21;
+// value lengths, a type missing here has a value of any length
+const uint8_t tlv_length_pixels_clear = 0;
+const uint8_t tlv_length_pixels_set_color = 3;
+const uint8_t tlv_length_pixels_set_i_color = 4;
+const uint8_t tlv_length_pixels_set_5_color = 15;
+const uint8_t tlv_length_pixels_animation_start = 3;
+const uint8_t tlv_length_pixels_animation_stop = 0;
+const uint8_t tlv_length_pixels_brightness = 1;
+const uint8_t tlv_length_pixels_gamma = 1;
+const uint8_t tlv_length_screen_clear = 0;
+const uint8_t tlv_length_screen_color = 2;
+const uint8_t tlv_length_buzzer_note = 8;
+const uint8_t tlv_length_buzzer_song = 1;
+const uint8_t tlv_length_buzzer_stop = 0;
+const uint8_t tlv_length_buzzer_song_now = 1;
+const uint8_t tlv_length_motion_tap = 1;
+const uint8_t tlv_length_motion_shake = 1;
+const uint8_t tlv_length_motion_tilt = 1;
+const uint8_t tlv_length_stats_central = 48;
 
 #endif // tlv_types_h
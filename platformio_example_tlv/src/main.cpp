@@ -167,7 +167,7 @@ esp_err_t apply_tlv(const uint8_t tlv_type, const uint8_t tlv_length, const uint
     switch (tlv_type)
     {
     case tlv_type_pixels_clear:
-        ret = check_length(0, tlv_length);
+        ret = check_length(tlv_length_pixels_clear, tlv_length);
         if (ret == ESP_OK)
         {
             apply_pixels_clear(tlv_value);
@@ -175,7 +175,7 @@ esp_err_t apply_tlv(const uint8_t tlv_type, const uint8_t tlv_length, const uint
         break;
 
     case tlv_type_pixels_set_color:
-        ret = check_length(3, tlv_length);
+        ret = check_length(tlv_length_pixels_set_color, tlv_length);
         if (ret == ESP_OK)
         {
             apply_pixels_set_color(tlv_value);
@@ -183,7 +183,7 @@ esp_err_t apply_tlv(const uint8_t tlv_type, const uint8_t tlv_length, const uint
         break;
 
     case tlv_type_pixels_set_i_color:
-        ret = check_length(4, tlv_length);
+        ret = check_length(tlv_length_pixels_set_i_color, tlv_length);
         if (ret == ESP_OK)
         {
             apply_pixels_set_i_color(tlv_value);
@@ -191,7 +191,7 @@ esp_err_t apply_tlv(const uint8_t tlv_type, const uint8_t tlv_length, const uint
         break;
 
     case tlv_type_pixels_set_5_color:
-        ret = check_length(15, tlv_length);
+        ret = check_length(tlv_length_pixels_set_5_color, tlv_length);
         if (ret == ESP_OK)
         {
             apply_pixels_set_5_color(tlv_value);
@@ -199,7 +199,7 @@ esp_err_t apply_tlv(const uint8_t tlv_type, const uint8_t tlv_length, const uint
         break;
 
     case tlv_type_screen_clear:
-        ret = check_length(0, tlv_length);
+        ret = check_length(tlv_length_screen_clear, tlv_length);
         if (ret == ESP_OK)
         {
             apply_screen_clear(tlv_value);
@@ -207,7 +207,7 @@ esp_err_t apply_tlv(const uint8_t tlv_type, const uint8_t tlv_length, const uint
         break;
 
     case tlv_type_screen_color:
-        ret = check_length(2, tlv_length);
+        ret = check_length(tlv_length_screen_color, tlv_length);
         if (ret == ESP_OK)
         {
             apply_screen_color(tlv_value);
@@ -219,7 +219,7 @@ esp_err_t apply_tlv(const uint8_t tlv_type, const uint8_t tlv_length, const uint
         break;
 
     case tlv_type_buzzer_note:
-        ret = check_length(8, tlv_length);
+        ret = check_length(tlv_length_buzzer_note, tlv_length);
         if (ret == ESP_OK)
         {
             apply_buzzer_note(tlv_value);
@@ -227,7 +227,7 @@ esp_err_t apply_tlv(const uint8_t tlv_type, const uint8_t tlv_length, const uint
         break;
 
     case tlv_type_buzzer_song:
-        ret = check_length(1, tlv_length);
+        ret = check_length(tlv_length_buzzer_song, tlv_length);
         if (ret == ESP_OK)
         {
             apply_buzzer_song(tlv_value);
@@ -0,0 +1,73 @@
+"""
+host stand-ins for the micropython modules used by the badge code in micropython_example_tlv
+call install() before importing any badge module
+
+outside a Simulation the stub modules use the real clock and record into a single host device,
+in a Simulation every badge gets its own hardware, its own copy of the badge modules and the virtual clock:
+
+    sim = Simulation()
+    sender = sim.add_device('sender', 'example_tlv_bluetooth_peripheral', 'peripheral')
+    receiver = sim.add_device('receiver', 'example_tlv_bluetooth_central', 'central')
+    sim.run(until_ms=10_000)
+    sim.stop()
+    receiver.leds, receiver.screen.framebuffer, receiver.buzzer_notes()
+"""
+import sys
+import time
+
+from .simulation import BADGE_PATH, Device, Simulation, SimulatedDevice, SimulationStopped, current_device
+from .lis2hh12 import FakeLIS2HH12
+from . import bluetooth, machine, micropython, neopixel, st7789
+
+_STUB_MODULES = {
+    'bluetooth': bluetooth,
+    'machine': machine,
+    'micropython': micropython,
+    'neopixel': neopixel,
+    'st7789': st7789,
+}
+
+
+def _ticks_ms() -> int:
+    return current_device().ticks_us() // 1_000
+
+
+def _ticks_us() -> int:
+    return current_device().ticks_us()
+
+
+def _ticks_add(ticks: int, delta: int) -> int:
+    return ticks + delta
+
+
+def _ticks_diff(ticks1: int, ticks2: int) -> int:
+    return ticks1 - ticks2
+
+
+def _sleep_ms(ms: int) -> None:
+    current_device().sleep_us(ms * 1_000)
+
+
+def _sleep_us(us: int) -> None:
+    current_device().sleep_us(us)
+
+
+_TIME_FUNCTIONS = {
+    'ticks_ms': _ticks_ms,
+    'ticks_us': _ticks_us,
+    'ticks_add': _ticks_add,
+    'ticks_diff': _ticks_diff,
+    'sleep_ms': _sleep_ms,
+    'sleep_us': _sleep_us,
+}
+
+
+def install() -> None:
+    """make the stub modules and the micropython time functions importable, and the badge modules"""
+    for name, module in _STUB_MODULES.items():
+        sys.modules.setdefault(name, module)
+    for name, fn in _TIME_FUNCTIONS.items():
+        if not hasattr(time, name):
+            setattr(time, name, fn)
+    if BADGE_PATH not in sys.path:
+        sys.path.insert(0, BADGE_PATH)
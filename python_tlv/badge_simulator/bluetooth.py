@@ -0,0 +1,70 @@
+"""
+stand-in for the bluetooth module, keeps track of advertising and scanning
+in a Simulation the advertisements go over the virtual radio to the scanning badges
+"""
+import time
+
+from .simulation import current_device
+
+
+class UUID:
+    def __init__(self, value):
+        self._value = value
+
+    def __bytes__(self) -> bytes:
+        if isinstance(self._value, int):
+            return self._value.to_bytes(2, 'little')
+        return bytes.fromhex(self._value.replace('-', ''))[::-1]
+
+    def __eq__(self, other) -> bool:
+        return isinstance(other, UUID) and bytes(self) == bytes(other)
+
+    def __repr__(self) -> str:
+        return f"UUID({self._value!r})"
+
+
+class BLE:
+    def __init__(self):
+        self.device = current_device()
+        self.device.ble.append(self)
+        self._radio = self.device.sim.radio if hasattr(self.device, 'sim') else None
+        self._active = False
+        self._irq = None
+        self.advertising = None  # (interval_us, adv_data, connectable) while advertising
+        self.scanning = None  # (duration_ms, interval_us, window_us, active) while scanning
+        self.advertise_log = []  # (ticks_ms, adv_data or None when stopped)
+
+    def active(self, active=None):
+        if active is None:
+            return self._active
+        self._active = bool(active)
+        if not self._active:
+            self.advertising = None
+            self.scanning = None
+            if self._radio is not None:
+                self._radio.deactivate(self)
+
+    def irq(self, handler) -> None:
+        self._irq = handler
+
+    def gap_advertise(self, interval_us, adv_data=None, resp_data=None, connectable=True) -> None:
+        if interval_us is None:
+            self.advertising = None
+        else:
+            self.advertising = (interval_us, bytes(adv_data), connectable)
+        self.advertise_log.append((time.ticks_ms(), None if interval_us is None else bytes(adv_data)))
+        if self._radio is not None and self._active:
+            self._radio.advertise(self, interval_us, adv_data, connectable)
+
+    def gap_scan(self, duration_ms, interval_us=1_280_000, window_us=11_250, active=False) -> None:
+        if duration_ms is None:
+            self.scanning = None
+        else:
+            self.scanning = (duration_ms, interval_us, window_us, active)
+        if self._radio is not None and self._active:
+            self._radio.scan(self, duration_ms, interval_us, window_us)
+
+    def _deliver(self, event: int, data) -> None:
+        # called by the radio, the handler runs in the badge thread like an irq
+        if self._active and self._irq is not None:
+            self.device.deliver(self._irq, event, data)
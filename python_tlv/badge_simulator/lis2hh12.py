@@ -0,0 +1,129 @@
+"""
+register map of a LIS2HH12 (or with whoami=0x33 a LIS2DH12) accelerometer for the fake i2c bus of a device:
+
+    device.i2c_devices[0x18] = FakeLIS2HH12(motion=lambda n: (0, 0, 16_393))
+
+motion(n) gives the raw x, y, z of the n-th sample, the sensor takes samples at the output data rate of CTRL1
+on the clock of the device, into the OUT registers or in fifo and stream mode into its 32 level fifo
+"""
+from .simulation import current_device
+
+_WHO_AM_I = 0x0f
+_CTRL1 = 0x20
+_CTRL3 = 0x22
+_CTRL4 = 0x23
+_CTRL5 = 0x24
+_OUT_X_L = 0x28
+_OUT_Z_H = 0x2d
+_FIFO_CTRL = 0x2e
+_FIFO_SRC = 0x2f
+
+_ODR_HZ = (0, 10, 50, 100, 200, 400, 800, 0)
+_FIFO_SIZE = 32
+
+FIFO_BYPASS = 0
+FIFO_FIFO = 1
+FIFO_STREAM = 2
+
+
+class FakeLIS2HH12:
+    def __init__(self, motion=None, whoami: int = 0x41):
+        self.registers = bytearray(0x40)
+        self.registers[_WHO_AM_I] = whoami
+        if whoami == 0x41:
+            self.registers[_CTRL4] = 0x04  # IF_ADD_INC, the LIS2HH12 auto-increments by default
+        self.motion = motion if motion is not None else lambda n: (0, 0, 16_393)
+        self.samples_taken = 0
+        self.overruns = 0
+        self._fifo = []
+        self._latest = bytes(6)
+        self._sample_us = None  # when the next sample is due
+        self.device = current_device()
+
+    def _lis2dh12(self) -> bool:
+        return self.registers[_WHO_AM_I] == 0x33
+
+    def _fifo_mode(self) -> int:
+        if self._lis2dh12():
+            enabled = self.registers[_CTRL5] & 0x40
+            mode = self.registers[_FIFO_CTRL] >> 6
+        else:
+            enabled = self.registers[_CTRL3] & 0x80
+            mode = self.registers[_FIFO_CTRL] >> 5
+        return mode if enabled else FIFO_BYPASS
+
+    def _sample(self) -> None:
+        x, y, z = self.motion(self.samples_taken)
+        self.samples_taken += 1
+        self._latest = b''.join((v & 0xffff).to_bytes(2, 'little') for v in (x, y, z))
+        mode = self._fifo_mode()
+        if mode == FIFO_BYPASS:
+            return
+        if len(self._fifo) == _FIFO_SIZE:
+            self.overruns += 1
+            if mode == FIFO_FIFO:
+                return  # fifo mode stops when full
+            del self._fifo[0]
+        self._fifo.append(self._latest)
+
+    def _update(self) -> None:
+        # take the samples due since the last access
+        hz = _ODR_HZ[self.registers[_CTRL1] >> 4 & 7]
+        now = self.device.ticks_us()
+        if not hz:
+            self._sample_us = None
+            return
+        period_us = 1_000_000 // hz
+        if self._sample_us is None:
+            self._sample_us = now + period_us
+        while self._sample_us <= now:
+            self._sample()
+            self._sample_us += period_us
+
+    def _auto_increment(self, register: int) -> tuple[int, bool]:
+        if self._lis2dh12():
+            return register & 0x7f, bool(register & 0x80)
+        return register, bool(self.registers[_CTRL4] & 0x04)
+
+    def read(self, register: int, n: int) -> bytes:
+        self._update()
+        register, increment = self._auto_increment(register)
+        fifo = self._fifo_mode() != FIFO_BYPASS
+        out = bytearray()
+        sample = self._fifo.pop(0) if fifo and register == _OUT_X_L and self._fifo else self._latest
+        for _ in range(n):
+            if _OUT_X_L <= register <= _OUT_Z_H:
+                out.append(sample[register - _OUT_X_L])
+            elif register == _FIFO_SRC:
+                out.append(self._fifo_src())
+            else:
+                out.append(self.registers[register])
+            if not increment:
+                continue
+            if fifo and register == _OUT_Z_H:
+                # reading the fifo the address wraps back to OUT_X_L, and the next sample comes out
+                register = _OUT_X_L
+                sample = self._fifo.pop(0) if self._fifo else self._latest
+            else:
+                register += 1
+        return bytes(out)
+
+    def _fifo_src(self) -> int:
+        count = len(self._fifo)
+        src = count & 0x1f
+        if count == 0:
+            src |= 0x20  # EMPTY
+        if count == _FIFO_SIZE and self.overruns:
+            src |= 0x40  # OVR
+        return src
+
+    def write(self, register: int, data) -> None:
+        self._update()
+        register, increment = self._auto_increment(register)
+        for b in bytes(data):
+            if register not in (_WHO_AM_I, _FIFO_SRC) and not _OUT_X_L <= register <= _OUT_Z_H:
+                self.registers[register] = b
+            if increment:
+                register += 1
+        if self._fifo_mode() == FIFO_BYPASS:
+            self._fifo.clear()
@@ -0,0 +1,156 @@
+"""stand-in for the machine module: pins, spi, i2c, pwm and timers without hardware behind them"""
+import time
+
+from .simulation import current_device
+
+
+class Pin:
+    IN = 1
+    OUT = 3
+    PULL_UP = 1
+    PULL_DOWN = 2
+    IRQ_RISING = 1
+    IRQ_FALLING = 2
+
+    def __init__(self, id, mode=-1, pull=-1, value=None):
+        self.id = id
+        self.mode = mode
+        self._value = 0 if value is None else value
+
+    def value(self, value=None):
+        if value is None:
+            return self._value
+        self._value = value
+
+    def on(self) -> None:
+        self._value = 1
+
+    def off(self) -> None:
+        self._value = 0
+
+    def irq(self, handler=None, trigger=IRQ_RISING):
+        self.irq_handler = handler
+
+
+class SPI:
+    def __init__(self, id, baudrate=1_000_000, polarity=0, phase=0, **kwargs):
+        self.id = id
+        self.baudrate = baudrate
+        self.bytes_written = 0
+        self.device = current_device()
+
+    def write(self, buf) -> None:
+        self.bytes_written += len(buf)
+        self.device.spi_bytes += len(buf)
+
+
+class PWM:
+    """logs every change of frequency or duty as (ticks_us, freq, duty) in the buzzer log of the device"""
+
+    def __init__(self, pin: Pin, freq: int = 0, duty: int = 0):
+        self.pin = pin
+        self._freq = freq
+        self._duty = duty
+        self.active = True
+        self.device = current_device()
+
+    def _log(self) -> None:
+        self.device.buzzer_log.append((time.ticks_us(), self._freq, self._duty if self.active else 0))
+
+    def freq(self, value=None):
+        if value is None:
+            return self._freq
+        if value != self._freq:
+            self._freq = value
+            self._log()
+
+    def duty(self, value=None):
+        if value is None:
+            return self._duty
+        if value != self._duty:
+            self._duty = value
+            self._log()
+
+    def deinit(self) -> None:
+        if self.active and self._duty:
+            self.active = False
+            self._log()
+        self.active = False
+
+
+class Timer:
+    """
+    the callback runs like the soft timer irqs of the esp32 port, in a simulated badge at its next sleep
+    on the virtual clock, outside a Simulation in a thread after the real period
+    """
+    ONE_SHOT = 0
+    PERIODIC = 1
+
+    def __init__(self, id=-1, **kwargs):
+        self.id = id
+        self._generation = 0
+        self.device = current_device()
+        if kwargs:
+            self.init(**kwargs)
+
+    def init(self, mode=PERIODIC, period=-1, callback=None, freq=-1) -> None:
+        self._generation += 1
+        generation = self._generation
+        period_us = 1_000_000 // freq if freq > 0 else period * 1_000
+        due_us = self.device.ticks_us() + period_us
+
+        def fire():
+            nonlocal due_us
+            if generation != self._generation:
+                return  # deinit() or init() again since
+            if mode == Timer.PERIODIC:
+                # from when it was due, a late callback does not delay the next one
+                due_us += period_us
+                self.device.call_at_us(due_us, fire)
+            else:
+                self._generation += 1
+            if callback is not None:
+                callback(self)
+
+        self.device.call_at_us(due_us, fire)
+
+    def deinit(self) -> None:
+        self._generation += 1
+
+
+class I2C:
+    """
+    transactions go to the fake devices in device.i2c_devices by address, like badge_simulator.lis2hh12,
+    other addresses read zeros, every transaction and byte is counted
+    """
+
+    def __init__(self, id=-1, scl=None, sda=None, freq=400_000):
+        self.scl = scl
+        self.sda = sda
+        self.freq = freq
+        self.device = current_device()
+        self.transactions = 0
+        self.bytes_read = 0
+        self.bytes_written = 0
+
+    def _read(self, addr: int, memaddr: int, nbytes: int) -> bytes:
+        self.transactions += 1
+        self.bytes_read += nbytes
+        fake = self.device.i2c_devices.get(addr)
+        return fake.read(memaddr, nbytes) if fake is not None else bytes(nbytes)
+
+    def readfrom_mem(self, addr: int, memaddr: int, nbytes: int) -> bytes:
+        return self._read(addr, memaddr, nbytes)
+
+    def readfrom_mem_into(self, addr: int, memaddr: int, buf) -> None:
+        buf[:] = self._read(addr, memaddr, len(buf))
+
+    def writeto_mem(self, addr: int, memaddr: int, buf) -> None:
+        self.transactions += 1
+        self.bytes_written += len(buf)
+        fake = self.device.i2c_devices.get(addr)
+        if fake is not None:
+            fake.write(memaddr, buf)
+
+
+SoftI2C = I2C
@@ -0,0 +1,15 @@
+"""stand-in for the micropython module"""
+from .simulation import current_device
+
+
+def const(value):
+    return value
+
+
+def schedule(fn, arg) -> None:
+    # runs at the next sleep of a simulated badge, right away outside a Simulation
+    current_device().schedule(fn, arg)
+
+
+def alloc_emergency_exception_buf(size: int) -> None:
+    pass
@@ -0,0 +1,42 @@
+"""
+stand-in for the neopixel module, keeps the colours of the last write() and logs every write on the device
+buf is in the byte order of the leds like on the badge, so code writing frames into it directly is checked too
+"""
+import time
+
+from .simulation import current_device
+
+
+class NeoPixel:
+    ORDER = (1, 0, 2, 3)  # the leds take green, red, blue
+
+    def __init__(self, pin, n: int, bpp: int = 3, timing: int = 1):
+        self.pin = pin
+        self.n = n
+        self.bpp = bpp
+        self.buf = bytearray(n * bpp)
+        self.written = [(0, 0, 0)] * n
+        self.writes = 0
+        self.device = current_device()
+        self.device.neopixels.append(self)
+
+    def __len__(self) -> int:
+        return self.n
+
+    def __setitem__(self, i: int, color) -> None:
+        offset = i * self.bpp
+        for j in range(self.bpp):
+            self.buf[offset + self.ORDER[j]] = color[j]
+
+    def __getitem__(self, i: int):
+        offset = i * self.bpp
+        return tuple(self.buf[offset + self.ORDER[j]] for j in range(self.bpp))
+
+    def fill(self, color) -> None:
+        for i in range(self.n):
+            self[i] = color
+
+    def write(self) -> None:
+        self.written = [self[i] for i in range(self.n)]
+        self.writes += 1
+        self.device.led_log.append((time.ticks_ms(), self.written))
@@ -0,0 +1,94 @@
+"""
+virtual ble radio connecting the simulated badges
+
+an advertising badge transmits its payload every interval plus the random 0-10ms advertising delay of the ble spec,
+the first one after just the random delay,
+a scanning badge receives it when the transmission falls in its scan window and it is not lost
+"""
+_IRQ_SCAN_RESULT = 5
+_IRQ_SCAN_DONE = 6
+
+_ADV_IND = 0x00
+_ADV_SCAN_IND = 0x02
+
+_ADV_DELAY_US = 10_000
+
+
+class VirtualRadio:
+    def __init__(self, sim, loss: float = 0.0):
+        self._sim = sim
+        self._loss = loss
+        self._advertisers = {}  # ble -> generation of its current advertisement
+        self._scanners = {}  # ble -> (start_us, interval_us, window_us, generation)
+        self._generation = 0
+
+        self.transmitted = 0
+        self.received = 0
+        self.lost = 0
+        self.out_of_window = 0
+
+    def _next_generation(self) -> int:
+        self._generation += 1
+        return self._generation
+
+    def advertise(self, ble, interval_us, adv_data, connectable: bool) -> None:
+        if interval_us is None:
+            self._advertisers.pop(ble, None)
+            return
+
+        generation = self._next_generation()
+        self._advertisers[ble] = generation
+        adv_type = _ADV_IND if connectable else _ADV_SCAN_IND
+        adv_data = bytes(adv_data)
+        sim = self._sim
+
+        def transmit():
+            if self._advertisers.get(ble) != generation:
+                return
+            self._transmit(ble, adv_type, adv_data)
+            sim.call_at(sim.now_us + interval_us + sim.random.randrange(_ADV_DELAY_US), transmit)
+
+        sim.call_at(sim.now_us + sim.random.randrange(_ADV_DELAY_US), transmit)
+
+    def scan(self, ble, duration_ms, interval_us: int, window_us: int) -> None:
+        if duration_ms is None:
+            if self._scanners.pop(ble, None) is not None:
+                ble._deliver(_IRQ_SCAN_DONE, ())
+            return
+
+        generation = self._next_generation()
+        self._scanners[ble] = (self._sim.now_us, interval_us, window_us, generation)
+
+        def done():
+            scanner = self._scanners.get(ble)
+            if scanner is not None and scanner[3] == generation:
+                del self._scanners[ble]
+                ble._deliver(_IRQ_SCAN_DONE, ())
+
+        if duration_ms > 0:
+            self._sim.call_at(self._sim.now_us + duration_ms * 1_000, done)
+
+    def deactivate(self, ble) -> None:
+        self._advertisers.pop(ble, None)
+        self._scanners.pop(ble, None)
+
+    def _transmit(self, sender, adv_type: int, adv_data: bytes) -> None:
+        self.transmitted += 1
+        now_us = self._sim.now_us
+        for ble, (start_us, interval_us, window_us, _) in list(self._scanners.items()):
+            if ble.device is sender.device:
+                continue
+            if (now_us - start_us) % interval_us >= window_us:
+                self.out_of_window += 1
+                continue
+            if self._loss and self._sim.random.random() < self._loss:
+                self.lost += 1
+                continue
+            self.received += 1
+            # on the badge addr and adv_data are memoryviews only valid during the irq
+            ble._deliver(_IRQ_SCAN_RESULT, (0, memoryview(sender.device.addr), adv_type, sender.device.rssi,
+                                            memoryview(adv_data)))
+
+    def stats(self) -> dict:
+        return {'transmitted': self.transmitted, 'received': self.received, 'lost': self.lost,
+                'out_of_window': self.out_of_window}
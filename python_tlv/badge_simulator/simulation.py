@@ -0,0 +1,293 @@
+"""
+virtual clock and simulated badges
+
+every simulated badge runs its own copy of the badge modules in its own thread, only one thread runs at a time:
+a badge runs until it sleeps, then the simulation advances the virtual clock to the next wake up, radio event or timer.
+code takes no virtual time, only sleeping does. ble irqs and scheduled callbacks are delivered while a badge sleeps,
+which is where the main loops of the examples spend their time.
+asyncio is not virtualised, an asyncio loop in a simulated badge runs in real time
+"""
+import heapq
+import importlib
+import os
+import random
+import sys
+import threading
+import time
+import traceback
+
+BADGE_PATH = os.path.realpath(os.path.join(os.path.dirname(__file__), '..', '..', 'micropython_example_tlv'))
+
+# sleeps allowed after the stop was raised, so cleanup code can finish but a loop swallowing the stop cannot hang
+_MAX_SLEEPS_AFTER_STOP = 10_000
+
+_local = threading.local()
+
+
+class SimulationStopped(BaseException):
+    """raised in a badge thread when the simulation stops, a BaseException so the badge code does not catch it"""
+
+
+class Device:
+    """hardware state of one badge, the stub modules record into the device that created them"""
+
+    def __init__(self, name: str, addr: bytes = bytes(6), rssi: int = -50):
+        self.name = name
+        self.addr = addr
+        self.rssi = rssi  # rssi at which the other badges receive this one
+
+        self.ble = []
+        self.neopixels = []
+        self.screen = None
+        self.spi_bytes = 0
+        self.led_log = []  # (ticks_ms, colours) for every NeoPixel.write()
+        self.buzzer_log = []  # (ticks_us, freq, duty) for every pwm change
+        self.i2c_devices = {}  # address -> fake i2c device, see lis2hh12.FakeLIS2HH12
+
+    # real time clock, for the stub modules used outside a Simulation
+
+    def ticks_us(self) -> int:
+        return time.monotonic_ns() // 1_000
+
+    def sleep_us(self, us: int) -> None:
+        time.sleep(us / 1_000_000)
+
+    def schedule(self, fn, arg) -> None:
+        fn(arg)
+
+    def call_at_us(self, ticks_us: int, fn, *args) -> None:
+        """run fn(*args) at ticks_us, like a soft timer irq"""
+        timer = threading.Timer(max(0, ticks_us - self.ticks_us()) / 1_000_000, fn, args)
+        timer.daemon = True
+        timer.start()
+
+    @property
+    def leds(self) -> list:
+        """colours shown by the first neopixel strip"""
+        return self.neopixels[0].written if self.neopixels else []
+
+    def buzzer_notes(self) -> list:
+        """(start_us, freq, duration_us) of every tone in the buzzer log"""
+        notes = []
+        start = None
+        for ticks, freq, duty in self.buzzer_log:
+            if start is not None and (duty == 0 or freq != start[1]):
+                notes.append((start[0], start[1], ticks - start[0]))
+                start = None
+            if start is None and duty > 0 and freq > 0:
+                start = (ticks, freq)
+        return notes
+
+
+class SimulatedDevice(Device):
+    """a badge in a Simulation, with the virtual clock and its own copy of the badge modules"""
+
+    def __init__(self, sim: 'Simulation', name: str, addr: bytes, rssi: int):
+        super().__init__(name, addr, rssi)
+        self.sim = sim
+        self.modules = {}
+        self.error = None
+        self.finished = False
+
+        self._pending = []  # callables to run in the badge thread, irqs and micropython.schedule
+        self._in_irq = False
+        self._wake_us = 0
+        self._stop = None  # exception class raised in the next sleep once the simulation stops
+        self._sleeps_after_stop = 0
+        self._resume = threading.Semaphore(0)
+        self._thread = None
+
+    def ticks_us(self) -> int:
+        return self.sim.now_us
+
+    def sleep_us(self, us: int) -> None:
+        if threading.current_thread() is not self._thread:
+            return  # sleeping while the module is imported, takes no virtual time
+        if self._stop is not None:
+            # the stop was raised already, let the cleanup code in finally and __exit__ run
+            self._sleeps_after_stop += 1
+            if self._sleeps_after_stop > _MAX_SLEEPS_AFTER_STOP:
+                raise SimulationStopped()
+            return
+
+        wake_us = self.sim.now_us + max(0, us)
+        while True:
+            self._wake_us = wake_us
+            self._yield()
+            if self._stop is not None:
+                raise self._stop()
+            if not self._in_irq:
+                self._run_pending()
+            if self.sim.now_us >= wake_us:
+                return
+
+    def schedule(self, fn, arg) -> None:
+        self._pending.append((fn, (arg,)))
+
+    def call_at_us(self, ticks_us: int, fn, *args) -> None:
+        self.sim.call_at(ticks_us, lambda: self.deliver(fn, *args))
+
+    def deliver(self, fn, *args) -> None:
+        """run fn(*args) in the badge thread at its next sleep, like a ble irq"""
+        self._pending.append((fn, args))
+
+    def load(self, module_name: str):
+        """import module_name, the badge modules it imports become private copies of this device"""
+        shared = {name: module for name, module in sys.modules.items() if _is_badge_module(module)}
+        for name in shared:
+            del sys.modules[name]
+
+        previous = getattr(_local, 'device', None)
+        _local.device = self
+        try:
+            module = importlib.import_module(module_name)
+        finally:
+            _local.device = previous
+            for name, loaded in list(sys.modules.items()):
+                if _is_badge_module(loaded):
+                    self.modules[name] = loaded
+                    del sys.modules[name]
+            sys.modules.update(shared)
+        return module
+
+    def start(self, fn) -> None:
+        """run fn() in the badge thread, from the current virtual time"""
+
+        def main():
+            _local.device = self
+            self._resume.acquire()
+            try:
+                if self._stop is None:
+                    fn()
+            except (SimulationStopped, KeyboardInterrupt):
+                pass
+            except BaseException as e:
+                self.error = e
+                print(f"{self.name} stopped with an exception:", file=sys.stderr)
+                traceback.print_exc()
+            finally:
+                self.finished = True
+                self.sim._yielded.release()
+
+        self._wake_us = self.sim.now_us
+        self._thread = threading.Thread(target=main, name=self.name, daemon=True)
+        self._thread.start()
+
+    def _yield(self) -> None:
+        self.sim._yielded.release()
+        self._resume.acquire()
+
+    def _run_pending(self) -> None:
+        self._in_irq = True
+        try:
+            while self._pending:
+                fn, args = self._pending.pop(0)
+                try:
+                    fn(*args)
+                except Exception:
+                    # like micropython, an exception in an irq handler is printed and the main loop goes on
+                    print(f"{self.name}: exception in irq handler", file=sys.stderr)
+                    traceback.print_exc()
+        finally:
+            self._in_irq = False
+
+    def _next_run_us(self) -> int | None:
+        if self.finished or self._thread is None:
+            return None
+        if self._pending and not self._in_irq:
+            return self.sim.now_us
+        return self._wake_us
+
+
+def _is_badge_module(module) -> bool:
+    file = getattr(module, '__file__', None)
+    return file is not None and os.path.dirname(os.path.realpath(file)) == BADGE_PATH
+
+
+class Simulation:
+    """
+    runs badges on a virtual clock, connected by a virtual radio
+    add the badges with add_device(), advance the clock with run(until_ms), stop() ends the badge threads.
+    loss is the chance a scanning badge misses an advertisement it could have received
+    """
+
+    def __init__(self, loss: float = 0.0, seed: int = 0):
+        from .radio import VirtualRadio
+
+        self.now_us = 0
+        self.random = random.Random(seed)
+        self.radio = VirtualRadio(self, loss)
+        self.devices = []
+
+        self._events = []  # heap of (ticks_us, seq, fn), run in the simulation thread
+        self._seq = 0
+        self._yielded = threading.Semaphore(0)
+
+    def add_device(self, name: str, module_name: str, function_name: str | None = None, args: tuple = (),
+                   rssi: int = -50) -> SimulatedDevice:
+        """load module_name for a new badge and run module.function_name(*args) in it"""
+        addr = bytes((0xba, 0xd6, 0xe0, 0x00, 0x00, len(self.devices) + 1))
+        device = SimulatedDevice(self, name, addr, rssi)
+        module = device.load(module_name)
+        if function_name is not None:
+            device.start(lambda: getattr(module, function_name)(*args))
+        self.devices.append(device)
+        return device
+
+    def call_at(self, ticks_us: int, fn) -> None:
+        """run fn() in the simulation thread at ticks_us"""
+        heapq.heappush(self._events, (ticks_us, self._seq, fn))
+        self._seq += 1
+
+    def run(self, until_ms: int) -> None:
+        """advance the virtual clock to until_ms, running the badges and the events on the way"""
+        until_us = until_ms * 1_000
+        while True:
+            device = None
+            next_us = self._events[0][0] if self._events else None
+            for d in self.devices:
+                run_us = d._next_run_us()
+                if run_us is not None and (next_us is None or run_us < next_us):
+                    next_us = run_us
+                    device = d
+            if next_us is None or next_us > until_us:
+                break
+
+            self.now_us = max(self.now_us, next_us)
+            if device is None:
+                heapq.heappop(self._events)[2]()
+            else:
+                device._resume.release()
+                self._yielded.acquire()
+        self.now_us = max(self.now_us, until_us)
+
+    def stop(self, interrupt: bool = True) -> None:
+        """
+        stop all badge threads, by default a KeyboardInterrupt is raised in their sleep, like ctrl-c on the repl,
+        so the examples print their stats and clean up. with interrupt=False SimulationStopped is raised instead
+        """
+        for device in self.devices:
+            if device._thread is not None and not device.finished:
+                device._stop = KeyboardInterrupt if interrupt else SimulationStopped
+                device._resume.release()
+                self._yielded.acquire()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, exc_tb):
+        self.stop()
+
+
+_host_device = None
+
+
+def current_device() -> Device:
+    """the simulated badge of the running thread, or the host device outside a Simulation"""
+    device = getattr(_local, 'device', None)
+    if device is not None:
+        return device
+    global _host_device
+    if _host_device is None:
+        _host_device = Device('host')
+    return _host_device
@@ -0,0 +1,171 @@
+"""
+stand-in for the st7789 display driver, draws into a big endian RGB565 framebuffer like the one on the display
+and counts the bytes that would be sent over spi: the pixel data plus the window commands of every drawing call
+the framebuffer is the frame memory, vscrdef() and vscsad() change which memory line is shown on which display line
+"""
+from .simulation import current_device
+
+BLACK = 0x0000
+BLUE = 0x001F
+RED = 0xF800
+GREEN = 0x07E0
+CYAN = 0x07FF
+MAGENTA = 0xF81F
+YELLOW = 0xFFE0
+WHITE = 0xFFFF
+
+# column address set, row address set (command + 4 bytes each) and memory write command before every window
+_WINDOW_BYTES = 11
+
+
+def color565(red: int, green: int, blue: int) -> int:
+    return (red & 0xf8) << 8 | (green & 0xfc) << 3 | blue >> 3
+
+
+class ST7789:
+    def __init__(self, spi, width, height, reset=None, dc=None, cs=None, backlight=None, rotation=0,
+                 buffer_size=0, **kwargs):
+        self.spi = spi
+        self._width = width
+        self._height = height
+        self.framebuffer = bytearray(width * height * 2)
+        self.spi_bytes = 0
+        self.windows = 0
+        self.background = BLACK
+        self.texts = []  # (x, y, text) of every write() since the last fill()
+        self.scroll_area = (0, height, 0)  # top fixed, vertical scroll and bottom fixed lines
+        self.scroll_start = 0
+        self.device = current_device()
+        self.device.screen = self
+
+    def init(self) -> None:
+        pass
+
+    def width(self) -> int:
+        return self._width
+
+    def height(self) -> int:
+        return self._height
+
+    def vscrdef(self, tfa: int, vsa: int, bfa: int) -> None:
+        """vertical scroll definition, the lines of the top fixed, scrolling and bottom fixed areas"""
+        self.scroll_area = (tfa, vsa, bfa)
+        self._command(6)
+
+    def vscsad(self, vssa: int) -> None:
+        """vertical scroll start address, the memory line shown at the top of the scroll area"""
+        self.scroll_start = vssa
+        self._command(2)
+
+    def _command(self, data_bytes: int) -> None:
+        self.spi_bytes += 1 + data_bytes
+        self.device.spi_bytes += 1 + data_bytes
+
+    def _send(self, pixels: int) -> None:
+        n = _WINDOW_BYTES + 2 * pixels
+        self.windows += 1
+        self.spi_bytes += n
+        self.device.spi_bytes += n
+
+    def _clip(self, x: int, y: int, w: int, h: int):
+        x0, y0 = max(0, x), max(0, y)
+        x1, y1 = min(self._width, x + w), min(self._height, y + h)
+        return x0, y0, max(0, x1 - x0), max(0, y1 - y0)
+
+    def fill(self, color: int) -> None:
+        self.framebuffer[:] = bytes((color >> 8 & 0xff, color & 0xff)) * (self._width * self._height)
+        self._send(self._width * self._height)
+        self.background = color
+        self.texts = []
+
+    def fill_rect(self, x: int, y: int, w: int, h: int, color: int) -> None:
+        x, y, w, h = self._clip(x, y, w, h)
+        row = bytes((color >> 8 & 0xff, color & 0xff)) * w
+        for yy in range(y, y + h):
+            start = (yy * self._width + x) * 2
+            self.framebuffer[start:start + 2 * w] = row
+        self._send(w * h)
+
+    def pixel(self, x: int, y: int, color: int) -> None:
+        if 0 <= x < self._width and 0 <= y < self._height:
+            i = (y * self._width + x) * 2
+            self.framebuffer[i] = color >> 8 & 0xff
+            self.framebuffer[i + 1] = color & 0xff
+            self._send(1)
+
+    def blit_buffer(self, buffer, x: int, y: int, w: int, h: int) -> None:
+        """buffer holds w * h big endian RGB565 pixels"""
+        for yy in range(h):
+            self._put_row(x, y + yy, buffer[yy * w * 2:(yy + 1) * w * 2])
+        self._send(w * h)
+
+    def write(self, font, text, x: int, y: int, fg: int = WHITE, bg: int = BLACK) -> int:
+        """draw text with a font converted by font2bitmap, every glyph is one window, returns the width drawn"""
+        if isinstance(text, str):
+            text = text.encode()
+        self.texts.append((x, y, bytes(text)))
+
+        fg_bytes = bytes((fg >> 8 & 0xff, fg & 0xff))
+        bg_bytes = bytes((bg >> 8 & 0xff, bg & 0xff))
+        height = font.HEIGHT
+        offset_width = font.OFFSET_WIDTH
+        drawn = 0
+        for char in text:
+            index = font.MAP.find(chr(char))
+            if index < 0:
+                continue
+            width = font.WIDTHS[index]
+            bit = int.from_bytes(bytes(font.OFFSETS[index * offset_width:(index + 1) * offset_width]), 'big')
+            for yy in range(height):
+                row = bytearray()
+                for _ in range(width):
+                    row += fg_bytes if font.BITMAPS[bit >> 3] & (0x80 >> (bit & 7)) else bg_bytes
+                    bit += 1
+                self._put_row(x + drawn, y + yy, row)
+            self._send(width * height)
+            drawn += width
+        return drawn
+
+    def _put_row(self, x: int, y: int, row: bytes) -> None:
+        if not 0 <= y < self._height:
+            return
+        w = len(row) // 2
+        x0, _, w0, _ = self._clip(x, y, w, 1)
+        if w0:
+            start = (y * self._width + x0) * 2
+            self.framebuffer[start:start + 2 * w0] = row[2 * (x0 - x):2 * (x0 - x + w0)]
+
+    # inspection helpers, not part of the driver
+
+    def pixel_at(self, x: int, y: int) -> int:
+        """colour in frame memory"""
+        i = (y * self._width + x) * 2
+        return self.framebuffer[i] << 8 | self.framebuffer[i + 1]
+
+    def memory_line(self, display_line: int) -> int:
+        """the frame memory line shown on display_line, with the vertical scrolling applied"""
+        tfa, vsa, _ = self.scroll_area
+        if tfa <= display_line < tfa + vsa:
+            return tfa + (display_line - tfa + self.scroll_start - tfa) % vsa
+        return display_line
+
+    def displayed(self) -> bytes:
+        """the framebuffer as shown on the display, line by line"""
+        row_bytes = self._width * 2
+        shown = bytearray()
+        for line in range(self._height):
+            start = self.memory_line(line) * row_bytes
+            shown += self.framebuffer[start:start + row_bytes]
+        return bytes(shown)
+
+    def displayed_pixel_at(self, x: int, y: int) -> int:
+        return self.pixel_at(x, self.memory_line(y))
+
+    def to_ppm(self) -> bytes:
+        """what the display shows as a binary ppm image"""
+        rgb = bytearray()
+        shown = self.displayed()
+        for i in range(0, len(shown), 2):
+            c = shown[i] << 8 | shown[i + 1]
+            rgb += bytes(((c >> 8) & 0xf8, (c >> 3) & 0xfc, (c << 3) & 0xf8))
+        return b'P6\n%d %d\n255\n' % (self._width, self._height) + bytes(rgb)
@@ -0,0 +1,82 @@
+"""
+filter a synthetic corpus of scan results on name and company id:
+decode_name + decode_man_spec_data (one walk and slices each) against the prefilter of the central:
+find_field stops walking at the field it looks for and equals_at compares in place
+"""
+import random
+
+import bench_common
+from ble_advertising import advertising_payload, decode_man_spec_data, decode_name, find_field, equals_at, name_equals
+
+OUR_COMPANY_ID = b'\xff\xff'
+WANTED_NAME = 'badge'
+
+
+def corpus(n: int = 3_000, seed: int = 2024) -> list:
+    """mix of our advertisements and foreign ones, as seen in a crowded hall"""
+    rnd = random.Random(seed)
+    payloads = []
+    for _ in range(n):
+        kind = rnd.randrange(5)
+        data = bytes(rnd.randrange(256) for _ in range(rnd.randrange(3, 12)))
+        if kind == 0:  # ours
+            payload = advertising_payload(name=WANTED_NAME.encode(), company_id=OUR_COMPANY_ID, man_spec_data=data)
+        elif kind == 1:  # other company, with flags
+            payload = advertising_payload(limited_disc=False, br_edr=False, company_id=b'\x4c\x00', man_spec_data=data)
+        elif kind == 2:  # named device without manufacturer data
+            payload = advertising_payload(br_edr=False, name=b'dev-%d' % rnd.randrange(1000), appearance=0x0340)
+        elif kind == 3:  # our company, other name
+            payload = advertising_payload(name=b'other', company_id=OUR_COMPANY_ID, man_spec_data=data)
+        else:  # service data and zero padding
+            payload = bytes((len(data) + 1, 0x16)) + data + bytes(rnd.randrange(0, 12))
+        payloads.append(memoryview(bytes(payload)))  # the ble irq hands out memoryviews
+    return payloads
+
+
+def filter_decode(adv_data: memoryview) -> bool:
+    if decode_name(adv_data) == WANTED_NAME:
+        c_id, man_spec_data = decode_man_spec_data(adv_data)
+        return OUR_COMPANY_ID == bytes(c_id)
+    return False
+
+
+def filter_in_place(adv_data: memoryview, wanted_name: bytes) -> bool:
+    # the company id first, like BLESimpleCentral._prefilter, most foreign advertisements end there
+    offset = find_field(adv_data, 0xff)
+    if offset == 0 or adv_data[offset - 2] - 1 <= len(OUR_COMPANY_ID):
+        return False
+    if not equals_at(adv_data, offset, OUR_COMPANY_ID):
+        return False
+    return name_equals(adv_data, wanted_name)
+
+
+def _cycle(payloads: list, fn):
+    """call fn on the next scan result of the corpus on every call"""
+    i = 0
+
+    def next_payload():
+        nonlocal i
+        fn(payloads[i])
+        i = (i + 1) % len(payloads)
+
+    return next_payload
+
+
+def main():
+    payloads = corpus()
+    wanted_name = WANTED_NAME.encode()
+    found = [p for p in payloads if filter_decode(p)]
+    assert found == [p for p in payloads if filter_in_place(p, wanted_name)]
+    print(f"{len(payloads)} scan results, {len(found)} for us")
+
+    cases = (
+        ("decode_name + decode_man_spec_data", _cycle(payloads, filter_decode)),
+        ("find_field + equals_at in place", _cycle(payloads, lambda p: filter_in_place(p, wanted_name))),
+    )
+    for name, fn in cases:
+        bench_common.report(name, bench_common.bench_time(fn, 20 * len(payloads)),
+                            bench_common.bench_alloc(fn, len(payloads)))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,68 @@
+"""
+time to first scan of the central example: importing example_tlv_bluetooth_central and running central()
+until it starts the first ble scan, each run in a fresh interpreter, with the heap the badge modules allocated by then.
+the baseline sets up the screen, pixels and buzzer before the scan, as the modules did at import before they
+set up their hardware on first use
+host cpython with the badge_simulator stand-ins, so the hardware setup costs what the stand-ins cost,
+the spi and screen setup on the badge take longer
+"""
+import subprocess
+import sys
+import time
+
+RUNS = 7
+
+
+def child(heap: bool, eager: bool) -> None:
+    import contextlib
+    import io
+    import tracemalloc
+
+    import bench_common  # noqa: F401
+    import bluetooth
+
+    start = time.perf_counter()
+    if heap:
+        # slows everything down, the times come from the runs without it
+        tracemalloc.start()
+
+    first_scan = {}
+    gap_scan = bluetooth.BLE.gap_scan
+
+    def timed_gap_scan(self, duration_ms, *args):
+        if duration_ms is not None and not first_scan:
+            first_scan['s'] = time.perf_counter() - start
+            first_scan['heap'] = tracemalloc.get_traced_memory()[0] if heap else 0
+            raise KeyboardInterrupt
+        return gap_scan(self, duration_ms, *args)
+
+    bluetooth.BLE.gap_scan = timed_gap_scan
+    with contextlib.redirect_stdout(io.StringIO()):
+        import example_tlv_bluetooth_central
+        imported = time.perf_counter() - start
+        if eager:
+            example_tlv_bluetooth_central.init_hardware()
+        example_tlv_bluetooth_central.central()
+    print(f"{imported} {first_scan['s']} {first_scan['heap']}")
+
+
+def main():
+    if sys.argv[1:2] == ['--child']:
+        child('heap' in sys.argv[2:], 'eager' in sys.argv[2:])
+        return
+
+    def run(*args):
+        out = subprocess.run([sys.executable, __file__, '--child', *args], capture_output=True, text=True, check=True)
+        return out.stdout.split()
+
+    for name, mode in (("eager init before the scan", ('eager',)), ("init on first use", ())):
+        runs = sorted((float(imported), float(first_scan))
+                      for imported, first_scan, _ in (run(*mode) for _ in range(RUNS)))
+        imported, first_scan = runs[len(runs) // 2]
+        heap = int(run('heap', *mode)[2])
+        print(f"{name:<28} import {imported * 1_000:7.1f} ms, first scan after {first_scan * 1_000:7.1f} ms,"
+              f" {heap} bytes on the heap by then (median of {RUNS}, host)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,109 @@
+"""
+the value codecs of tlv_pixels, tlv_screen and tlv_buzzer: a struct format string parsed on every call,
+as they were, against the Structs of tlv_codecs made once, with pack_into into reused buffers
+
+    python bench_codecs.py [results.json]
+
+runs with python or with the micropython unix port from the python_tlv directory,
+micropython has no struct.Struct, there tlv_codecs uses struct_compat and only the allocations can differ,
+the module functions are skipped when the badge modules cannot be imported
+"""
+import struct
+import sys
+
+import bench_common
+import tlv_codecs
+import tlv_types
+from tlv import TLVBuilder
+
+COLORS = ((70, 1, 155), (0, 126, 254), (0, 187, 0), (254, 246, 1), (221, 0, 0))
+RGB_5 = bytes(c for color in COLORS for c in color)
+NOTE = struct.pack('!fHH', 440.0, 120, 20)
+TEXT = b'Hello Joram'
+
+
+def _rgb_n_to_bytes_before(colors) -> bytes:
+    b = bytes()
+    for i in range(len(colors)):
+        b += struct.pack('!BBB', *colors[i])
+    return b
+
+
+def _set_5_before(value) -> list:
+    return [struct.unpack_from('!BBB', value, i * 3) for i in range(5)]
+
+
+def bench_structs() -> None:
+    rgb = tlv_codecs.PIXELS_SET_COLOR
+    rgb_5 = tlv_codecs.PIXELS_SET_5_COLOR
+    note = tlv_codecs.BUZZER_NOTE
+    screen_color = tlv_codecs.SCREEN_COLOR
+    color = b'\xf8\x00'
+    buf = bytearray(len(RGB_5))
+
+    cases = (
+        ("rgb pack format", lambda: struct.pack('!BBB', 70, 1, 155)),
+        ("rgb pack Struct", lambda: rgb.pack(70, 1, 155)),
+        ("rgb unpack_from format", lambda: struct.unpack_from('!BBB', RGB_5, 3)),
+        ("rgb unpack_from Struct", lambda: rgb.unpack_from(RGB_5, 3)),
+        ("rgb pack_into Struct", lambda: rgb.pack_into(buf, 3, 70, 1, 155)),
+        ("set_5_color 5 unpack_from format", lambda: _set_5_before(RGB_5)),
+        ("set_5_color 1 unpack Struct", lambda: rgb_5.unpack(RGB_5)),
+        ("screen color unpack format", lambda: struct.unpack('!H', color)),
+        ("screen color unpack Struct", lambda: screen_color.unpack(color)),
+        ("screen text unpack dynamic format", lambda: struct.unpack('<' + str(len(TEXT)) + 's', TEXT)[0]),
+        ("note pack format", lambda: struct.pack('!fHH', 440.0, 120, 20)),
+        ("note pack Struct", lambda: note.pack(440.0, 120, 20)),
+        ("note unpack format", lambda: struct.unpack('!fHH', NOTE)),
+        ("note unpack Struct", lambda: note.unpack(NOTE)),
+    )
+    for name, fn in cases:
+        bench_common.measure(name, fn)
+
+    builder = TLVBuilder()
+
+    def builder_pack(fmt) -> None:
+        builder.reset()
+        builder.pack(tlv_types.tlv_type_buzzer_note, fmt, 440.0, 120, 20)
+
+    bench_common.measure("TLVBuilder.pack format", lambda: builder_pack('!fHH'))
+    bench_common.measure("TLVBuilder.pack Struct", lambda: builder_pack(note))
+
+
+def bench_modules() -> None:
+    try:
+        import tlv_pixels
+    except ImportError:
+        print("tlv_pixels skipped, no neopixel module")
+        return
+
+    assert tlv_pixels.rgb_n_to_bytes(COLORS) == _rgb_n_to_bytes_before(COLORS)
+    buf = bytearray(len(RGB_5))
+    bench_common.measure("rgb_n_to_bytes += format", lambda: _rgb_n_to_bytes_before(COLORS))
+    bench_common.measure("rgb_n_to_bytes Struct", lambda: tlv_pixels.rgb_n_to_bytes(COLORS))
+    bench_common.measure("rgb_n_into reused buffer", lambda: tlv_pixels.rgb_n_into(COLORS, buf))
+    bench_common.measure("bytes_to_rgb", lambda: tlv_pixels.bytes_to_rgb(RGB_5, 3))
+    tlv_pixels.init()
+    bench_common.measure("apply_pixels_set_5_color", lambda: tlv_pixels.apply_pixels_set_5_color(RGB_5))
+
+    import tlv_screen
+
+    # once every console line shows the text the compositor skips it, what is left is the decode and the compare
+    text_view = memoryview(b'\x0c\x0b' + TEXT)[2:]  # the value as TLVRecords hands it over
+    tlv_screen.apply_screen_text(TEXT)
+    bench_common.measure("apply_screen_text same line bytes", lambda: tlv_screen.apply_screen_text(TEXT))
+    bench_common.measure("apply_screen_text same line view", lambda: tlv_screen.apply_screen_text(text_view))
+
+
+def main():
+    print(f"{sys.implementation.name} {sys.version.split()[0]}")
+    bench_structs()
+    bench_modules()
+
+    if len(sys.argv) > 1:
+        bench_common.write_json(sys.argv[1])
+        print(f"results written to {sys.argv[1]}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,136 @@
+"""
+helpers shared by the bench_*.py scripts
+runs on host CPython and on the MicroPython unix port, the badge modules are imported flat from micropython_example_tlv
+"""
+import gc
+import sys
+import time
+
+try:
+    import tracemalloc
+except ImportError:
+    tracemalloc = None
+
+
+def _add_badge_path() -> None:
+    here = __file__.replace('\\', '/')
+    here = here.rsplit('/', 1)[0] if '/' in here else '.'
+    badge_path = here + '/../micropython_example_tlv'
+    if badge_path not in sys.path:
+        sys.path.insert(0, badge_path)
+
+
+_add_badge_path()
+
+try:
+    import micropython  # noqa: F401
+except ImportError:
+    # host cpython: stand-ins for the micropython only modules
+    import badge_simulator
+
+    badge_simulator.install()
+
+if hasattr(time, 'ticks_us'):
+    def _now_us() -> int:
+        return time.ticks_us()
+
+    def _elapsed_us(start: int) -> int:
+        return time.ticks_diff(time.ticks_us(), start)
+else:
+    def _now_us() -> int:
+        return time.perf_counter_ns() // 1000
+
+    def _elapsed_us(start: int) -> int:
+        return time.perf_counter_ns() // 1000 - start
+
+
+def bench_time(fn, iterations: int = 10_000) -> float:
+    """run fn iterations times, return the mean duration in us"""
+    fn()  # warm up
+    gc.collect()
+    start = _now_us()
+    for _ in range(iterations):
+        fn()
+    return _elapsed_us(start) / iterations
+
+
+def bench_alloc(fn, iterations: int = 1_000) -> float:
+    """run fn iterations times, return the mean number of bytes allocated per call"""
+    fn()  # warm up, lazily created objects should not count
+    gc.collect()
+    if tracemalloc is not None:
+        # cpython frees by refcount, so measure the peak of every single call instead of the total
+        allocated = 0
+        tracemalloc.start()
+        for _ in range(iterations):
+            before = tracemalloc.get_traced_memory()[0]
+            tracemalloc.reset_peak()
+            fn()
+            allocated += tracemalloc.get_traced_memory()[1] - before
+        tracemalloc.stop()
+        return allocated / iterations
+
+    # micropython: count heap growth with the collector disabled
+    gc.disable()
+    before = gc.mem_alloc()
+    for _ in range(iterations):
+        fn()
+    allocated = gc.mem_alloc() - before
+    gc.enable()
+    gc.collect()
+    return allocated / iterations
+
+
+def bench_samples(fn, samples: int = 200, batch: int = 50) -> list:
+    """sorted durations in us per call, every sample is the mean of batch calls, the clock is too coarse for one"""
+    fn()  # warm up
+    gc.collect()
+    durations = []
+    for _ in range(samples):
+        start = _now_us()
+        for _ in range(batch):
+            fn()
+        durations.append(_elapsed_us(start) / batch)
+    durations.sort()
+    return durations
+
+
+def percentile(sorted_values: list, p: float) -> float:
+    return sorted_values[min(len(sorted_values) - 1, int(p * len(sorted_values)))]
+
+
+def report(name: str, us_per_op: float, bytes_per_op: float | None = None) -> None:
+    line = f"{name:<40} {us_per_op:10.3f} us/op {1_000_000 / us_per_op if us_per_op else 0:12.0f} ops/s"
+    if bytes_per_op is not None:
+        line += f" {bytes_per_op:10.1f} B/op"
+    print(line)
+
+
+# results of measure() and record(), written by write_json()
+results = {}
+
+
+def record(name: str, **values) -> None:
+    results[name] = values
+
+
+def measure(name: str, fn, samples: int = 200, batch: int = 50, alloc_iterations: int = 1_000) -> dict:
+    """mean, p50 and p99 duration and allocation of fn, reported and recorded under name"""
+    durations = bench_samples(fn, samples, batch)
+    us_per_op = sum(durations) / len(durations)
+    bytes_per_op = bench_alloc(fn, alloc_iterations)
+    record(name, ops_per_s=round(1_000_000 / us_per_op) if us_per_op else 0, us_per_op=round(us_per_op, 3),
+           p50_us=round(percentile(durations, 0.5), 3), p99_us=round(percentile(durations, 0.99), 3),
+           bytes_per_op=round(bytes_per_op, 1))
+    print(f"{name:<40} {us_per_op:10.3f} us/op {results[name]['ops_per_s']:12d} ops/s"
+          f" p50 {results[name]['p50_us']:9.3f} p99 {results[name]['p99_us']:9.3f} us {bytes_per_op:10.1f} B/op")
+    return results[name]
+
+
+def write_json(path: str) -> None:
+    """the recorded results with the interpreter they were measured on, to diff across commits"""
+    import json
+
+    with open(path, 'w') as f:
+        json.dump({'implementation': sys.implementation.name, 'version': sys.version.split()[0],
+                   'platform': sys.platform, 'results': results}, f)
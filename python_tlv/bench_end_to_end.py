@@ -0,0 +1,72 @@
+"""
+latency and throughput from apply_and_broadcast on a sender to apply_tlvs returning on a receiver
+the unmodified example modules run in the badge_simulator: the latency is virtual time, the code itself takes none,
+so it measures the advertising interval, the scan windows and the main loop of the central, with packet loss
+host cpython only
+"""
+import contextlib
+import io
+
+import bench_common
+import badge_simulator
+
+COMMANDS = 100
+
+
+def run(loss: float, delay_ms: int, commands: int = COMMANDS, seed: int = 0) -> dict:
+    """send commands distinct tlvs with apply_and_broadcast, return the delivery ratio, rate and latencies"""
+    sim = badge_simulator.Simulation(loss=loss, seed=seed)
+    sender = sim.add_device('sender', 'example_tlv_bluetooth_peripheral')
+    receiver = sim.add_device('receiver', 'example_tlv_bluetooth_central', 'central')
+    peripheral = sender.modules['example_tlv_bluetooth_peripheral']
+    central = receiver.modules['example_tlv_bluetooth_central']
+
+    sent = {}  # encoded -> ticks_us apply_and_broadcast was called
+    applied = {}  # encoded -> ticks_us apply_tlvs returned on the receiver
+
+    apply_tlvs = central.tlv_parser.apply_tlvs
+
+    def timed_apply_tlvs(data, *args):
+        apply_tlvs(data, *args)
+        applied.setdefault(bytes(data), receiver.ticks_us())
+
+    central.tlv_parser.apply_tlvs = timed_apply_tlvs
+    peripheral.tlv_parser.set_log(sender.modules['tlv'].LOG_OFF)
+
+    def send_all():
+        tlv_type = peripheral.tlv_pixels.tlv_types.tlv_type_pixels_set_i_color
+        with peripheral.BLESimplePeripheral(name=None) as per:
+            for i in range(commands):
+                encoded = peripheral.tlv_parser.encode(tlv_type, bytes((i % 5, i & 0xff, i >> 8, 0)))
+                sent[encoded] = sender.ticks_us()
+                peripheral.apply_and_broadcast(per, encoded, delay_ms)
+
+    sender.start(send_all)
+    with contextlib.redirect_stdout(io.StringIO()):  # ble activation and the stats of the central
+        while not sender.finished:
+            sim.run(sim.now_us // 1_000 + 1_000)
+        sim.stop()
+
+    latencies = sorted((applied[encoded] - start) / 1_000 for encoded, start in sent.items() if encoded in applied)
+    first = min(sent.values())
+    last = max(applied.values()) if applied else first
+    return {
+        'delivered': round(len(latencies) / commands, 3),
+        'commands_per_s': round(len(latencies) * 1_000_000 / (last - first), 1) if last > first else 0,
+        'p50_ms': bench_common.percentile(latencies, 0.5) if latencies else None,
+        'p99_ms': bench_common.percentile(latencies, 0.99) if latencies else None,
+    }
+
+
+def main():
+    for delay_ms in (200, 100, 50):
+        for loss in (0.0, 0.1, 0.3):
+            name = f"end to end delay={delay_ms}ms loss={loss}"
+            result = run(loss, delay_ms)
+            bench_common.record(name, **result)
+            print(f"{name:<40} delivered {result['delivered']:6.1%} {result['commands_per_s']:6.1f} commands/s"
+                  f" p50 {result['p50_ms']} p99 {result['p99_ms']} ms")
+
+
+if __name__ == "__main__":
+    main()
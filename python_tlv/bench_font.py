@@ -0,0 +1,79 @@
+"""
+bytes on flash, heap kept after loading, and load time of the chango_16 font:
+the chango_16.py module against the chango_16.fnt binary font read by binary_font.py,
+plus the time to decode glyphs from flash, cold and from the small cache of decoded glyphs
+runs with python or with the micropython unix port from the python_tlv directory
+"""
+import gc
+import os
+import sys
+
+import bench_common
+import binary_font
+
+try:
+    import tracemalloc
+except ImportError:
+    tracemalloc = None
+
+
+def file_size(name: str) -> int:
+    try:
+        return os.stat(binary_font.find(name))[6]
+    except OSError:
+        return 0
+
+
+def measure_load(load):
+    """heap kept by what load() returns, the peak while loading and the time in us"""
+    gc.collect()
+    if tracemalloc is not None:
+        tracemalloc.start()
+        start = bench_common._now_us()
+        kept = load()
+        us = bench_common._elapsed_us(start)
+        gc.collect()
+        current, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        return kept, current, peak, us
+
+    before = gc.mem_alloc()
+    start = bench_common._now_us()
+    kept = load()
+    us = bench_common._elapsed_us(start)
+    gc.collect()
+    return kept, gc.mem_alloc() - before, None, us
+
+
+def import_module_font():
+    sys.modules.pop('chango_16', None)
+    return __import__('chango_16')
+
+
+def main():
+    print(f"{sys.implementation.name} {sys.version.split()[0]}")
+    print(f"on flash: chango_16.py {file_size('chango_16.py')} bytes, chango_16.mpy {file_size('chango_16.mpy')} bytes,"
+          f" chango_16.fnt {file_size('chango_16.fnt')} bytes")
+
+    for name, load in (("import chango_16", import_module_font),
+                       ("binary_font.load('chango_16.fnt')", lambda: binary_font.load('chango_16.fnt'))):
+        font, kept, peak, us = measure_load(load)
+        peak_text = f", peak {peak} bytes" if peak is not None else ""
+        print(f"{name:<36} keeps {kept:6} bytes on the heap{peak_text}, {us} us")
+        bench_common.record(name, heap_bytes=kept, peak_bytes=peak, load_us=us)
+
+    font = binary_font.load('chango_16.fnt', cache_glyphs=8)
+    glyphs = len(font.MAP)
+
+    def cold():
+        font._cache.clear()
+        for i in range(glyphs):
+            font.bitmap(i)
+
+    bench_common.measure(f"binary font bitmap() {glyphs} glyphs from flash", cold, samples=20, batch=1, alloc_iterations=20)
+    bench_common.measure("binary font bitmap() cached glyph", lambda: font.bitmap(33))
+    font.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,78 @@
+"""
+spi bytes and time to show a stream of greetings with apply_screen_text,
+the driver's write() per glyph with a full screen fill at every wrap (as before)
+against the glyph cache drawing a line with one blit and clearing only its band,
+and the console starting again at the top when full against scrolling it up with the st7789 scroll start address.
+wrapping and the hardware scroll send the same spi bytes per line, the scroll keeps the newest line at the bottom,
+which without it takes redrawing every console line one band up: the software scroll
+the spi bytes are counted by the st7789 stand-in of the badge_simulator, host cpython only
+"""
+import bench_common
+import st7789
+import chango_16 as font_16
+import tlv_screen
+
+GREETINGS = (b'Hello Joram', b'Hello Jan', b'Hello Bart', b'Hello Fri3d', b'Hello Dojo')
+LINES = 300
+CONSOLE_LINES = 14  # tlv_screen._CONSOLE_LINES
+
+
+def write_per_glyph(tft, lines: int) -> None:
+    # apply_screen_text as it was
+    offset = 0
+    for i in range(lines):
+        if offset >= tft.height():
+            offset = 0
+        if offset == 0:
+            tft.fill(st7789.BLACK)
+        tft.write(font_16, GREETINGS[i % len(GREETINGS)], 0, offset)
+        offset += 16
+
+
+def glyph_cache(lines: int) -> None:
+    for i in range(lines):
+        tlv_screen.apply_screen_text(GREETINGS[i % len(GREETINGS)])
+
+
+def software_scroll(lines: int) -> None:
+    # the newest line at the bottom without the scroll start address: every line is drawn again one band higher
+    shown = []
+    for i in range(lines):
+        shown.append(GREETINGS[i % len(GREETINGS)])
+        del shown[:-CONSOLE_LINES]
+        for row in range(len(shown)):
+            tlv_screen.compositor.text(shown[row], row * tlv_screen.font_size)
+
+
+def max_line_bytes(tft, lines: int) -> int:
+    most = 0
+    for i in range(lines):
+        spi_bytes = tft.spi_bytes
+        tlv_screen.apply_screen_text(GREETINGS[i % len(GREETINGS)])
+        most = max(most, tft.spi_bytes - spi_bytes)
+    return most
+
+
+def main():
+    tft = tlv_screen.init()
+    for name, scroll, fn in (("tft.write per glyph + fill on wrap", False, lambda: write_per_glyph(tft, LINES)),
+                             ("glyph cache, wrap to the top", False, lambda: glyph_cache(LINES)),
+                             ("glyph cache, software scroll", False, lambda: software_scroll(LINES)),
+                             ("glyph cache, hardware scroll", True, lambda: glyph_cache(LINES))):
+        tlv_screen.set_console_scroll(scroll)
+        tlv_screen.apply_screen_clear(b'')
+        spi_bytes, windows = tft.spi_bytes, tft.windows
+        us = bench_common.bench_time(fn, 1) / LINES  # bench_time warms up with a first run
+        spi_per_line = (tft.spi_bytes - spi_bytes) / (2 * LINES)
+        windows_per_line = (tft.windows - windows) / (2 * LINES)
+        print(f"{name:<40} {spi_per_line:9.0f} spi bytes/line {windows_per_line:6.1f} windows/line"
+              f" {us:9.1f} us/line (host, includes the stand-in)")
+    for scroll in (False, True):
+        tlv_screen.set_console_scroll(scroll)
+        tlv_screen.apply_screen_clear(b'')
+        print(f"most spi bytes for one line, {'scroll' if scroll else 'wrap'}: {max_line_bytes(tft, LINES)}")
+    print(f"glyph cache {tlv_screen.text_renderer._cache.stats()}")
+
+
+if __name__ == "__main__":
+    main()
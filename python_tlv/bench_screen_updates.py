@@ -0,0 +1,74 @@
+"""
+spi bytes of a stream of screen tlvs like the peripheral sends: colour cycles, clears and greetings
+every fill a full screen fill and every glyph its own window (as before) against the ScreenCompositor,
+which only repaints what differs from its model of the screen, the spi bytes are counted by the st7789 stand-in
+"""
+import bench_common
+import st7789
+import chango_16 as font_16
+import tlv_screen
+
+GREETINGS = (b'Hello Joram', b'Hello Jan', b'Hello Bart')
+
+
+def updates() -> list:
+    """(apply function name, tlv value) of the show"""
+    show = []
+    for color in tlv_screen.screen_colors:
+        show.append(('apply_screen_color', tlv_screen.screen_color_to_bytes(color)))
+    show += [('apply_screen_clear', b''), ('apply_screen_clear', b'')]
+    for _ in range(3):
+        show += [('apply_screen_text', greeting) for greeting in GREETINGS]
+        show.append(('apply_screen_clear', b''))
+    show.append(('apply_screen_color', tlv_screen.screen_color_to_bytes(st7789.RED)))
+    show += [('apply_screen_text', GREETINGS[i % len(GREETINGS)]) for i in range(30)]
+    show.append(('apply_screen_clear', b''))
+    return show
+
+
+def before(tft, show: list) -> None:
+    # the apply functions as they were
+    offset = 0
+    for name, value in show:
+        if name == 'apply_screen_text':
+            if offset >= tft.height():
+                offset = 0
+            if offset == 0:
+                tft.fill(st7789.BLACK)
+            tft.write(font_16, value, 0, offset)
+            offset += 16
+        elif name == 'apply_screen_clear':
+            tft.fill(st7789.BLACK)
+            offset = 0
+        else:
+            tft.fill(int.from_bytes(value, 'big'))
+            offset = 0
+
+
+def compositor(show: list) -> None:
+    for name, value in show:
+        getattr(tlv_screen, name)(value)
+
+
+def main():
+    tft = tlv_screen.init()
+    show = updates()
+    print(f"{len(show)} screen tlvs")
+
+    start = tft.spi_bytes
+    before(tft, show)
+    print(f"{'full fills, write per glyph':<40} {tft.spi_bytes - start:9d} spi bytes")
+
+    # the console wraps to the top like before, a scroll sends its own commands the compositor does not count
+    tlv_screen.set_console_scroll(False)
+    start = tft.spi_bytes
+    compositor(show)
+    sent = tft.spi_bytes - start
+    print(f"{'compositor':<40} {sent:9d} spi bytes")
+    stats = tlv_screen.compositor.stats()
+    assert stats['spi_bytes_sent'] == sent
+    print(f"compositor {stats}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,119 @@
+"""
+the benchmark suite of the tlv pipeline: encode, decode and apply, the advertising payload helpers,
+the pixel colour conversion and the simulated sender to receiver path with packet loss
+reports ops/s, p50 and p99 per op and bytes allocated per op, and writes them as json to diff across commits:
+
+    python bench_suite.py results.json
+
+runs with python or with the micropython unix port from the python_tlv directory,
+parts needing the badge modules or the simulator are skipped when they cannot be imported
+"""
+import sys
+
+import bench_common
+from tlv import TLVParser, TLVRecords, LOG_OFF
+
+# pixels_set_color, pixels_set_i_color, buzzer_song, screen_color, screen_clear, screen_text
+RECORDS = ((1, b'\x46\x01\x9b'), (2, b'\x01\x00\x7e\xfe'), (21, b'\x03'), (11, b'\xf8\x00'), (10, b''), (12, b'Hello'))
+PAYLOAD = b''.join(TLVParser.encode(t, v) for t, v in RECORDS)
+
+
+def bench_tlv() -> None:
+    def callback(tlv_value):
+        pass
+
+    parser = TLVParser()
+    for tlv_type, tlv_value in RECORDS:
+        parser.add_tlv_mapping(tlv_type, None if tlv_type == 12 else len(tlv_value), callback)
+    parser.compile()
+    parser.set_log(LOG_OFF)
+
+    records = TLVRecords()
+    payload_view = memoryview(PAYLOAD)
+
+    bench_common.measure("tlv encode 6 records", lambda: [TLVParser.encode(t, v) for t, v in RECORDS])
+    bench_common.measure("tlv decode", lambda: TLVParser.decode(PAYLOAD))
+    bench_common.measure("tlv decode out=TLVRecords", lambda: TLVParser.decode(payload_view, out=records))
+    bench_common.measure("tlv apply_tlvs(decode(data))", lambda: parser.apply_tlvs(parser.decode(PAYLOAD)))
+    bench_common.measure("tlv apply_tlvs(data)", lambda: parser.apply_tlvs(payload_view))
+
+
+def bench_advertising() -> None:
+    try:
+        import ble_advertising
+    except ImportError:
+        print("ble_advertising skipped, no bluetooth module")
+        return
+
+    company_id = b'\xff\xff'
+    man_spec_data = PAYLOAD[:20]
+    payload = ble_advertising.advertising_payload(name=b'badge', company_id=company_id, man_spec_data=man_spec_data)
+    services_payload = ble_advertising.advertising_payload(
+        services=[ble_advertising.bluetooth.UUID(0x181a), ble_advertising.bluetooth.UUID(0x1809)])
+    payload_view = memoryview(payload)
+
+    bench_common.measure("advertising_payload", lambda: ble_advertising.advertising_payload(
+        name=b'badge', company_id=company_id, man_spec_data=man_spec_data))
+    bench_common.measure("decode_name", lambda: ble_advertising.decode_name(payload_view))
+    bench_common.measure("decode_man_spec_data", lambda: ble_advertising.decode_man_spec_data(payload_view))
+    bench_common.measure("decode_services", lambda: ble_advertising.decode_services(services_payload))
+    bench_common.measure("find_field", lambda: ble_advertising.find_field(payload_view, 0xff))
+
+
+def bench_pixels() -> None:
+    try:
+        import tlv_pixels
+    except ImportError:
+        print("tlv_pixels skipped, no neopixel module")
+        return
+
+    colors = tlv_pixels.color_rainbow()
+    encoded = tlv_pixels.rgb_n_to_bytes(colors)
+    bench_common.measure("rgb_n_to_bytes 5 colors", lambda: tlv_pixels.rgb_n_to_bytes(colors))
+    bench_common.measure("bytes_to_rgb", lambda: tlv_pixels.bytes_to_rgb(encoded, 3))
+
+    tlv_pixels.init()
+    np = tlv_pixels.pixels.np
+    writes = getattr(np, 'writes', None)
+    bench_common.measure("apply_pixels_set_5_color", lambda: tlv_pixels.apply_pixels_set_5_color(encoded))
+    if writes is not None:
+        # the neopixel stand-in counts the writes to the strip
+        writes = np.writes
+        tlv_pixels.apply_pixels_set_5_color(encoded)
+        print(f"apply_pixels_set_5_color writes the strip {np.writes - writes} time(s)")
+    frame = tlv_pixels.animator.animations()[tlv_pixels.animation_wheel].frame(3)
+    bench_common.measure("pixels.show_frame", lambda: tlv_pixels.pixels.show_frame(frame))
+    pixels = tlv_pixels.pixels
+    pixels.set_gamma(28)
+    pixels.set_brightness(64)
+    bench_common.measure("pixels.show_frame gamma+brightness", lambda: pixels.show_frame(frame))
+    pixels.set_brightness(255)
+    pixels.set_gamma(0)
+    bench_common.measure("wheel formula", lambda: pixels._wheel_color(100, 64))
+    bench_common.measure("pixels.wheel table", lambda: pixels.wheel(100, 64))
+
+
+def bench_end_to_end() -> None:
+    try:
+        import bench_end_to_end
+    except ImportError:
+        print("end to end skipped, the badge simulator needs host cpython")
+        return
+
+    bench_end_to_end.main()
+
+
+def main():
+    print(f"{sys.implementation.name} {sys.version.split()[0]}")
+    bench_tlv()
+    bench_advertising()
+    bench_pixels()
+    bench_end_to_end()
+
+    if len(sys.argv) > 1:
+        bench_common.write_json(sys.argv[1])
+        print(f"results written to {sys.argv[1]}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,72 @@
+"""
+records applied per second: dict dispatch with the per tlv log line (as before)
+against the compiled dispatch table applying straight from the raw buffer
+run with python or with the micropython unix port from the python_tlv directory
+"""
+import bench_common
+import tlv
+from tlv import TLVParser
+
+# pixels_set_color, pixels_set_i_color, buzzer_song, screen_color, screen_clear, screen_text
+PAYLOAD = (TLVParser.encode(1, b'\x46\x01\x9b') +
+           TLVParser.encode(2, b'\x01\x00\x7e\xfe') +
+           TLVParser.encode(21, b'\x03') +
+           TLVParser.encode(11, b'\xf8\x00') +
+           TLVParser.encode(10, b'') +
+           TLVParser.encode(12, b'Hello'))
+RECORDS = len(TLVParser.decode(PAYLOAD))
+
+
+def _callback(tlv_value: bytes) -> None:
+    pass
+
+
+def _discard(message: str) -> None:
+    pass
+
+
+def _parser() -> TLVParser:
+    parser = TLVParser()
+    parser.add_tlv_mapping(1, 3, _callback)
+    parser.add_tlv_mapping(2, 4, _callback)
+    parser.add_tlv_mapping(21, 1, _callback)
+    parser.add_tlv_mapping(11, 2, _callback)
+    parser.add_tlv_mapping(10, 0, _callback)
+    parser.add_tlv_mapping(12, None, _callback)
+    return parser
+
+
+def main():
+    print(f"applying {RECORDS} records per payload, rates below are per record")
+
+    # the log line is still formatted, but not printed, so the terminal does not dominate the numbers
+    before = _parser()
+    before.set_log(tlv.LOG_DEBUG, _discard)
+
+    quiet = _parser()
+    quiet.set_log(tlv.LOG_OFF)
+
+    compiled = _parser()
+    compiled.compile()
+    compiled.set_log(tlv.LOG_OFF)
+
+    timed = _parser()
+    timed.compile()
+    timed.set_log(tlv.LOG_OFF)
+    timed.enable_stats()
+
+    payload_view = memoryview(PAYLOAD)
+    cases = (
+        ("dict + log: apply_tlvs(decode(data))", lambda: before.apply_tlvs(before.decode(PAYLOAD))),
+        ("dict, no log: apply_tlvs(decode(data))", lambda: quiet.apply_tlvs(quiet.decode(PAYLOAD))),
+        ("compiled: apply_tlvs(decode(data))", lambda: compiled.apply_tlvs(compiled.decode(PAYLOAD))),
+        ("compiled: apply_tlvs(data)", lambda: compiled.apply_tlvs(payload_view)),
+        ("compiled + stats: apply_tlvs(data)", lambda: timed.apply_tlvs(payload_view)),
+    )
+    for name, fn in cases:
+        us_per_record = bench_common.bench_time(fn) / RECORDS
+        bench_common.report(name, us_per_record, bench_common.bench_alloc(fn) / RECORDS)
+
+
+if __name__ == "__main__":
+    main()
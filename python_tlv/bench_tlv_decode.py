@@ -0,0 +1,35 @@
+"""
+compare the copying TLVParser.decode with the zero-copy decode paths
+on a full 27 byte manufacturer specific data payload (31 bytes advertising - 2 bytes header - 2 bytes company id)
+"""
+import bench_common
+from tlv import TLVParser, TLVRecords
+
+# pixels_set_color, pixels_set_i_color, buzzer_song, screen_color, screen_clear, screen_text
+PAYLOAD = (TLVParser.encode(1, b'\x46\x01\x9b') +
+           TLVParser.encode(2, b'\x01\x00\x7e\xfe') +
+           TLVParser.encode(21, b'\x03') +
+           TLVParser.encode(11, b'\xf8\x00') +
+           TLVParser.encode(10, b'') +
+           TLVParser.encode(12, b'Hello'))
+assert len(PAYLOAD) == 27
+
+
+def main():
+    print(f"decoding {len(PAYLOAD)} bytes: {PAYLOAD.hex()}")
+
+    records = TLVRecords()
+    payload_view = memoryview(PAYLOAD)  # ble irq data is already a memoryview
+    parser = TLVParser(records=records)
+
+    cases = (
+        ("decode (copy)", lambda: TLVParser.decode(PAYLOAD)),
+        ("decode out=TLVRecords", lambda: TLVParser.decode(payload_view, out=records)),
+        ("TLVParser.decode_records", lambda: parser.decode_records(payload_view)),
+    )
+    for name, fn in cases:
+        bench_common.report(name, bench_common.bench_time(fn), bench_common.bench_alloc(fn))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,44 @@
+"""
+convert a font2bitmap font module to the binary font format of binary_font.py, to upload next to it on the badge:
+
+    python convert_font.py [font module] [output file]
+
+defaults to chango_16 and micropython_example_tlv/chango_16.fnt, host cpython only
+"""
+import importlib
+import sys
+
+import bench_common  # noqa: F401, puts the badge modules on the path
+import binary_font
+from badge_simulator import BADGE_PATH
+
+
+def glyph_bits(font, index: int) -> list:
+    """the pixels of glyph index of a font module or a BinaryFont, row by row"""
+    width = font.WIDTHS[index]
+    if isinstance(font, binary_font.BinaryFont):
+        bitmaps, bit = font.bitmap(index), 0
+    else:
+        bitmaps = font.BITMAPS
+        bit = int.from_bytes(bytes(font.OFFSETS[index * font.OFFSET_WIDTH:(index + 1) * font.OFFSET_WIDTH]), 'big')
+    return [bool(bitmaps[b >> 3] & (0x80 >> (b & 7))) for b in range(bit, bit + width * font.HEIGHT)]
+
+
+def main():
+    module = sys.argv[1] if len(sys.argv) > 1 else 'chango_16'
+    out = sys.argv[2] if len(sys.argv) > 2 else BADGE_PATH + '/' + module + '.fnt'
+    font = importlib.import_module(module)
+    encoded = binary_font.encode_font(font)
+    with open(out, 'wb') as f:
+        f.write(encoded)
+
+    loaded = binary_font.BinaryFont(out)
+    for i in range(len(font.MAP)):
+        if glyph_bits(font, i) != glyph_bits(loaded, i):
+            raise ValueError(f"glyph {font.MAP[i]!r} differs after the conversion")
+    loaded.close()
+    print(f"{module}: {len(font.MAP)} glyphs, {len(encoded)} bytes written to {out}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,133 @@
+"""
+generate the tlv type ids, value codecs and lengths of both badges from tlv_schema.py:
+
+    python generate_tlv.py            writes the files
+    python generate_tlv.py --check    exits 1 when a file is not what the schema generates
+
+micropython_example_tlv/tlv_types.py    the type ids
+micropython_example_tlv/tlv_codecs.py   a struct.Struct per value and the value lengths for TLVParser.add_tlv_mapping
+platformio_example_tlv/include/tlv_types.h    the type ids and value lengths for check_length
+
+after a change to the schema run it and upload tlv_types.py and tlv_codecs.py to the badge
+"""
+import os
+import struct
+import sys
+
+import tlv_schema
+
+ROOT = os.path.join(os.path.dirname(os.path.realpath(__file__)), '..')
+TYPES_PY = os.path.join(ROOT, 'micropython_example_tlv', 'tlv_types.py')
+CODECS_PY = os.path.join(ROOT, 'micropython_example_tlv', 'tlv_codecs.py')
+TYPES_H = os.path.join(ROOT, 'platformio_example_tlv', 'include', 'tlv_types.h')
+
+_GENERATED = "generated by python_tlv/generate_tlv.py from python_tlv/tlv_schema.py, do not edit"
+
+
+def check_schema() -> None:
+    names = set()
+    ids = set()
+    for name, tlv_type, fmt, _ in tlv_schema.types():
+        if name in names or tlv_type in ids:
+            raise ValueError(f"{name} {tlv_type}: the names and ids have to be unique")
+        if not 0 <= tlv_type <= 255:
+            raise ValueError(f"{name}: id {tlv_type} does not fit the type byte")
+        if fmt and struct.calcsize(fmt) > 255:
+            raise ValueError(f"{name}: {fmt!r} does not fit the length byte")
+        names.add(name)
+        ids.add(tlv_type)
+
+
+def value_length(fmt: str | None) -> int | None:
+    return struct.calcsize(fmt) if fmt else (None if fmt is None else 0)
+
+
+def _comment(comment: str | None, prefix: str) -> str:
+    return f"  {prefix} {comment}" if comment else ''
+
+
+def types_py() -> str:
+    lines = [f"# {_GENERATED}", "from micropython import const"]
+    for group_comment, group in tlv_schema.SCHEMA:
+        lines.append('')
+        if group_comment:
+            lines.append(f"# {group_comment}")
+        for name, tlv_type, _, comment in group:
+            lines.append(f"tlv_type_{name} = const({tlv_type}){_comment(comment, '#')}")
+    return '\n'.join(lines) + '\n'
+
+
+def codecs_py() -> str:
+    lines = [
+        f"# {_GENERATED}",
+        "try:",
+        "    from struct import Struct",
+        "except ImportError:",
+        "    # micropython has no struct.Struct, struct_compat keeps the api there but is not faster",
+        "    from struct_compat import Struct",
+        "",
+        "import tlv_types",
+        "",
+        "# the values with a fixed layout, packed and unpacked with a Struct made once",
+    ]
+    for name, _, fmt, comment in tlv_schema.types():
+        if fmt:
+            lines.append(f"{name.upper()} = Struct({fmt!r}){_comment(comment, '#')}")
+    lines += ["", "# value length of every tlv type, None for a value of any length", "LENGTHS = {"]
+    for name, _, fmt, _ in tlv_schema.types():
+        lines.append(f"    tlv_types.tlv_type_{name}: {value_length(fmt)},")
+    lines += [
+        "}",
+        "",
+        "",
+        "def add_mapping(tlv_parser, tlv_type: int, callback) -> None:",
+        '    """TLVParser.add_tlv_mapping with the value length of tlv_type"""',
+        "    tlv_parser.add_tlv_mapping(tlv_type, LENGTHS[tlv_type], callback)",
+    ]
+    return '\n'.join(lines) + '\n'
+
+
+def types_h() -> str:
+    lines = [f"// {_GENERATED}", "#ifndef tlv_types_h", "#define tlv_types_h", "", "#include <stdint.h>"]
+    for group_comment, group in tlv_schema.SCHEMA:
+        lines.append('')
+        if group_comment:
+            lines.append(f"// {group_comment}")
+        for name, tlv_type, _, comment in group:
+            lines.append(f"const uint8_t tlv_type_{name} = {tlv_type};{_comment(comment, '//')}")
+
+    lines += ['', "// value lengths, a type missing here has a value of any length"]
+    for name, _, fmt, _ in tlv_schema.types():
+        length = value_length(fmt)
+        if length is not None:
+            lines.append(f"const uint8_t tlv_length_{name} = {length};")
+    lines += ['', "#endif // tlv_types_h"]
+    return '\n'.join(lines) + '\n'
+
+
+def main():
+    check_only = '--check' in sys.argv[1:]
+    check_schema()
+    stale = []
+    for path, generate in ((TYPES_PY, types_py), (CODECS_PY, codecs_py), (TYPES_H, types_h)):
+        text = generate()
+        try:
+            with open(path) as f:
+                current = f.read()
+        except OSError:
+            current = None
+        if current == text:
+            continue
+        stale.append(os.path.relpath(path, ROOT))
+        if not check_only:
+            with open(path, 'w') as f:
+                f.write(text)
+
+    if check_only and stale:
+        print(f"not generated from the schema: {', '.join(stale)}, run python generate_tlv.py")
+        sys.exit(1)
+    print(f"{len(tlv_schema.types())} tlv types, {'up to date' if not stale else 'wrote ' + ', '.join(stale)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,161 @@
+"""
+replays recorded accelerometer traces against the gesture detection of motion.py and tlv_motion.py:
+every trace in motion_traces/ through the GestureDetector, and through the whole pipeline on a simulated badge,
+the fake LIS2HH12 of the badge simulator playing the trace into its fifo, MotionEvents draining it into tlvs.
+the gestures found have to be the ones the trace expects, within half a second
+
+    python replay_motion.py [trace.csv ...]
+    python replay_motion.py --generate    (re)writes the synthetic traces
+
+a trace is x,y,z raw readings at 2g full scale, one line per sample, with # odr <hz> and # expect <gesture> <s>
+lines, record one on a badge with tlv_motion.record(imu, seconds)
+"""
+import glob
+import math
+import os
+import random
+import sys
+import time
+
+import bench_common  # noqa: F401, puts the badge modules on the path
+import badge_simulator
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.realpath(__file__)), '..', 'micropython_example_tlv_proto'))
+
+import lis2hh12_dev  # noqa: E402
+import motion  # noqa: E402
+from tlv import TLVParser  # noqa: E402
+import tlv_types  # noqa: E402
+from machine import I2C, Pin  # noqa: E402
+
+TRACES = os.path.join(os.path.dirname(os.path.realpath(__file__)), 'motion_traces')
+TOLERANCE_S = 0.5
+_G = 16_393  # raw readings per g at 2g full scale
+
+_TLV_GESTURES = {
+    tlv_types.tlv_type_motion_tap: 'tap',
+    tlv_types.tlv_type_motion_shake: 'shake',
+    tlv_types.tlv_type_motion_tilt: 'tilt',
+}
+
+
+def load(path: str):
+    odr = 100
+    expected = []
+    samples = []
+    with open(path) as f:
+        for line in f:
+            line = line.strip()
+            if line.startswith('#'):
+                words = line[1:].split()
+                if words and words[0] == 'odr':
+                    odr = int(words[1])
+                elif words and words[0] == 'expect':
+                    expected.append((words[1], float(words[2])))
+            elif line:
+                samples.append(tuple(int(v) for v in line.split(',')))
+    return odr, expected, samples
+
+
+def detect(odr: int, samples: list) -> list:
+    """(gesture, s) found by the GestureDetector"""
+    detector = motion.GestureDetector(odr)
+    found = []
+    for n, (x, y, z) in enumerate(samples):
+        gesture = detector.feed(x, y, z)
+        if gesture != motion.GESTURE_NONE:
+            found.append((motion.GESTURE_NAMES[gesture], n / odr))
+    return found
+
+
+def pipeline(odr: int, samples: list) -> list:
+    """(gesture, s) of the tlvs MotionEvents emits on a simulated badge, the fake sensor playing the trace"""
+    sim = badge_simulator.Simulation()
+    badge = sim.add_device('badge', 'tlv_motion')
+    tlv_motion = badge.modules['tlv_motion']
+    found = []
+
+    def run():
+        fake = badge.i2c_devices[0x18] = badge_simulator.FakeLIS2HH12(lambda n: samples[min(n, len(samples) - 1)])
+        imu = lis2hh12_dev.LIS2HH12(I2C(scl=Pin(22), sda=Pin(21)), address=0x18, odr=lis2hh12_dev.ODR_100HZ)
+        events = tlv_motion.MotionEvents(imu, odr)
+        start = time.ticks_us()
+
+        def emit(encoded):
+            for tlv_type, _, _ in TLVParser.decode(encoded):
+                found.append((_TLV_GESTURES[tlv_type], (time.ticks_us() - start) / 1_000_000))
+
+        while fake.samples_taken < len(samples):
+            time.sleep_ms(100)
+            events.poll(emit)
+
+    badge.start(run)
+    sim.run(len(samples) * 1_000 // odr + 1_000)
+    sim.stop()
+    if badge.error is not None:
+        raise badge.error
+    return found
+
+
+def matches(found: list, expected: list) -> bool:
+    return len(found) == len(expected) and all(
+        f[0] == e[0] and abs(f[1] - e[1]) <= TOLERANCE_S for f, e in zip(found, expected))
+
+
+def generate() -> None:
+    rng = random.Random(1)
+    odr = 100
+
+    def noise():
+        return rng.randint(-200, 200)
+
+    def write(name, expected, samples):
+        with open(os.path.join(TRACES, name + '.csv'), 'w') as f:
+            f.write(f"# synthetic, written by replay_motion.py --generate\n# odr {odr}\n")
+            for gesture, s in expected:
+                f.write(f"# expect {gesture} {s}\n")
+            for x, y, z in samples:
+                f.write(f"{x + noise()},{y + noise()},{z + noise()}\n")
+
+    os.makedirs(TRACES, exist_ok=True)
+    flat = [(0, 0, _G)] * (3 * odr)
+    write('rest', [], flat)
+
+    tap = list(flat)
+    tap[odr] = (0, 0, _G + 2 * _G)
+    tap[odr + 1] = (0, 0, _G - _G)
+    write('tap', [('tap', 1.2)], tap)
+
+    shake = list(flat)
+    for n in range(odr, 2 * odr):
+        shake[n] = (int(1.5 * _G * math.sin(2 * math.pi * 4 * (n - odr) / odr)), 0, _G)
+    write('shake', [('shake', 1.4)], shake)
+
+    tilt = []
+    for n in range(4 * odr):
+        angle = min(1.0, max(0.0, (n - odr) / (odr // 2))) * math.pi / 2
+        tilt.append((int(_G * math.sin(angle)), 0, int(_G * math.cos(angle))))
+    write('tilt', [('tilt', 2.0)], tilt)
+    print(f"traces written to {TRACES}")
+
+
+def main():
+    if sys.argv[1:] == ['--generate']:
+        generate()
+        return
+
+    badge_simulator.install()
+    paths = sys.argv[1:] or sorted(glob.glob(os.path.join(TRACES, '*.csv')))
+    failed = 0
+    for path in paths:
+        odr, expected, samples = load(path)
+        for name, found in (('detector', detect(odr, samples)), ('pipeline', pipeline(odr, samples))):
+            ok = matches(found, expected)
+            failed += not ok
+            print(f"{os.path.basename(path):<12} {name:<8} {'ok' if ok else 'FAILED':<6} expected {expected} found {found}")
+    if failed:
+        sys.exit(f"{failed} replays failed")
+
+
+if __name__ == "__main__":
+    main()
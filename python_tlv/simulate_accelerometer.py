@@ -0,0 +1,99 @@
+"""
+checks the LIS2HH12 driver of micropython_example_tlv_proto against the fake sensor of the badge simulator,
+counting i2c transactions: one burst read per X, Y, Z reading instead of three,
+and at 800 Hz the fifo drained into the ring buffer every 20 ms without losing or repeating a sample
+usage: python simulate_accelerometer.py, exits with an error when a check fails
+"""
+import os
+import sys
+import time
+from array import array
+
+import badge_simulator
+
+badge_simulator.install()
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.realpath(__file__)), '..', 'micropython_example_tlv_proto'))
+
+import lis2hh12_dev  # noqa: E402
+from machine import I2C, Pin  # noqa: E402
+
+_ADDRESS = 0x18
+
+
+def motion(n: int):
+    # a counter on x, so lost or repeated samples show
+    return n & 0x7fff, -n & 0x7fff, 16_393
+
+
+def check(whoami: int) -> None:
+    sim = badge_simulator.Simulation()
+    badge = sim.add_device('badge', 'tlv_types')  # the driver is not a module of micropython_example_tlv
+    results = {}
+
+    def run():
+        fake = badge.i2c_devices[_ADDRESS] = badge_simulator.FakeLIS2HH12(motion, whoami)
+        i2c = I2C(scl=Pin(26), sda=Pin(25))
+        imu = lis2hh12_dev.LIS2HH12(i2c, address=_ADDRESS, odr=lis2hh12_dev.ODR_800HZ, sf=lis2hh12_dev.SF_G)
+        time.sleep_ms(10)
+
+        transactions = i2c.transactions
+        x, y, z = imu.acceleration
+        results['acceleration transactions'] = i2c.transactions - transactions
+        results['z g'] = z
+
+        raw = array('h', [0, 0, 0])
+        imu.acceleration_into(raw)
+        results['raw'] = tuple(raw)
+        results['latest'] = motion(fake.samples_taken - 1)
+
+        transactions = i2c.transactions
+        for register in (0x28, 0x2a, 0x2c):
+            imu._register_word(register)
+        results['per axis transactions'] = i2c.transactions - transactions
+
+        ring = imu.stream(lis2hh12_dev.SampleRing(1_024))
+        first = fake.samples_taken
+        transactions = i2c.transactions
+        drained = 0
+        for _ in range(50):
+            time.sleep_ms(20)
+            drained += imu.drain()
+        results['stream transactions'] = i2c.transactions - transactions
+        results['drained'] = drained
+        results['taken'] = fake.samples_taken - first
+        sample = array('h', [0, 0, 0])
+        xs = []
+        while ring.pop_into(sample):
+            xs.append(sample[0])
+        results['in order'] = xs == [motion(n)[0] for n in range(first, first + len(xs))]
+
+        # a late drain finds a full fifo, stream mode kept the newest 32
+        time.sleep_ms(100)
+        results['late drain'] = imu.drain()
+        imu.stop_stream()
+
+    badge.start(run)
+    sim.run(2_000)
+    sim.stop()
+    if badge.error is not None:
+        raise badge.error
+
+    name = 'LIS2HH12' if whoami == 0x41 else 'LIS2DH12'
+    assert results['acceleration transactions'] == 1, results
+    assert results['per axis transactions'] == 3, results
+    assert results['raw'] == results['latest'], results
+    assert abs(results['z g'] - 16_393 * 0.061 * 0.001) < 1e-9, results
+    assert results['in order'] and results['drained'] == results['taken'], results
+    assert results['late drain'] == 32, results
+    print(f"{name}: X, Y, Z in {results['acceleration transactions']} transaction instead of"
+          f" {results['per axis transactions']}, stream {results['drained']} samples at 800 Hz in 1 s with"
+          f" {results['stream transactions']} transactions, in order, a late drain gets the newest 32")
+
+
+def main():
+    check(0x41)
+    check(0x33)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,54 @@
+"""
+run the unmodified peripheral and central examples against each other in the badge simulator
+the peripheral broadcasts its show and plays it, the central receives and applies it, on a virtual clock:
+a minute of show takes a few seconds
+usage: python simulate_badges.py [seconds] [loss] [screen.ppm]
+"""
+import contextlib
+import io
+import sys
+
+import badge_simulator
+
+badge_simulator.install()
+
+
+def main():
+    seconds = int(sys.argv[1]) if len(sys.argv) > 1 else 30
+    loss = float(sys.argv[2]) if len(sys.argv) > 2 else 0.0
+
+    sim = badge_simulator.Simulation(loss=loss)
+    sender = sim.add_device('peripheral', 'example_tlv_bluetooth_peripheral', 'peripheral', rssi=-55)
+    receiver = sim.add_device('central', 'example_tlv_bluetooth_central', 'central')
+
+    # the badges print every applied tlv, keep it for the end
+    output = io.StringIO()
+    with contextlib.redirect_stdout(output):
+        sim.run(seconds * 1_000)
+        # the state of the show, before stop() runs the cleanup of the badges: it clears the leds and fills the screen
+        radio = sim.radio.stats()
+        shown = [(device.buzzer_notes(), len(device.led_log), list(device.leds), device.spi_bytes,
+                  device.screen.background) for device in sim.devices]
+        ppm = receiver.screen.to_ppm() if len(sys.argv) > 3 else None
+        sim.stop()
+
+    print(f"simulated {seconds} s, radio {radio}")
+    for device, (notes, led_writes, leds, spi_bytes, background) in zip(sim.devices, shown):
+        print(f"{device.name}: {len(notes)} notes played, {led_writes} led writes, leds {leds}, "
+              f"{spi_bytes} spi bytes, screen {background:#06x}, error {device.error!r}")
+    # the queue, dedup and prefilter stats the central prints on ctrl-c
+    for line in output.getvalue().splitlines():
+        if 'prefilter_stats' in line:
+            print(line)
+
+    sender_notes = [freq for _, freq, _ in shown[sim.devices.index(sender)][0]]
+    receiver_notes = [freq for _, freq, _ in shown[sim.devices.index(receiver)][0]]
+    print(f"the central played {len(receiver_notes)} of the {len(sender_notes)} notes of the peripheral")
+
+    if ppm is not None:
+        with open(sys.argv[3], 'wb') as f:
+            f.write(ppm)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,83 @@
+"""
+checks the buzzer sequencer of tlv_buzzer against the virtual clock of the badge simulator:
+apply_song and apply_note return without taking time, every note starts and stops when the note table says,
+queued tables follow each other, a song_now tlv preempts and a stop tlv cancels
+usage: python simulate_buzzer.py, exits with an error when a check fails
+"""
+import time
+
+import badge_simulator
+
+badge_simulator.install()
+
+
+def expected_notes(start_us: int, table) -> list:
+    """(start_us, freq, duration_us) of the notes of a note table played from start_us"""
+    notes = []
+    t = start_us
+    for i in range(0, len(table), 3):
+        notes.append((t, table[i], table[i + 1] * 1_000))
+        t += (table[i + 1] + table[i + 2]) * 1_000
+    return notes
+
+
+def main():
+    sim = badge_simulator.Simulation()
+    badge = sim.add_device('badge', 'tlv_buzzer')
+    tlv_buzzer = badge.modules['tlv_buzzer']
+    checks = {}
+
+    def run():
+        # apply_* returns right away, the notes play while the badge sleeps
+        start = time.ticks_us()
+        tlv_buzzer.apply_song(tlv_buzzer.song_to_bytes(tlv_buzzer.rd2d))
+        tlv_buzzer.apply_note(tlv_buzzer.note_to_bytes(440, 250, 50))
+        checks['apply took us'] = time.ticks_us() - start
+        checks['queued'] = tlv_buzzer.sequencer.stats()['queued']
+        time.sleep_ms(3_000)
+
+        # a song_now cuts the playing song, a stop cancels it
+        checks['ringtone start'] = time.ticks_us()
+        tlv_buzzer.apply_song(tlv_buzzer.song_to_bytes(tlv_buzzer.ringtone))
+        time.sleep_ms(500)
+        checks['reload start'] = time.ticks_us()
+        tlv_buzzer.apply_song_now(tlv_buzzer.song_to_bytes(tlv_buzzer.reload))
+        time.sleep_ms(1_000)
+        checks['stop'] = time.ticks_us()
+        tlv_buzzer.apply_stop(b'')
+        time.sleep_ms(1_000)
+
+    badge.start(run)
+    sim.run(10_000)
+    played = badge.buzzer_notes()
+    sim.stop()
+    if badge.error is not None:
+        raise badge.error
+
+    r2d2 = tlv_buzzer.song_table(tlv_buzzer.rd2d)
+    note = tlv_buzzer.note_table((440,), (250,), (50,))
+    expected = expected_notes(0, r2d2)
+    expected += expected_notes(expected[-1][0] + (r2d2[-2] + r2d2[-1]) * 1_000, note)
+    assert checks['apply took us'] == 0, checks
+    assert checks['queued'] == 1, checks
+    assert played[:len(expected)] == expected, (played[:len(expected)], expected)
+    print(f"{len(expected)} notes of a song and a queued note on time, apply returned after 0 us")
+
+    # the ringtone played until the reload preempted it, the reload until the stop
+    ringtone = [n for n in played if checks['ringtone start'] <= n[0] < checks['reload start']]
+    reload = [n for n in played if n[0] >= checks['reload start']]
+    ringtone_expected = expected_notes(checks['ringtone start'], tlv_buzzer.song_table(tlv_buzzer.ringtone))
+    assert ringtone[:-1] == ringtone_expected[:len(ringtone) - 1], ringtone
+    # the note playing is cut off at the preemption
+    cut = ringtone[-1]
+    assert cut[:2] == ringtone_expected[len(ringtone) - 1][:2] and cut[0] + cut[2] == checks['reload start'], cut
+    assert reload and reload[0][0] == checks['reload start'], reload
+    assert all(start + duration <= checks['stop'] for start, _, duration in reload), reload
+    assert badge.buzzer_log[-1][2] == 0, badge.buzzer_log[-1]
+    print(f"song_now preempted after {len(ringtone)} notes of the ringtone,"
+          f" stop cancelled the reload after {len(reload)} notes, the buzzer is off")
+    print(f"sequencer {tlv_buzzer.sequencer.stats()}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,63 @@
+"""
+the tlv types of the badges, the one place they are defined, generate_tlv.py writes from it
+micropython_example_tlv/tlv_types.py, micropython_example_tlv/tlv_codecs.py and platformio_example_tlv/include/tlv_types.h
+
+a group: a comment for all its types and the types,
+a type: name, id, the struct format of its value ('' for no value, None for a value of any length) and a comment
+"""
+
+SCHEMA = (
+    (None, (
+        ('pixels_clear', 0, '', None),
+        ('pixels_set_color', 1, '!BBB', 'r, g, b'),
+        ('pixels_set_i_color', 2, '!BBBB', 'i, r, g, b'),
+        ('pixels_set_5_color', 3, '!15B', 'r, g, b of the 5 pixels'),
+    )),
+    ('micropython badges only, stored animations, brightness and gamma', (
+        ('pixels_animation_start', 4, '!BBB', 'animation id, frames per second, loops (0 plays until stopped)'),
+        ('pixels_animation_stop', 5, '', None),
+        ('pixels_brightness', 6, '!B', '0-255 for all colours'),
+        ('pixels_gamma', 7, '!B', 'in tenths, 0 is off'),
+    )),
+    (None, (
+        ('screen_clear', 10, '', None),
+        ('screen_color', 11, '!H', 'rgb565 colour'),
+        ('screen_text', 12, None, 'text of a console line'),
+    )),
+    (None, (
+        ('buzzer_note', 20, '!fHH', 'frequency, duration ms, sleep ms'),
+        ('buzzer_song', 21, '!B', 'song id, queued after what is playing'),
+    )),
+    ('micropython badges only, the songs play from a timer', (
+        ('buzzer_stop', 22, '', None),
+        ('buzzer_song_now', 23, '!B', 'song id, stops what is playing'),
+    )),
+    ('micropython badges only, gestures of the accelerometer, see tlv_motion', (
+        ('motion_tap', 30, '!B', 'strength'),
+        ('motion_shake', 31, '!B', 'peaks'),
+        ('motion_tilt', 32, '!B', 'orientation, motion.ORIENTATION_*'),
+    )),
+    ('diagnostics, sent by the micropython badges', (
+        ('stats_parser', 250, None, 'tlv.TLVStats.to_bytes()'),
+        ('stats_central', 251, '<12I', 'BLESimpleCentral.stats_to_bytes()'),
+    )),
+)
+
+
+def types():
+    """(name, id, format, comment) of all types"""
+    return [tlv_type for _, group in SCHEMA for tlv_type in group]
+
+
+def type_id(name: str) -> int:
+    for tlv_type in types():
+        if tlv_type[0] == name:
+            return tlv_type[1]
+    raise KeyError(name)
+
+
+def value_format(name: str) -> str | None:
+    for tlv_type in types():
+        if tlv_type[0] == name:
+            return tlv_type[2]
+    raise KeyError(name)
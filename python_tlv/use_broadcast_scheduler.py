@@ -0,0 +1,60 @@
+"""
+run the asyncio broadcast scheduler of the peripheral on the host, with the badge_simulator stub modules
+a song is played locally in the background, the next advertising windows still start on time,
+a second song queues after it like on the centrals, song_now cuts both off for its song and stop silences that one
+"""
+import badge_simulator
+
+badge_simulator.install()
+
+import asyncio  # noqa: E402
+import time  # noqa: E402
+
+import example_tlv_bluetooth_peripheral as peripheral  # noqa: E402
+from broadcast_scheduler import BroadcastScheduler  # noqa: E402
+
+
+async def short_show(scheduler) -> None:
+    await scheduler.broadcast(peripheral.tlv_parser.encode(peripheral.tlv_buzzer.tlv_types.tlv_type_buzzer_song,
+                                                           peripheral.tlv_buzzer.song_to_bytes(
+                                                               peripheral.tlv_buzzer.reload)), 200)
+    await scheduler.broadcast(peripheral.tlv_parser.encode(peripheral.tlv_buzzer.tlv_types.tlv_type_buzzer_song,
+                                                           peripheral.tlv_buzzer.song_to_bytes(
+                                                               peripheral.tlv_buzzer.rd2d)), 200)
+    for color in peripheral.tlv_screen.screen_colors[:4]:
+        await scheduler.broadcast(peripheral.tlv_parser.encode(peripheral.tlv_screen.tlv_types.tlv_type_screen_color,
+                                                               peripheral.tlv_screen.screen_color_to_bytes(color)), 200)
+    await scheduler.broadcast(peripheral.tlv_parser.encode(peripheral.tlv_buzzer.tlv_types.tlv_type_buzzer_song_now,
+                                                           peripheral.tlv_buzzer.song_to_bytes(
+                                                               peripheral.tlv_buzzer.ringtone)), 200)
+    await scheduler.broadcast(peripheral.tlv_parser.encode(peripheral.tlv_buzzer.tlv_types.tlv_type_buzzer_stop, b''),
+                              200)
+
+
+def main():
+    start = time.ticks_ms()
+    with peripheral.BLESimplePeripheral(name=None) as per:
+        asyncio.run(BroadcastScheduler(per, peripheral.tlv_parser).run(short_show))
+
+    for ticks, adv_data in per._ble.advertise_log:
+        what = "stop" if adv_data is None else f"start {adv_data.hex()}"
+        print(f"{time.ticks_diff(ticks, start):6d} ms {what}")
+    print(f"show took {time.ticks_diff(time.ticks_ms(), start)} ms, the song alone takes more than 3500 ms")
+
+    # the queued r2d2 does not cut off the reload, the ringtone of song_now does, the stop cuts off the ringtone
+    device = badge_simulator.current_device()
+    song_now_ms, stop_ms = [time.ticks_diff(ticks, start) for ticks, adv_data in per._ble.advertise_log
+                            if adv_data is not None][-2:]
+    notes = [(time.ticks_diff(ticks_us // 1_000, start), freq) for ticks_us, freq, _ in device.buzzer_notes()]
+    ringtone = list(peripheral.tlv_buzzer.song_table(peripheral.tlv_buzzer.ringtone)[0::3])
+    reload = list(peripheral.tlv_buzzer.song_table(peripheral.tlv_buzzer.reload)[0::3])
+    before = [freq for ms, freq in notes if ms < song_now_ms]
+    assert before == reload[:len(before)], (song_now_ms, notes)
+    played = [freq for ms, freq in notes if ms >= song_now_ms]
+    assert 0 < len(played) < len(ringtone) and played == ringtone[:len(played)], (song_now_ms, notes)
+    assert notes[-1][0] < stop_ms and device.buzzer_log[-1][2] == 0, (stop_ms, notes)
+    print(f"{len(notes) - len(played)} notes of the reload, {len(played)} of the ringtone, the buzzer is off")
+
+
+if __name__ == "__main__":
+    main()
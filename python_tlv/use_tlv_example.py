@@ -1,8 +1,9 @@
-from micropython_example_tlv.tlv import TLVParser
+from micropython_example_tlv.tlv import TLVParser, TLVStreamDecoder, TLVBuilder, TLVBufferFullException
+from python_tlv import tlv_schema
 
 import struct
 
-RGB_COLOR_FMT = '<BBB'
+RGB_COLOR_FMT = tlv_schema.value_format('pixels_set_color')
 
 test_tlv_1 = b'\x01\x03\x64\x64\x64'
 test_tlv_2 = b'\x02\x04\x01\x64\x64\x64'
@@ -17,10 +18,10 @@ example_1 = "0x01 0x03 0x64 0x64 0x64"
 example_2 = "0x02 0x04 0x00 0x64 0x64 0x64"
 example_3 = "0x03 0x0e 0x64 0x64 0x64 0x64 0x64 0x64 0x64 0x64 0x64 0x64 0x64 0x64 0x64 0x64 0x64"
 
-tlv_type_pixels_clear = 0
-tlv_type_pixels_set_color = 1
-tlv_type_pixels_set_i_color = 2
-tlv_type_pixels_set_5_color = 3
+tlv_type_pixels_clear = tlv_schema.type_id('pixels_clear')
+tlv_type_pixels_set_color = tlv_schema.type_id('pixels_set_color')
+tlv_type_pixels_set_i_color = tlv_schema.type_id('pixels_set_i_color')
+tlv_type_pixels_set_5_color = tlv_schema.type_id('pixels_set_5_color')
 
 
 def apply_pixels_set_color(tlv_value: bytes):
@@ -69,9 +70,12 @@ def main():
 
     tlv_parser = TLVParser()
 
-    tlv_parser.add_tlv_mapping(tlv_type_pixels_set_color, 3, apply_pixels_set_color)
-    tlv_parser.add_tlv_mapping(tlv_type_pixels_set_i_color, 4, apply_pixels_set_i_color)
-    tlv_parser.add_tlv_mapping(tlv_type_pixels_set_5_color, 15, apply_pixels_set_5_color)
+    tlv_parser.add_tlv_mapping(tlv_type_pixels_set_color, struct.calcsize(tlv_schema.value_format('pixels_set_color')),
+                               apply_pixels_set_color)
+    tlv_parser.add_tlv_mapping(tlv_type_pixels_set_i_color, struct.calcsize(tlv_schema.value_format('pixels_set_i_color')),
+                               apply_pixels_set_i_color)
+    tlv_parser.add_tlv_mapping(tlv_type_pixels_set_5_color, struct.calcsize(tlv_schema.value_format('pixels_set_5_color')),
+                               apply_pixels_set_5_color)
 
     decoded = tlv_parser.decode(test_tlv_1)
     print(f"{len(decoded)=} {decoded=}")
@@ -110,6 +114,24 @@ def main():
     decoded = tlv_parser.decode(encoded)
     tlv_parser.apply_tlvs(decoded)
 
+    # stream decode, as received in arbitrary chunks from a serial link, with garbage in front
+    stream_decoder = TLVStreamDecoder(tlv_parser)
+    stream = b'\xee\xee' + test_tlv_1 + test_tlv_2 + encoded
+    for i in range(0, len(stream), 3):
+        tlv_parser.apply_tlvs(stream_decoder.feed(stream[i:i + 3]))
+    print(f"{stream_decoder.decoded_tlvs=} {stream_decoder.skipped_bytes=} {stream_decoder.pending()=}")
+
+    # pack several tlvs in one advertisement sized buffer
+    builder = TLVBuilder()
+    builder.add(tlv_type_pixels_set_5_color, color)
+    builder.pack(tlv_type_pixels_set_color, RGB_COLOR_FMT, 100, 200, 255)
+    print(f"{len(builder)=} {builder.remaining()=} {bytes(builder.getvalue()).hex()=}")
+    try:
+        builder.pack(tlv_type_pixels_set_i_color, '<B' + RGB_COLOR_FMT[1:], 1, 100, 100, 100)
+    except TLVBufferFullException as e:
+        print(f"{e=}")
+    tlv_parser.apply_tlvs(builder.getvalue())
+
     p = struct.pack('<B', 1)
     print(f"{len(p)=} {p=} {p.hex()=}")
 